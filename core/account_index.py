@@ -0,0 +1,238 @@
+import bisect
+import threading
+from typing import Dict, Iterable, List, Set, Tuple
+
+# 排序等级: 用户名完全匹配 < 用户名前缀 < 名称前缀 < 用户名包含 < 名称包含
+RANK_EXACT = 0
+RANK_USERNAME_PREFIX = 1
+RANK_NAME_PREFIX = 2
+RANK_USERNAME_CONTAINS = 3
+RANK_NAME_CONTAINS = 4
+
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def normalize_query(query: str) -> str:
+    """搜索词规范化: 去掉空白和开头的@，转小写"""
+    return query.strip().lstrip('@').lower()
+
+
+class AccountSearchIndex:
+    """账号用户名和显示名称的增量搜索索引
+
+    两个有序列表支持前缀查找(二分)，三元组(trigram)倒排表支持子串查找。
+    添加、更新和删除账号只调整该账号的索引项，不重建整个索引。
+
+    批量加载时只同步建立有序列表，倒排表在后台线程中建立，
+    建好之前的子串查找退化为线性扫描。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # 用户名 -> (小写用户名, 小写名称)
+        self._entries: Dict[str, Tuple[str, str]] = {}
+        self._usernames: List[Tuple[str, str]] = []  # (小写用户名, 用户名)
+        self._names: List[Tuple[str, str]] = []      # (小写名称, 用户名)
+        self._postings: Dict[str, Set[str]] = {}
+        self._postings_ready = True
+        self._generation = 0
+
+    @property
+    def ready(self) -> bool:
+        """倒排表是否已建好"""
+        return self._postings_ready
+
+    def _index_grams(self, username: str, key: Tuple[str, str]):
+        if self._postings_ready:
+            for gram in _trigrams(key[0]) | _trigrams(key[1]):
+                self._postings.setdefault(gram, set()).add(username)
+
+    def _unindex_grams(self, username: str, key: Tuple[str, str]):
+        if self._postings_ready:
+            for gram in _trigrams(key[0]) | _trigrams(key[1]):
+                postings = self._postings.get(gram)
+                if postings is not None:
+                    postings.discard(username)
+                    if not postings:
+                        del self._postings[gram]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, username: str) -> bool:
+        return username in self._entries
+
+    def add(self, username: str, name: str = ''):
+        """添加或更新账号，名称未变化时不做任何事"""
+        key = (username.lower(), (name or '').lower())
+        with self._lock:
+            old = self._entries.get(username)
+            if old == key:
+                return
+            if old is not None:
+                self._remove_locked(username, old)
+            self._entries[username] = key
+            bisect.insort(self._usernames, (key[0], username))
+            if key[1]:
+                bisect.insort(self._names, (key[1], username))
+            self._index_grams(username, key)
+
+    def add_many(self, accounts: Iterable[Tuple[str, str]]):
+        """批量添加或更新(用户名, 名称)
+
+        有序列表只在最后排序一次，避免逐个插入时反复移动列表元素。
+        """
+        with self._lock:
+            changed = {}
+            for username, name in accounts:
+                key = (username.lower(), (name or '').lower())
+                old = self._entries.get(username)
+                if old != key:
+                    changed[username] = (old, key)
+            if not changed:
+                return
+            stale = {u for u, (old, _) in changed.items() if old is not None}
+            if stale:
+                self._usernames = [e for e in self._usernames if e[1] not in stale]
+                self._names = [e for e in self._names if e[1] not in stale]
+            for username, (old, key) in changed.items():
+                if old is not None:
+                    self._unindex_grams(username, old)
+                self._entries[username] = key
+                self._usernames.append((key[0], username))
+                if key[1]:
+                    self._names.append((key[1], username))
+                self._index_grams(username, key)
+            self._usernames.sort()
+            self._names.sort()
+
+    def load(self, accounts: Iterable[Tuple[str, str]], background: bool = True):
+        """用(用户名, 名称)替换全部索引内容，用于初次加载
+
+        Args:
+            accounts: 账号的(用户名, 名称)
+            background: 在后台线程中建立倒排表
+        """
+        entries = {username: (username.lower(), (name or '').lower())
+                   for username, name in accounts}
+        usernames = sorted((key[0], username) for username, key in entries.items())
+        names = sorted((key[1], username) for username, key in entries.items() if key[1])
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+            self._entries = entries
+            self._usernames = usernames
+            self._names = names
+            self._postings = {}
+            self._postings_ready = False
+            snapshot = dict(entries)
+        if background:
+            threading.Thread(target=self._build_postings, args=(generation, snapshot),
+                             name="AccountIndex", daemon=True).start()
+        else:
+            self._build_postings(generation, snapshot)
+
+    def _build_postings(self, generation: int, snapshot: Dict[str, Tuple[str, str]]):
+        """根据快照建立倒排表，再补上建立期间发生的变更"""
+        postings: Dict[str, Set[str]] = {}
+        for username, key in snapshot.items():
+            for gram in _trigrams(key[0]) | _trigrams(key[1]):
+                postings.setdefault(gram, set()).add(username)
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._postings = postings
+            self._postings_ready = True
+            for username, key in snapshot.items():
+                if self._entries.get(username) != key:
+                    self._unindex_grams(username, key)
+            for username, key in self._entries.items():
+                if snapshot.get(username) != key:
+                    self._index_grams(username, key)
+
+    def remove(self, username: str):
+        """删除账号"""
+        with self._lock:
+            old = self._entries.pop(username, None)
+            if old is not None:
+                self._remove_locked(username, old)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries = {}
+            self._usernames = []
+            self._names = []
+            self._postings = {}
+            self._postings_ready = True
+
+    def _remove_locked(self, username: str, key: Tuple[str, str]):
+        self._entries.pop(username, None)
+        self._discard_sorted(self._usernames, (key[0], username))
+        if key[1]:
+            self._discard_sorted(self._names, (key[1], username))
+        self._unindex_grams(username, key)
+
+    @staticmethod
+    def _discard_sorted(items: List[Tuple[str, str]], item: Tuple[str, str]):
+        i = bisect.bisect_left(items, item)
+        if i < len(items) and items[i] == item:
+            del items[i]
+
+    @staticmethod
+    def _prefix_scan(items: List[Tuple[str, str]], prefix: str, limit: int) -> List[str]:
+        result = []
+        i = bisect.bisect_left(items, (prefix, ''))
+        while i < len(items) and len(result) < limit and items[i][0].startswith(prefix):
+            result.append(items[i][1])
+            i += 1
+        return result
+
+    def search(self, query: str, limit: int = 50) -> List[str]:
+        """搜索账号
+
+        少于3个字符时只做前缀匹配，否则同时匹配包含该子串的账号。
+
+        Args:
+            query: 搜索词，可带@前缀
+            limit: 最多返回的结果数
+
+        Returns:
+            按匹配程度排序的用户名列表
+        """
+        q = normalize_query(query)
+        if not q:
+            return []
+        with self._lock:
+            ranked: Dict[str, int] = {}
+            for username in self._prefix_scan(self._usernames, q, limit):
+                ranked[username] = (RANK_EXACT if self._entries[username][0] == q
+                                    else RANK_USERNAME_PREFIX)
+            for username in self._prefix_scan(self._names, q, limit):
+                ranked.setdefault(username, RANK_NAME_PREFIX)
+
+            if len(q) >= 3 and len(ranked) < limit:
+                if self._postings_ready:
+                    grams = sorted(_trigrams(q), key=lambda g: len(self._postings.get(g, ())))
+                    candidates = set(self._postings.get(grams[0], ()))
+                    for gram in grams[1:]:
+                        if not candidates:
+                            break
+                        candidates &= self._postings.get(gram, set())
+                else:
+                    candidates = self._entries
+                for username in candidates:
+                    if username in ranked:
+                        continue
+                    uname, name = self._entries[username]
+                    # 三元组全部命中不代表连续出现，需再确认子串
+                    if q in uname:
+                        ranked[username] = RANK_USERNAME_CONTAINS
+                    elif q in name:
+                        ranked[username] = RANK_NAME_CONTAINS
+
+            entries = self._entries
+            ordered = sorted(ranked, key=lambda u: (ranked[u], len(entries[u][0]), entries[u][0]))
+        return ordered[:limit]
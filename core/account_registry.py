@@ -0,0 +1,153 @@
+import sys
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+
+FIELDS = ('username', 'name', 'id', 'token', 'since_id',
+          'status', 'last_verified', 'profile_image_url')
+
+# 账号状态
+STATUS_VALID = 'valid'
+STATUS_INVALID = 'invalid'
+STATUS_ERROR = 'error'
+
+
+class AccountRecord:
+    """账号记录
+
+    使用__slots__减少每个账号的内存占用，用户名经过intern，
+    分组与登录面板通过引用同一条记录共享账号数据。
+    """
+
+    __slots__ = FIELDS
+
+    def __init__(self, username: str, name: str = '', id: Optional[str] = None,
+                 token: Optional[str] = None, since_id: Optional[str] = None,
+                 status: Optional[str] = None,
+                 last_verified: Optional[float] = None,
+                 profile_image_url: Optional[str] = None):
+        self.username = sys.intern(username)
+        self.name = name
+        self.id = id
+        self.token = token
+        self.since_id = since_id
+        # 最近一次验证的结果(STATUS_*)和时间戳
+        self.status = status
+        self.last_verified = last_verified
+        self.profile_image_url = profile_image_url
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "AccountRecord":
+        """从字典创建记录，忽略未知字段"""
+        return cls(**{k: data[k] for k in FIELDS if data.get(k) is not None})
+
+    def to_dict(self) -> dict:
+        """转换为字典，省略空字段"""
+        return {k: getattr(self, k) for k in FIELDS if getattr(self, k) is not None}
+
+    def update(self, data: dict):
+        """用字典中的非空字段更新记录"""
+        for k in FIELDS[1:]:
+            value = data.get(k)
+            if value is not None:
+                setattr(self, k, value)
+
+    def fill(self, data: dict):
+        """只用字典中的非空字段补充记录中为空的字段"""
+        for k in FIELDS[1:]:
+            value = data.get(k)
+            if value is not None and getattr(self, k) in (None, ''):
+                setattr(self, k, value)
+
+    def replace(self, data: dict):
+        """用字典替换除用户名外的全部字段，缺失的字段置空"""
+        for k in FIELDS[1:]:
+            setattr(self, k, data.get(k))
+        if self.name is None:
+            self.name = ''
+
+    @property
+    def display_name(self) -> str:
+        return f"{self.name} (@{self.username})"
+
+    def __repr__(self):
+        return f"AccountRecord(@{self.username})"
+
+
+class AccountRegistry:
+    """全局唯一的账号登记表，按用户名索引"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._records: Dict[str, AccountRecord] = {}
+
+    def upsert(self, account: Union[dict, AccountRecord]) -> AccountRecord:
+        """登记账号，已存在时合并字段并返回已有记录
+
+        Args:
+            account: 账号信息字典或AccountRecord
+
+        Returns:
+            规范的账号记录
+        """
+        data = account.to_dict() if isinstance(account, AccountRecord) else account
+        username = data.get('username')
+        if not username:
+            raise ValueError("账号缺少用户名")
+        with self._lock:
+            record = self._records.get(username)
+            if record is None:
+                record = AccountRecord.from_dict(data)
+                self._records[record.username] = record
+            else:
+                record.update(data)
+            return record
+
+    def get(self, username: str) -> Optional[AccountRecord]:
+        """按用户名获取记录"""
+        return self._records.get(username)
+
+    def remove(self, username: str) -> Optional[AccountRecord]:
+        """删除记录"""
+        with self._lock:
+            return self._records.pop(username, None)
+
+    def load(self, accounts: Iterable[dict], keep_newer: bool = False):
+        """批量登记账号
+
+        Args:
+            accounts: 账号字典
+            keep_newer: 为True时，已有记录的验证时间不早于导入数据的，
+                保留已有字段，只补充空字段(用于后台加载期间账号已被更新的情况)
+        """
+        with self._lock:
+            for data in accounts:
+                username = data.get('username')
+                if not username:
+                    continue
+                record = self._records.get(username)
+                if (keep_newer and record is not None
+                        and (record.last_verified or 0) >= (data.get('last_verified') or 0)):
+                    record.fill(data)
+                else:
+                    self.upsert(data)
+
+    def to_list(self, usernames: Optional[Iterable[str]] = None) -> List[dict]:
+        """导出为字典列表
+
+        Args:
+            usernames: 只导出这些用户名，为None时导出全部
+        """
+        with self._lock:
+            if usernames is None:
+                return [r.to_dict() for r in self._records.values()]
+            return [self._records[u].to_dict() for u in usernames
+                    if u in self._records]
+
+    def __contains__(self, username: str) -> bool:
+        return username in self._records
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __iter__(self) -> Iterator[AccountRecord]:
+        return iter(list(self._records.values()))
@@ -0,0 +1,227 @@
+import logging
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger("Analytics")
+
+DAY_SECONDS = 86400
+
+
+class MetricsFrame:
+    """推文互动指标的列式数据
+
+    每列是一个NumPy数组，同一下标对应同一条推文。作者ID被编码为
+    整数下标(author_codes)，便于用bincount等向量化操作做分组聚合。
+    缺少发布时间的推文由has_time标记，参与汇总但不计入滚动窗口。
+    """
+
+    def __init__(self, tweet_ids: np.ndarray, author_codes: np.ndarray,
+                 authors: List[str], created_at: np.ndarray,
+                 retweets: np.ndarray, replies: np.ndarray,
+                 likes: np.ndarray, quotes: np.ndarray,
+                 impressions: np.ndarray,
+                 has_time: Optional[np.ndarray] = None):
+        self.tweet_ids = tweet_ids
+        self.author_codes = author_codes
+        self.authors = authors
+        self.created_at = created_at
+        self.has_time = (has_time if has_time is not None
+                         else np.ones(len(created_at), dtype=bool))
+        self.retweets = retweets
+        self.replies = replies
+        self.likes = likes
+        self.quotes = quotes
+        self.impressions = impressions
+
+        self.engagement = retweets + replies + likes + quotes
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.engagement_rate = np.where(
+                impressions > 0, self.engagement / impressions, np.nan)
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[tuple]) -> "MetricsFrame":
+        """从TweetStore.load_metrics的结果构建
+
+        Args:
+            rows: (id, author_id, created_at时间戳, retweet, reply, like, quote, impression)元组列表
+        """
+        if not rows:
+            empty = np.zeros(0, dtype=np.int64)
+            return cls(empty, empty, [], empty, empty, empty, empty, empty, empty)
+
+        columns = list(zip(*rows))
+        authors, author_codes = np.unique(
+            np.array(columns[1], dtype=object).astype(str), return_inverse=True)
+        has_time = np.array([ts is not None for ts in columns[2]], dtype=bool)
+        created_at = np.array(
+            [ts if ts is not None else 0 for ts in columns[2]], dtype=np.int64)
+        metrics = [np.array(col, dtype=np.int64) for col in columns[3:8]]
+        return cls(
+            np.array(columns[0], dtype=np.int64),
+            author_codes.astype(np.int64),
+            authors.tolist(),
+            created_at,
+            *metrics,
+            has_time=has_time
+        )
+
+    @classmethod
+    def from_store(cls, store, author_ids: Optional[Iterable[str]] = None) -> "MetricsFrame":
+        """从TweetStore加载指标"""
+        return cls.from_rows(store.load_metrics(author_ids))
+
+    @classmethod
+    def from_group(cls, store, group_manager, group_name: str) -> "MetricsFrame":
+        """加载分组内所有账号的推文指标"""
+        author_ids = [acc.id for acc in group_manager.get_accounts_in_group(group_name)
+                      if acc.id]
+        return cls.from_store(store, author_ids)
+
+    def __len__(self):
+        return len(self.tweet_ids)
+
+    def summary(self, percentiles: Sequence[float] = (50, 90, 99)) -> Dict:
+        """整体汇总
+
+        Returns:
+            推文数、总互动、总曝光、整体互动率及互动率分位数
+        """
+        total_impressions = int(self.impressions.sum())
+        total_engagement = int(self.engagement.sum())
+        rates = self.engagement_rate[~np.isnan(self.engagement_rate)]
+        result = {
+            'tweets': len(self),
+            'accounts': len(self.authors),
+            'engagement': total_engagement,
+            'impressions': total_impressions,
+            'engagement_rate': (total_engagement / total_impressions
+                                if total_impressions else 0.0),
+            'percentiles': {},
+        }
+        if rates.size:
+            values = np.percentile(rates, percentiles)
+            result['percentiles'] = {
+                float(p): float(v) for p, v in zip(percentiles, values)}
+        return result
+
+    def account_summary(self, percentiles: Sequence[float] = (50, 90)) -> List[Dict]:
+        """按账号汇总
+
+        Returns:
+            每个账号的推文数、总互动、互动率及互动率分位数，按总互动降序
+        """
+        n = len(self.authors)
+        if n == 0:
+            return []
+
+        codes = self.author_codes
+        tweets = np.bincount(codes, minlength=n)
+        engagement = np.bincount(codes, weights=self.engagement, minlength=n)
+        impressions = np.bincount(codes, weights=self.impressions, minlength=n)
+        likes = np.bincount(codes, weights=self.likes, minlength=n)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rate = np.where(impressions > 0, engagement / impressions, 0.0)
+
+        # 分组分位数: 先按(账号, 互动率)排序，再按各账号的起始偏移取下标，
+        # 与summary的np.percentile一样在相邻两个值之间线性插值
+        valid = ~np.isnan(self.engagement_rate)
+        valid_codes = codes[valid]
+        valid_rates = self.engagement_rate[valid]
+        order = np.lexsort((valid_rates, valid_codes))
+        sorted_rates = valid_rates[order]
+        counts = np.bincount(valid_codes, minlength=n)
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        has_rates = counts > 0
+
+        pct_columns = {}
+        for p in percentiles:
+            if not sorted_rates.size:
+                pct_columns[float(p)] = np.full(n, np.nan)
+                continue
+            position = (p / 100.0) * np.maximum(counts - 1, 0)
+            lower = np.floor(position).astype(np.int64)
+            upper = np.minimum(lower + 1, np.maximum(counts - 1, 0))
+            low_values = sorted_rates[np.where(has_rates, starts + lower, 0)]
+            high_values = sorted_rates[np.where(has_rates, starts + upper, 0)]
+            values = low_values + (high_values - low_values) * (position - lower)
+            pct_columns[float(p)] = np.where(has_rates, values, np.nan)
+
+        result = []
+        for i in np.argsort(-engagement, kind='stable'):
+            result.append({
+                'author_id': self.authors[i],
+                'tweets': int(tweets[i]),
+                'engagement': int(engagement[i]),
+                'impressions': int(impressions[i]),
+                'likes': int(likes[i]),
+                'engagement_rate': float(rate[i]),
+                'percentiles': {p: float(col[i]) for p, col in pct_columns.items()},
+            })
+        return result
+
+    def rolling(self, window_days: int = 7, bucket_seconds: int = DAY_SECONDS) -> Dict:
+        """按created_at的滚动窗口统计
+
+        Args:
+            window_days: 窗口包含的桶数
+            bucket_seconds: 每个桶的时长(秒)，默认为一天
+
+        Returns:
+            buckets: 每个桶的起始时间戳
+            tweets / engagement / impressions: 截至该桶的窗口内合计
+            engagement_rate: 窗口内互动率
+        """
+        if not self.has_time.any():
+            return {'buckets': np.zeros(0, dtype=np.int64)}
+
+        created_at = self.created_at[self.has_time]
+        start = int(created_at.min()) // bucket_seconds * bucket_seconds
+        bucket_idx = (created_at - start) // bucket_seconds
+        n_buckets = int(bucket_idx.max()) + 1
+
+        def window_sum(weights=None) -> np.ndarray:
+            per_bucket = np.bincount(bucket_idx, weights=weights, minlength=n_buckets)
+            cumulative = np.cumsum(per_bucket)
+            shifted = np.concatenate(
+                (np.zeros(window_days), cumulative[:-window_days]))[:n_buckets]
+            return cumulative - shifted
+
+        tweets = window_sum()
+        engagement = window_sum(self.engagement[self.has_time])
+        impressions = window_sum(self.impressions[self.has_time])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rate = np.where(impressions > 0, engagement / impressions, 0.0)
+        return {
+            'buckets': start + np.arange(n_buckets, dtype=np.int64) * bucket_seconds,
+            'tweets': tweets.astype(np.int64),
+            'engagement': engagement.astype(np.int64),
+            'impressions': impressions.astype(np.int64),
+            'engagement_rate': rate,
+        }
+
+    def top_n(self, n: int = 10, by: str = 'engagement') -> List[Dict]:
+        """互动最高的N条推文
+
+        Args:
+            n: 返回数量
+            by: 排序指标，engagement、engagement_rate或likes等列名
+        """
+        values = getattr(self, by, None)
+        if not isinstance(values, np.ndarray):
+            raise ValueError(f"不支持的排序指标: {by}")
+        if len(self) == 0:
+            return []
+
+        values = np.nan_to_num(values.astype(np.float64), nan=-np.inf)
+        n = min(n, len(self))
+        idx = np.argpartition(-values, n - 1)[:n]
+        idx = idx[np.argsort(-values[idx], kind='stable')]
+        return [{
+            'id': str(self.tweet_ids[i]),
+            'author_id': self.authors[self.author_codes[i]],
+            'created_at': int(self.created_at[i]) if self.has_time[i] else None,
+            'engagement': int(self.engagement[i]),
+            'impressions': int(self.impressions[i]),
+            'engagement_rate': float(np.nan_to_num(self.engagement_rate[i])),
+        } for i in idx]
@@ -0,0 +1,268 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from PyQt5.QtCore import QObject, Qt, pyqtSignal
+from PyQt5.QtGui import QImage
+
+from core.http_client import HttpClient, get_shared_client
+from core.persistence import WriteBehindSaver, atomic_write_json
+from core.task_scheduler import TaskScheduler, get_shared_scheduler, PRIORITY_BACKGROUND
+
+logger = logging.getLogger("Avatars")
+
+# 下载失败的地址在该时间(秒)内不再重试
+FAILURE_RETRY_AFTER = 600
+
+
+class AvatarDiskCache:
+    """按内容寻址的头像磁盘缓存
+
+    图片按内容的sha256保存在objects目录，index.json记录地址到内容哈希的映射，
+    不同地址的相同图片只保存一份。总大小超过上限时淘汰最久未使用的图片。
+    """
+
+    def __init__(self, cache_dir: str = "cache/avatars",
+                 max_bytes: int = 64 * 1024 * 1024):
+        """初始化磁盘缓存
+
+        Args:
+            cache_dir: 缓存目录
+            max_bytes: 图片文件的总大小上限
+        """
+        self.cache_dir = Path(cache_dir)
+        self.objects_dir = self.cache_dir / "objects"
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.cache_dir / "index.json"
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._index: Dict[str, str] = {}
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                self._index = json.load(f)
+        except (OSError, ValueError):
+            pass
+        # 已有文件的总大小在后台线程中统计，图片很多时不阻塞界面启动；
+        # 统计完成前按新写入的大小计，淘汰时会重新按实际文件计算
+        self._bytes = 0
+        # 索引变化频繁，合并写入
+        self.saver = WriteBehindSaver(self._write_index, interval=5, enabled=True,
+                                      name="AvatarIndexSaver")
+        self._scanner = threading.Thread(target=self._scan_size, name="AvatarCacheScan",
+                                         daemon=True)
+        self._scanner.start()
+
+    def _scan_size(self):
+        """后台线程: 统计已有图片的总大小，超过上限时淘汰"""
+        total = 0
+        try:
+            for entry in os.scandir(self.objects_dir):
+                try:
+                    total += entry.stat().st_size
+                except OSError:
+                    continue
+        except OSError as e:
+            logger.warning(f"统计头像缓存大小失败: {str(e)}")
+            return
+        with self._lock:
+            self._bytes += total
+            over_limit = self._bytes > self.max_bytes
+        if over_limit:
+            self._evict()
+
+    def _write_index(self):
+        with self._lock:
+            index = dict(self._index)
+        atomic_write_json(self.index_path, index)
+
+    def _object_path(self, digest: str) -> Path:
+        return self.objects_dir / digest
+
+    def get(self, url: str) -> Optional[bytes]:
+        """读取地址对应的图片，未缓存时返回None"""
+        with self._lock:
+            digest = self._index.get(url)
+        if digest is None:
+            return None
+        path = self._object_path(digest)
+        try:
+            data = path.read_bytes()
+            # 更新修改时间作为最近使用时间，供淘汰参考
+            os.utime(path)
+            return data
+        except OSError:
+            with self._lock:
+                self._index.pop(url, None)
+            self.saver.mark_dirty()
+            return None
+
+    def put(self, url: str, data: bytes):
+        """保存图片，内容已存在时只更新索引"""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest)
+        over_limit = False
+        try:
+            if not path.exists():
+                tmp_path = path.with_name(digest + ".tmp")
+                tmp_path.write_bytes(data)
+                os.replace(tmp_path, path)
+                with self._lock:
+                    self._bytes += len(data)
+                    over_limit = self._bytes > self.max_bytes
+        except OSError as e:
+            logger.warning(f"写入头像缓存失败: {str(e)}")
+            return
+        with self._lock:
+            self._index[url] = digest
+        self.saver.mark_dirty()
+        if over_limit:
+            self._evict()
+
+    def _evict(self):
+        """淘汰最久未使用的图片，直到低于上限的90%"""
+        target = int(self.max_bytes * 0.9)
+        files = []
+        for path in self.objects_dir.iterdir():
+            try:
+                stat = path.stat()
+                files.append((stat.st_mtime, stat.st_size, path))
+            except OSError:
+                continue
+        files.sort()
+
+        total = sum(size for _, size, _ in files)
+        removed = set()
+        for _, size, path in files:
+            if total <= target:
+                break
+            try:
+                path.unlink()
+                total -= size
+                removed.add(path.name)
+            except OSError:
+                continue
+
+        with self._lock:
+            self._bytes = total
+            self._index = {url: d for url, d in self._index.items() if d not in removed}
+        self.saver.mark_dirty()
+        logger.debug(f"头像缓存淘汰 {len(removed)} 个文件")
+
+    def close(self):
+        self.saver.close()
+
+
+class AvatarLoader(QObject):
+    """异步头像加载器
+
+    界面只为可见行调用set_visible，不再可见的地址即使已排队也不会下载。
+    下载、解码和缩放在调度器的工作线程中完成(QImage可在非GUI线程使用)，
+    缩略图保存在内存LRU中，完成后通过loaded信号通知界面。
+    """
+
+    loaded = pyqtSignal(str, QImage)  # (地址, 缩略图)
+
+    def __init__(self, size: int = 32, max_memory_items: int = 1000,
+                 disk_cache: Optional[AvatarDiskCache] = None,
+                 http_client: Optional[HttpClient] = None,
+                 scheduler: Optional[TaskScheduler] = None,
+                 max_workers: int = 4):
+        """初始化加载器
+
+        Args:
+            size: 缩略图边长(像素)
+            max_memory_items: 内存中保留的缩略图数
+            disk_cache: 磁盘缓存，默认使用cache/avatars
+            http_client: 下载使用的HTTP客户端，默认使用共享连接池
+            scheduler: 执行下载的调度器，默认使用共享调度器
+            max_workers: 同时进行的下载数
+        """
+        super().__init__()
+        self.size = size
+        self.max_memory_items = max_memory_items
+        self.disk_cache = disk_cache if disk_cache is not None else AvatarDiskCache()
+        self.http = http_client if http_client is not None else get_shared_client()
+        self.scheduler = scheduler if scheduler is not None else get_shared_scheduler()
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, QImage]" = OrderedDict()
+        self._wanted: "OrderedDict[str, None]" = OrderedDict()
+        self._in_progress = set()
+        self._failed: Dict[str, float] = {}
+        self._workers = 0
+
+    def get(self, url: str) -> Optional[QImage]:
+        """内存中的缩略图，未加载时返回None"""
+        with self._lock:
+            image = self._memory.get(url)
+            if image is not None:
+                self._memory.move_to_end(url)
+            return image
+
+    def set_visible(self, urls: Iterable[str]):
+        """设置当前需要的头像，替换之前未开始的请求
+
+        Args:
+            urls: 可见行的头像地址，按显示顺序
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._wanted = OrderedDict(
+                (url, None) for url in urls
+                if url and url not in self._memory and url not in self._in_progress
+                and (url not in self._failed
+                     or now - self._failed[url] >= FAILURE_RETRY_AFTER))
+            start = min(self.max_workers - self._workers, len(self._wanted))
+            self._workers += max(0, start)
+        for _ in range(start):
+            # 头像只是装饰，不与账号验证等操作争用线程
+            self.scheduler.submit_callable(self._drain, priority=PRIORITY_BACKGROUND)
+
+    def _drain(self):
+        """工作线程: 依次加载需要的头像，直到没有待加载的地址"""
+        while True:
+            with self._lock:
+                if not self._wanted:
+                    self._workers -= 1
+                    return
+                url, _ = self._wanted.popitem(last=False)
+                self._in_progress.add(url)
+            image = None
+            try:
+                image = self._load(url)
+            except Exception as e:
+                logger.debug(f"加载头像失败 {url}: {str(e)}")
+            with self._lock:
+                self._in_progress.discard(url)
+                if image is None:
+                    self._failed[url] = time.monotonic()
+                    continue
+                self._memory[url] = image
+                while len(self._memory) > self.max_memory_items:
+                    self._memory.popitem(last=False)
+            self.loaded.emit(url, image)
+
+    def _load(self, url: str) -> Optional[QImage]:
+        """从磁盘缓存或网络读取图片并缩放"""
+        data = self.disk_cache.get(url)
+        if data is None:
+            response = self.http.request('GET', url)
+            response.raise_for_status()
+            data = response.content
+            self.disk_cache.put(url, data)
+        image = QImage()
+        if not image.loadFromData(data):
+            return None
+        return image.scaled(self.size, self.size, Qt.KeepAspectRatio,
+                            Qt.SmoothTransformation)
+
+    def close(self):
+        with self._lock:
+            self._wanted.clear()
+        self.disk_cache.close()
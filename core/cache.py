@@ -0,0 +1,314 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger("ResponseCache")
+
+
+class _InFlight:
+    """正在进行中的请求，用于合并相同请求"""
+
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class ResponseCache:
+    """API响应缓存，内存LRU层 + 可选磁盘层
+
+    - 每个端点可配置独立的TTL
+    - 内存层按条目数限制大小，超出时淘汰最久未使用的条目
+    - 磁盘层按总字节数限制大小，超出时淘汰最旧的文件
+    - 相同的并发请求只会发出一次网络调用
+    """
+
+    # 各端点默认TTL(秒)
+    DEFAULT_TTLS = {
+        'user_info': 900,
+        'user_tweets': 120,
+    }
+
+    def __init__(self, max_entries: int = 2048,
+                 ttls: Optional[Dict[str, float]] = None,
+                 default_ttl: float = 60,
+                 disk_dir: Optional[str] = None,
+                 disk_max_bytes: int = 64 * 1024 * 1024):
+        """初始化缓存
+
+        Args:
+            max_entries: 内存层最大条目数
+            ttls: 端点名到TTL(秒)的映射，覆盖默认值
+            default_ttl: 未配置端点的TTL(秒)
+            disk_dir: 磁盘缓存目录，为None时不启用磁盘层
+            disk_max_bytes: 磁盘层最大字节数
+        """
+        self.max_entries = max_entries
+        self.ttls = dict(self.DEFAULT_TTLS)
+        if ttls:
+            self.ttls.update(ttls)
+        self.default_ttl = default_ttl
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.disk_max_bytes = disk_max_bytes
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._inflight: Dict[str, _InFlight] = {}
+        self._stats = {
+            'hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'collapsed': 0,
+        }
+
+        self._disk_bytes = 0
+        if self.disk_dir:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+            self._disk_bytes = sum(
+                p.stat().st_size for p in self.disk_dir.glob("*.json"))
+
+    @staticmethod
+    def make_key(endpoint: str, path: str, params: Optional[Dict] = None,
+                 token: Optional[str] = None) -> str:
+        """生成缓存键
+
+        Args:
+            endpoint: 端点名(用于选择TTL)
+            path: 请求路径
+            params: 查询参数
+            token: 响应依赖token时传入，结果按token隔离
+
+        Returns:
+            缓存键字符串
+        """
+        parts = [endpoint, path]
+        if params:
+            parts.append(json.dumps(params, sort_keys=True, default=str))
+        if token is not None:
+            parts.append(hashlib.sha256(token.encode()).hexdigest()[:16])
+        return "|".join(parts)
+
+    def ttl_for(self, endpoint: str) -> float:
+        """获取端点的TTL"""
+        return self.ttls.get(endpoint, self.default_ttl)
+
+    def get(self, key: str) -> Optional[Any]:
+        """读取缓存，未命中或已过期时返回None"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires, value = entry
+                if expires > now:
+                    self._memory.move_to_end(key)
+                    self._stats['hits'] += 1
+                    return value
+                del self._memory[key]
+
+        disk_entry = self._disk_get(key)
+        with self._lock:
+            if disk_entry is not None:
+                remaining, value = disk_entry
+                self._stats['disk_hits'] += 1
+                self._memory_set(key, value, now + remaining)
+                return value
+            self._stats['misses'] += 1
+        return None
+
+    def set(self, key: str, value: Any, ttl: float):
+        """写入缓存
+
+        Args:
+            key: 缓存键
+            value: 可JSON序列化的响应数据
+            ttl: 存活时间(秒)
+        """
+        with self._lock:
+            self._memory_set(key, value, time.monotonic() + ttl)
+        self._disk_set(key, value, ttl)
+
+    def get_or_fetch(self, endpoint: str, key: str,
+                     fetch: Callable[[], Any]) -> Any:
+        """读取缓存，未命中时调用fetch获取并写入
+
+        同一键的并发调用只有一个会执行fetch，其余等待其结果。
+        返回的数据为缓存共享对象，调用方不应修改。
+
+        Args:
+            endpoint: 端点名(用于选择TTL)
+            key: 缓存键
+            fetch: 获取数据的函数
+
+        Returns:
+            响应数据
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        with self._lock:
+            inflight = self._inflight.get(key)
+            leader = inflight is None
+            if leader:
+                inflight = _InFlight()
+                self._inflight[key] = inflight
+            else:
+                self._stats['collapsed'] += 1
+
+        if not leader:
+            inflight.event.wait()
+            if inflight.error is not None:
+                raise inflight.error
+            return inflight.result
+
+        try:
+            inflight.result = fetch()
+            self.set(key, inflight.result, self.ttl_for(endpoint))
+            return inflight.result
+        except BaseException as e:
+            inflight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            inflight.event.set()
+
+    def invalidate(self, key: str):
+        """删除指定缓存条目"""
+        with self._lock:
+            self._memory.pop(key, None)
+        if self.disk_dir:
+            path = self._disk_path(key)
+            try:
+                size = path.stat().st_size
+                path.unlink()
+                with self._lock:
+                    self._disk_bytes -= size
+            except FileNotFoundError:
+                pass
+
+    def clear(self):
+        """清空所有缓存"""
+        with self._lock:
+            self._memory.clear()
+            if self.disk_dir:
+                for path in self.disk_dir.glob("*.json"):
+                    try:
+                        path.unlink()
+                    except OSError:
+                        pass
+                self._disk_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """获取命中统计"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._memory)
+            stats['disk_bytes'] = self._disk_bytes
+        lookups = stats['hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = (
+            (stats['hits'] + stats['disk_hits']) / lookups if lookups else 0.0)
+        return stats
+
+    def _memory_set(self, key: str, value: Any, expires: float):
+        """写入内存层(需持有锁)"""
+        self._memory[key] = (expires, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._stats['evictions'] += 1
+
+    def _disk_path(self, key: str) -> Path:
+        return self.disk_dir / f"{hashlib.sha256(key.encode()).hexdigest()}.json"
+
+    def _disk_get(self, key: str) -> Optional[tuple]:
+        """读取磁盘层，返回(剩余TTL, 数据)"""
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        remaining = entry.get('expires', 0) - time.time()
+        if remaining <= 0 or entry.get('key') != key:
+            return None
+        return remaining, entry.get('value')
+
+    def _disk_set(self, key: str, value: Any, ttl: float):
+        """写入磁盘层，超出大小时淘汰最旧的文件"""
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        tmp_path = path.with_suffix(".tmp")
+        try:
+            payload = json.dumps({
+                'key': key,
+                'expires': time.time() + ttl,
+                'value': value
+            }, ensure_ascii=False)
+            old_size = path.stat().st_size if path.exists() else 0
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+            with self._lock:
+                self._disk_bytes += path.stat().st_size - old_size
+                over_limit = self._disk_bytes > self.disk_max_bytes
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"写入磁盘缓存失败: {str(e)}")
+            return
+
+        if over_limit:
+            self._evict_disk()
+
+    def _evict_disk(self):
+        """淘汰磁盘层最旧的文件，直到低于上限的90%"""
+        target = int(self.disk_max_bytes * 0.9)
+        files = []
+        for path in self.disk_dir.glob("*.json"):
+            try:
+                stat = path.stat()
+                files.append((stat.st_mtime, stat.st_size, path))
+            except OSError:
+                continue
+        files.sort()
+
+        total = sum(size for _, size, _ in files)
+        evicted = 0
+        for _, size, path in files:
+            if total <= target:
+                break
+            try:
+                path.unlink()
+                total -= size
+                evicted += 1
+            except OSError:
+                continue
+
+        with self._lock:
+            self._disk_bytes = total
+            self._stats['evictions'] += evicted
+        logger.debug(f"磁盘缓存淘汰 {evicted} 个条目")
+
+
+_shared_cache: Optional[ResponseCache] = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_cache() -> ResponseCache:
+    """获取进程内共享的响应缓存"""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = ResponseCache(disk_dir="cache/responses")
+        return _shared_cache
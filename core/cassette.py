@@ -0,0 +1,353 @@
+# -*- coding: utf-8 -*-
+"""HTTP录制与回放
+
+录制时包装实际的HTTP客户端，把每次请求的方法、地址、参数、状态码、
+部分响应头、响应体和耗时写入gzip压缩的JSON Lines文件(cassette)。
+token不写入文件: 请求头不保存，出现在地址或响应体中的token替换为
+其哈希别名(tok_开头)。回放时按(方法, 地址, 参数, token别名)依次返回录制的响应，
+可按原始耗时等待(包括429和慢响应)或不等待，用于在没有网络的机器上
+确定性地比较不同版本批量验证的吞吐量。
+
+用法:
+    python -m core.distributed --record traffic.cassette worker ...
+    python -m core.cassette tokens traffic.cassette > tokens.txt
+    python -m core.distributed --replay traffic.cassette run tokens.txt
+    python -m core.distributed --replay traffic.cassette --replay-speed 0 run tokens.txt
+    python -m core.cassette info traffic.cassette
+"""
+import argparse
+import base64
+import gzip
+import hashlib
+import json
+import logging
+import sys
+import threading
+import time
+from collections import deque
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlencode, urlparse, parse_qsl
+
+import requests
+from requests import exceptions as request_errors
+from requests.structures import CaseInsensitiveDict
+
+from core.http_client import DeadlineExceeded, remaining_time
+
+logger = logging.getLogger("Cassette")
+
+CASSETTE_VERSION = 1
+# 录制的响应头，其余响应头与回放无关
+RECORDED_HEADERS = ('content-type', 'retry-after', 'x-rate-limit-limit',
+                    'x-rate-limit-remaining', 'x-rate-limit-reset')
+TOKEN_ALIAS_PREFIX = "tok_"
+
+
+def token_alias(token: str) -> str:
+    """token的别名，录制文件中只出现别名"""
+    if token.startswith(TOKEN_ALIAS_PREFIX):
+        return token
+    return TOKEN_ALIAS_PREFIX + hashlib.sha256(token.encode('utf-8')).hexdigest()[:16]
+
+
+def _bearer_token(kwargs: Dict) -> Optional[str]:
+    headers = kwargs.get('headers') or {}
+    value = headers.get('Authorization') or headers.get('authorization') or ''
+    return value[len("Bearer "):] if value.startswith("Bearer ") else None
+
+
+def _request_key(method: str, url: str, params: Optional[Dict],
+                 alias: Optional[str]) -> Tuple:
+    """匹配录制条目的键: 地址中的查询参数与params合并后排序"""
+    parsed = urlparse(url)
+    query = parse_qsl(parsed.query)
+    if params:
+        query.extend((str(k), str(v)) for k, v in params.items() if v is not None)
+    target = f"{parsed.netloc}{parsed.path}"
+    if query:
+        target += "?" + urlencode(sorted(query))
+    return method.upper(), target, alias
+
+
+class CassetteRecorder:
+    """把经过的HTTP请求写入cassette文件
+
+    可同时包装多个客户端，条目按完成顺序追加写入，录制期间内存占用不随条目数增长。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = gzip.open(path, 'wt', encoding='utf-8')
+        self._started = time.time()
+        self._file.write(json.dumps({'version': CASSETTE_VERSION,
+                                     'created': self._started}) + "\n")
+        self.count = 0
+
+    def wrap(self, client) -> "RecordingClient":
+        """包装HTTP客户端(HttpClient或ProxyClient)"""
+        return RecordingClient(client, self)
+
+    def record(self, entry: Dict):
+        with self._lock:
+            if self._file is None:
+                return
+            entry['at'] = round(entry.pop('started') - self._started, 4)
+            self._file.write(json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + "\n")
+            self.count += 1
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+        logger.info(f"录制完成: {self.count}个请求 -> {self.path}")
+
+
+class RecordingClient:
+    """录制请求的客户端，接口与HttpClient.request相同"""
+
+    def __init__(self, inner, recorder: CassetteRecorder):
+        self.inner = inner
+        self.recorder = recorder
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        token = _bearer_token(kwargs)
+        alias = token_alias(token) if token else None
+        _, target, _ = _request_key(method, url, kwargs.get('params'), alias)
+        entry = {'method': method.upper(), 'url': target, 'token': alias,
+                 'started': time.time()}
+        started = time.monotonic()
+        try:
+            response = self.inner.request(method, url, **kwargs)
+        except DeadlineExceeded:
+            # 请求没有发出，不录制
+            raise
+        except request_errors.RequestException as e:
+            entry.update(elapsed=round(time.monotonic() - started, 4),
+                         error=type(e).__name__, message=self._redact(str(e), token))
+            self.recorder.record(entry)
+            raise
+        entry['elapsed'] = round(time.monotonic() - started, 4)
+        entry['status'] = response.status_code
+        entry['headers'] = {k: v for k, v in response.headers.items()
+                            if k.lower() in RECORDED_HEADERS}
+        try:
+            entry['body'] = self._redact(response.content.decode('utf-8'), token)
+        except UnicodeDecodeError:
+            entry['body_b64'] = base64.b64encode(response.content).decode('ascii')
+        self.recorder.record(entry)
+        return response
+
+    @staticmethod
+    def _redact(text: str, token: Optional[str]) -> str:
+        if token and token in text:
+            text = text.replace(token, token_alias(token))
+        return text
+
+
+def read_cassette(path: str) -> Tuple[Dict, List[Dict]]:
+    """读取cassette文件
+
+    Returns:
+        (文件头, 条目列表)
+    """
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        header = json.loads(f.readline())
+        if header.get('version') != CASSETTE_VERSION:
+            raise ValueError(f"不支持的cassette版本: {header.get('version')}")
+        entries = []
+        for line in f:
+            line = line.strip()
+            if line:
+                entries.append(json.loads(line))
+    return header, entries
+
+
+class CassettePlayer:
+    """按录制内容回放请求的客户端，接口与HttpClient.request相同
+
+    同一个键的条目按录制顺序依次返回，用完后重复最后一条(新版本可能比
+    录制时多重试几次)。没有任何匹配的请求抛出ConnectionError，
+    批量验证按网络错误处理。
+    """
+
+    def __init__(self, path: str, speed: float = 1.0):
+        """加载cassette
+
+        Args:
+            path: cassette文件
+            speed: 回放速度倍数，1为按原始耗时等待，0为不等待
+        """
+        self.path = path
+        self.speed = speed
+        self._lock = threading.Lock()
+        self._entries: Dict[Tuple, deque] = {}
+        self._last: Dict[Tuple, Dict] = {}
+        _, entries = read_cassette(path)
+        for entry in entries:
+            key = (entry['method'], entry['url'], entry.get('token'))
+            self._entries.setdefault(key, deque()).append(entry)
+        self.tokens = sorted({e['token'] for e in entries if e.get('token')})
+        self.replayed = 0
+        self.missed = 0
+        logger.info(f"加载cassette: {len(entries)}个请求, {len(self.tokens)}个token")
+
+    def wrap(self, client) -> "CassettePlayer":
+        """回放时不使用实际的客户端"""
+        return self
+
+    def _next(self, key: Tuple) -> Optional[Dict]:
+        with self._lock:
+            queue = self._entries.get(key)
+            if queue:
+                entry = self._last[key] = queue.popleft()
+            else:
+                entry = self._last.get(key)
+            if entry is None:
+                self.missed += 1
+            else:
+                self.replayed += 1
+            return entry
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        token = _bearer_token(kwargs)
+        key = _request_key(method, url, kwargs.get('params'),
+                           token_alias(token) if token else None)
+        entry = self._next(key)
+        if entry is None:
+            raise request_errors.ConnectionError(f"cassette中没有匹配的请求: {key[0]} {key[1]}")
+
+        elapsed = entry.get('elapsed', 0.0)
+        limit = self._time_limit(kwargs.get('timeout'))
+        if limit is not None and elapsed > limit:
+            # 录制的耗时超过当前的超时设置，按超时处理
+            self._wait(limit)
+            if remaining_time() is not None and remaining_time() <= 0:
+                raise DeadlineExceeded("已超过任务项时限")
+            raise request_errors.ReadTimeout(f"回放请求超时({limit:.1f}秒)")
+        self._wait(elapsed)
+
+        if 'error' in entry:
+            error_type = getattr(request_errors, entry['error'], None)
+            if not (isinstance(error_type, type)
+                    and issubclass(error_type, request_errors.RequestException)):
+                error_type = request_errors.RequestException
+            raise error_type(entry.get('message', entry['error']))
+        return self._build_response(entry, url, elapsed)
+
+    @staticmethod
+    def _time_limit(timeout) -> Optional[float]:
+        """读取超时与当前线程剩余时间中较小的一个"""
+        if isinstance(timeout, tuple):
+            timeout = timeout[1]
+        remaining = remaining_time()
+        if remaining is not None:
+            if remaining <= 0:
+                raise DeadlineExceeded("已超过任务项时限")
+            timeout = remaining if timeout is None else min(timeout, remaining)
+        return timeout
+
+    def _wait(self, seconds: float):
+        if self.speed > 0 and seconds > 0:
+            time.sleep(seconds / self.speed)
+
+    @staticmethod
+    def _build_response(entry: Dict, url: str, elapsed: float) -> requests.Response:
+        response = requests.Response()
+        response.status_code = entry['status']
+        response.headers = CaseInsensitiveDict(entry.get('headers', {}))
+        if 'body_b64' in entry:
+            response._content = base64.b64decode(entry['body_b64'])
+        else:
+            response._content = entry.get('body', '').encode('utf-8')
+        response.encoding = 'utf-8'
+        response.url = url
+        response.elapsed = timedelta(seconds=elapsed)
+        return response
+
+    def close(self):
+        logger.info(f"回放完成: {self.replayed}个请求命中, {self.missed}个未匹配")
+
+
+_transport = None
+_transport_lock = threading.Lock()
+
+
+def install_transport(transport) -> None:
+    """设置进程内的录制器或回放器，之后创建的TwitterAPI经其发送请求
+
+    Args:
+        transport: CassetteRecorder、CassettePlayer或None(恢复正常请求)
+    """
+    global _transport
+    with _transport_lock:
+        _transport = transport
+
+
+def get_transport():
+    """当前的录制器或回放器，未设置时为None"""
+    return _transport
+
+
+def merge_cassettes(path: str, parts: Iterable[str]) -> int:
+    """把多个进程各自录制的文件按请求开始时间合并为一个
+
+    Returns:
+        合并的条目数
+    """
+    merged = []
+    for part in parts:
+        header, entries = read_cassette(part)
+        for entry in entries:
+            entry['at'] += header['created']
+        merged.extend(entries)
+    merged.sort(key=lambda e: e['at'])
+    created = merged[0]['at'] if merged else time.time()
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        f.write(json.dumps({'version': CASSETTE_VERSION, 'created': created}) + "\n")
+        for entry in merged:
+            entry['at'] = round(entry['at'] - created, 4)
+            f.write(json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + "\n")
+    return len(merged)
+
+
+def summarize(entries: Iterable[Dict]) -> Dict:
+    """cassette内容统计: 请求数、token数、状态码分布和耗时"""
+    entries = list(entries)
+    statuses: Dict[str, int] = {}
+    for entry in entries:
+        key = entry.get('error') or str(entry.get('status'))
+        statuses[key] = statuses.get(key, 0) + 1
+    elapsed = sorted(e.get('elapsed', 0.0) for e in entries)
+    return {
+        'requests': len(entries),
+        'tokens': len({e['token'] for e in entries if e.get('token')}),
+        'duration': max((e['at'] + e.get('elapsed', 0.0) for e in entries), default=0.0),
+        'statuses': statuses,
+        'p50': elapsed[len(elapsed) // 2] if elapsed else None,
+        'p99': elapsed[min(len(elapsed) - 1, int(len(elapsed) * 0.99))] if elapsed else None,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="HTTP录制文件工具")
+    sub = parser.add_subparsers(dest='command', required=True)
+    p_info = sub.add_parser('info', help="查看录制内容统计")
+    p_info.add_argument('cassette')
+    p_tokens = sub.add_parser('tokens', help="输出录制中的token别名，回放时作为token文件")
+    p_tokens.add_argument('cassette')
+    args = parser.parse_args(argv)
+
+    _, entries = read_cassette(args.cassette)
+    if args.command == 'info':
+        print(json.dumps(summarize(entries), ensure_ascii=False, indent=2))
+    elif args.command == 'tokens':
+        for alias in sorted({e['token'] for e in entries if e.get('token')}):
+            print(alias)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+import logging
+import threading
+import time
+from typing import Dict
+
+logger = logging.getLogger("CircuitBreaker")
+
+STATE_CLOSED = 'closed'
+STATE_OPEN = 'open'
+STATE_HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    """单个主机的熔断器
+
+    连续出现failure_threshold次连接失败后熔断(open)，熔断期间请求直接失败，
+    不再访问故障主机。熔断时间结束后进入半开状态(half_open)，只放行一个
+    探测请求: 成功则恢复(closed)，失败则再次熔断并加倍熔断时间。
+    """
+
+    def __init__(self, host: str, failure_threshold: int = 5,
+                 reset_timeout: float = 10, max_reset_timeout: float = 300):
+        """初始化熔断器
+
+        Args:
+            host: 主机名
+            failure_threshold: 触发熔断的连续失败次数
+            reset_timeout: 首次熔断时长(秒)
+            max_reset_timeout: 熔断时长上限(秒)
+        """
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.base_reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self.reset_timeout = reset_timeout
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        """判断是否允许发出请求"""
+        with self._lock:
+            if self.state == STATE_CLOSED:
+                return True
+            if self.state == STATE_OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self.state = STATE_HALF_OPEN
+                self._probe_in_flight = False
+            # 半开状态只放行一个探测请求
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            logger.info(f"{self.host} 熔断结束，发送探测请求")
+            return True
+
+    def record_success(self):
+        """记录一次成功请求"""
+        with self._lock:
+            if self.state != STATE_CLOSED:
+                logger.info(f"{self.host} 已恢复")
+            self.state = STATE_CLOSED
+            self.failures = 0
+            self.reset_timeout = self.base_reset_timeout
+            self._probe_in_flight = False
+
+    def release_probe(self):
+        """放行的请求未发出时调用，半开状态下允许再放行一个探测请求"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        """记录一次连接失败"""
+        with self._lock:
+            self.failures += 1
+            if self.state == STATE_HALF_OPEN:
+                self.reset_timeout = min(self.reset_timeout * 2, self.max_reset_timeout)
+                self._open()
+            elif self.state == STATE_CLOSED and self.failures >= self.failure_threshold:
+                self._open()
+
+    def _open(self):
+        """进入熔断状态(需持有锁)"""
+        self.state = STATE_OPEN
+        self._opened_at = time.monotonic()
+        self._probe_in_flight = False
+        logger.warning(f"{self.host} 连续失败{self.failures}次，熔断{self.reset_timeout:.0f}秒")
+
+    def retry_after(self) -> float:
+        """距离允许探测还需等待的秒数"""
+        with self._lock:
+            if self.state != STATE_OPEN:
+                return 0.0
+            return max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(host: str) -> CircuitBreaker:
+    """获取主机对应的熔断器，不存在时创建"""
+    with _breakers_lock:
+        breaker = _breakers.get(host)
+        if breaker is None:
+            breaker = CircuitBreaker(host)
+            _breakers[host] = breaker
+        return breaker
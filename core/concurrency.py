@@ -0,0 +1,261 @@
+import logging
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+logger = logging.getLogger("Concurrency")
+
+OUTCOME_OK = 'ok'
+OUTCOME_THROTTLED = 'throttled'
+OUTCOME_TIMEOUT = 'timeout'
+OUTCOME_ERROR = 'error'
+OUTCOME_NETWORK = 'network'
+OUTCOME_CIRCUIT_OPEN = 'circuit_open'
+
+# 可退避后重试的结果
+RETRYABLE_OUTCOMES = (OUTCOME_THROTTLED, OUTCOME_TIMEOUT, OUTCOME_NETWORK)
+
+# 服务端明确拒绝凭证的HTTP状态码
+AUTH_REJECTED_STATUS_CODES = (401, 403)
+
+
+def classify_error(error: BaseException) -> str:
+    """将请求异常归类为熔断、限流、超时、网络错误或一般错误"""
+    if getattr(error, 'circuit_open', False):
+        return OUTCOME_CIRCUIT_OPEN
+    if getattr(error, 'status_code', None) == 429:
+        return OUTCOME_THROTTLED
+    if getattr(error, 'timeout', False):
+        return OUTCOME_TIMEOUT
+    if getattr(error, 'network', False):
+        return OUTCOME_NETWORK
+    return OUTCOME_ERROR
+
+
+def is_auth_rejected(error: BaseException) -> bool:
+    """请求是否因凭证无效被服务端拒绝(401/403)
+
+    只有这类错误说明token无效，5xx、404等其他错误不能据此判定。
+    """
+    return getattr(error, 'status_code', None) in AUTH_REJECTED_STATUS_CODES
+
+
+class TokenBucket:
+    """令牌桶限速器，限制平均请求速率并允许少量突发"""
+
+    def __init__(self, rate: float, capacity: float = 1):
+        """初始化令牌桶
+
+        Args:
+            rate: 每秒补充的令牌数
+            capacity: 桶容量(允许的突发请求数)
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def set_rate(self, rate: float):
+        with self._lock:
+            self._refill()
+            self.rate = rate
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self) -> float:
+        """尝试取一个令牌
+
+        Returns:
+            0表示成功，否则为需要等待的秒数
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate if self.rate > 0 else 1.0
+
+    def acquire(self, stop_event: Optional[threading.Event] = None) -> bool:
+        """阻塞直到取得令牌，stop_event被设置时返回False"""
+        while True:
+            wait = self.try_acquire()
+            if wait == 0:
+                return True
+            if stop_event is not None:
+                if stop_event.wait(wait):
+                    return False
+            else:
+                time.sleep(wait)
+
+
+class LatencyTracker:
+    """最近N次请求的延迟统计"""
+
+    def __init__(self, window: int = 100):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, latency: float):
+        with self._lock:
+            self._samples.append(latency)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """返回第p百分位延迟，样本为空时返回None"""
+        with self._lock:
+            if not self._samples:
+                return None
+            ordered = sorted(self._samples)
+        idx = min(len(ordered) - 1, int(round(p / 100.0 * (len(ordered) - 1))))
+        return ordered[idx]
+
+    def p95(self) -> Optional[float]:
+        return self.percentile(95)
+
+    def __len__(self):
+        return len(self._samples)
+
+
+class AdaptiveLimiter:
+    """AIMD自适应并发限制器
+
+    延迟和错误率正常时，每完成一轮(约等于当前并发数个请求)并发数加一；
+    遇到429、超时、错误率过高或p95延迟明显高于基线时，并发数按比例快速下降。
+    并发数始终保持在[min_limit, max_limit]范围内。
+    """
+
+    def __init__(self, min_limit: int = 1, max_limit: int = 10,
+                 initial: Optional[int] = None,
+                 decrease_factor: float = 0.5,
+                 latency_tolerance: float = 2.0,
+                 error_threshold: float = 0.2,
+                 cooldown: float = 1.0,
+                 window: int = 50):
+        """初始化限制器
+
+        Args:
+            min_limit: 最小并发数
+            max_limit: 最大并发数
+            initial: 初始并发数，默认为min_limit
+            decrease_factor: 回退时并发数乘以的系数
+            latency_tolerance: p95超过基线的倍数时视为延迟上升
+            error_threshold: 窗口内错误率超过该值时回退
+            cooldown: 两次回退之间的最短间隔(秒)，避免同一波限流连续回退
+            window: 统计延迟和错误率的窗口大小
+        """
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = max(self.min_limit, min(self.max_limit, initial or self.min_limit))
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self.error_threshold = error_threshold
+        self.cooldown = cooldown
+
+        self.latency = LatencyTracker(window)
+        self._outcomes = deque(maxlen=window)
+        self._baseline: Optional[float] = None
+        self._successes_since_change = 0
+        self._last_decrease = 0.0
+        self._in_flight = 0
+        self._cond = threading.Condition()
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def set_bounds(self, min_limit: int, max_limit: int):
+        """调整并发上下限，立即生效"""
+        with self._cond:
+            self.min_limit = max(1, min_limit)
+            self.max_limit = max(self.min_limit, max_limit)
+            self.limit = max(self.min_limit, min(self.max_limit, self.limit))
+            self._cond.notify_all()
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """等待直到进行中的请求数低于当前并发数
+
+        Returns:
+            是否获得许可，超时返回False
+        """
+        with self._cond:
+            ok = self._cond.wait_for(lambda: self._in_flight < self.limit, timeout)
+            if ok:
+                self._in_flight += 1
+            return ok
+
+    def release(self, latency: Optional[float], outcome: str = OUTCOME_OK):
+        """归还许可并根据结果调整并发数
+
+        Args:
+            latency: 请求耗时(秒)
+            outcome: 请求结果，见OUTCOME_*常量
+        """
+        with self._cond:
+            self._in_flight = max(0, self._in_flight - 1)
+            if outcome == OUTCOME_CIRCUIT_OPEN:
+                # 请求未发出，不计入统计
+                self._cond.notify_all()
+                return
+            self._outcomes.append(outcome != OUTCOME_OK)
+
+            if outcome in RETRYABLE_OUTCOMES:
+                self._decrease(outcome)
+            elif outcome == OUTCOME_OK:
+                if latency is not None:
+                    self.latency.record(latency)
+                self._on_success()
+            elif self._error_rate() > self.error_threshold:
+                self._decrease('error_rate')
+
+            self._cond.notify_all()
+
+    def _error_rate(self) -> float:
+        if len(self._outcomes) < 10:
+            return 0.0
+        return sum(self._outcomes) / len(self._outcomes)
+
+    def _on_success(self):
+        """成功请求: 检查延迟，满一轮后加性增加(需持有锁)"""
+        p95 = self.latency.p95()
+        if p95 is not None and len(self.latency) >= 10:
+            if self._baseline is None or p95 < self._baseline:
+                self._baseline = p95
+            elif p95 > self._baseline * self.latency_tolerance:
+                self._decrease('latency')
+                # 基线缓慢上移，避免网络整体变慢后一直回退
+                self._baseline *= 1.1
+                return
+
+        self._successes_since_change += 1
+        if (self._successes_since_change >= self.limit
+                and self.limit < self.max_limit
+                and self._error_rate() <= self.error_threshold):
+            self.limit += 1
+            self._successes_since_change = 0
+
+    def _decrease(self, reason: str):
+        """乘性减少(需持有锁)"""
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown:
+            return
+        self._last_decrease = now
+        old = self.limit
+        self.limit = max(self.min_limit, int(self.limit * self.decrease_factor))
+        self._successes_since_change = 0
+        if self.limit != old:
+            logger.info(f"并发数下调 {old} -> {self.limit} ({reason})")
+
+    def snapshot(self) -> Dict:
+        """当前状态"""
+        with self._cond:
+            return {
+                'limit': self.limit,
+                'in_flight': self._in_flight,
+                'p95': self.latency.p95(),
+                'baseline': self._baseline,
+                'error_rate': self._error_rate(),
+            }
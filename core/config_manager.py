@@ -24,6 +24,8 @@ class ConfigManager:
                     content = f.read()
                     if not content.strip():
                         self._create_default_config()
+                    else:
+                        self.config.read(self.config_path, encoding='utf-8')
         except Exception as e:
             logger.error(f"配置文件初始化失败: {str(e)}")
             raise
@@ -34,9 +36,19 @@ class ConfigManager:
             'theme': 'light',
             'font_size': '10',
             'api_timeout': '30',
+            'connect_timeout': '5',
+            'item_deadline': '90',
+            'hedge_enabled': 'false',
+            'hedge_budget': '5',
             'max_threads': '5',
+            'min_threads': '1',
             'auto_save': 'true',
-            'save_interval': '5'
+            'save_interval': '5',
+            'health_check_enabled': 'true',
+            'health_check_hours': '24',
+            'health_check_rate': '30',
+            'proxies': '',
+            'use_daemon': 'false'
         }
         self.save_config()
 
@@ -52,13 +64,51 @@ class ConfigManager:
         except (configparser.NoSectionError, configparser.NoOptionError):
             return fallback
 
+    def getint(self, section, option, fallback=None):
+        """获取整数配置值"""
+        try:
+            return self.config.getint(section, option, fallback=fallback)
+        except ValueError:
+            return fallback
+
+    def getfloat(self, section, option, fallback=None):
+        """获取浮点数配置值"""
+        try:
+            return self.config.getfloat(section, option, fallback=fallback)
+        except ValueError:
+            return fallback
+
+    def getboolean(self, section, option, fallback=None):
+        """获取布尔配置值"""
+        try:
+            return self.config.getboolean(section, option, fallback=fallback)
+        except ValueError:
+            return fallback
+
+    def set(self, section, option, value):
+        """设置配置值(需调用save_config写入文件)"""
+        if section != 'DEFAULT' and not self.config.has_section(section):
+            self.config.add_section(section)
+        self.config.set(section, option, str(value).lower()
+                        if isinstance(value, bool) else str(value))
+
     def get_app_settings(self):
         """获取所有应用设置"""
         return {
             'theme': self.get('DEFAULT', 'theme', 'light'),
             'font_size': self.getint('DEFAULT', 'font_size', 10),
             'api_timeout': self.getint('DEFAULT', 'api_timeout', 30),
+            'connect_timeout': self.getint('DEFAULT', 'connect_timeout', 5),
+            'item_deadline': self.getint('DEFAULT', 'item_deadline', 90),
+            'hedge_enabled': self.getboolean('DEFAULT', 'hedge_enabled', False),
+            'hedge_budget': self.getint('DEFAULT', 'hedge_budget', 5),
             'max_threads': self.getint('DEFAULT', 'max_threads', 5),
+            'min_threads': self.getint('DEFAULT', 'min_threads', 1),
             'auto_save': self.getboolean('DEFAULT', 'auto_save', True),
-            'save_interval': self.getint('DEFAULT', 'save_interval', 5)
+            'save_interval': self.getint('DEFAULT', 'save_interval', 5),
+            'health_check_enabled': self.getboolean('DEFAULT', 'health_check_enabled', True),
+            'health_check_hours': self.getint('DEFAULT', 'health_check_hours', 24),
+            'health_check_rate': self.getint('DEFAULT', 'health_check_rate', 30),
+            'proxies': self.get('DEFAULT', 'proxies', ''),
+            'use_daemon': self.getboolean('DEFAULT', 'use_daemon', False)
         }
\ No newline at end of file
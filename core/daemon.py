@@ -0,0 +1,572 @@
+# -*- coding: utf-8 -*-
+"""后台服务
+
+后台服务进程持有共享的HTTP连接池、代理池、响应缓存和批量验证任务队列，
+图形界面和命令行作为客户端通过本机TCP连接提交任务、订阅进度和读取结果。
+关闭窗口不会中断正在执行的任务，任务保存在JobQueue中，服务重启后继续执行。
+分组和账号数据仍由图形界面写入(唯一的写入方)，界面重新连接后合并已完成任务的结果。
+
+协议为每行一个JSON对象。客户端请求 {"id": n, "op": "...", ...}，
+服务端回复 {"id": n, "ok": true, "result": ...} 或 {"id": n, "ok": false, "error": "..."}；
+服务端主动推送的事件没有id，形如 {"event": "progress", "job": ..., "done": ..., "total": ..., "finished": ...}。
+连接后的第一个请求必须是携带密钥的hello，密钥和端口写在config/daemon.json中，
+只有能读取该文件的本机用户可以连接。
+
+用法:
+    python main.py --daemon
+    python -m core.daemon status
+    python -m core.daemon submit tokens.txt
+    python -m core.daemon results JOB_ID
+    python -m core.daemon stop
+"""
+import argparse
+import hmac
+import json
+import logging
+import os
+import secrets
+import socket
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from core.config_manager import ConfigManager
+from core.distributed import ShardWorker, read_tokens
+from core.http_client import get_shared_client
+from core.job_queue import JobQueue
+from core.persistence import atomic_write_json
+from core.proxy_pool import get_shared_proxy_pool, parse_proxy_list
+
+logger = logging.getLogger("Daemon")
+
+DEFAULT_INFO_PATH = "config/daemon.json"
+DEFAULT_QUEUE_DIR = "jobs/daemon"
+PROTOCOL_VERSION = 1
+# 进度推送的检查间隔(秒)
+PROGRESS_INTERVAL = 0.5
+
+
+class DaemonError(Exception):
+    """后台服务不可用或请求失败"""
+
+
+def configure_network(settings: dict):
+    """按应用设置调整共享HTTP连接池大小、请求超时、对冲和出口代理
+
+    连接池至少与工作线程数一样大，避免线程等待空闲连接。
+    配置了代理时每个代理各有一个同样大小的连接池。
+    """
+    client_options = dict(
+        pool_size=max(10, settings['max_threads'] * 2),
+        timeout=settings['api_timeout'],
+        connect_timeout=settings['connect_timeout'],
+        hedge=settings['hedge_enabled'],
+        hedge_budget=settings['hedge_budget'] / 100
+    )
+    get_shared_client().configure(**client_options)
+    get_shared_proxy_pool().configure(
+        proxies=parse_proxy_list(settings['proxies']), **client_options)
+
+
+def shard_size_for(count: int) -> int:
+    """切分分片，使小批量也有约20次进度更新"""
+    return max(10, min(200, count // 20))
+
+
+class _ClientConnection:
+    """一个已连接的客户端，回复和事件可能来自不同线程，写入需加锁"""
+
+    def __init__(self, sock: socket.socket, wfile):
+        self.sock = sock
+        self.wfile = wfile
+        self._lock = threading.Lock()
+        self.authenticated = False
+
+    def send(self, message: Dict) -> bool:
+        data = (json.dumps(message) + "\n").encode('utf-8')
+        with self._lock:
+            try:
+                self.wfile.write(data)
+                self.wfile.flush()
+                return True
+            except OSError:
+                return False
+
+    def close(self):
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        self.server.owner.serve_client(self.connection, self.rfile, self.wfile)
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class DaemonServer:
+    """后台服务: 监听本机端口，执行批量验证任务并推送进度"""
+
+    def __init__(self, config: Optional[ConfigManager] = None,
+                 info_path: str = DEFAULT_INFO_PATH,
+                 queue_dir: str = DEFAULT_QUEUE_DIR,
+                 host: str = "127.0.0.1", port: int = 0):
+        """初始化服务
+
+        Args:
+            config: 应用配置，决定线程数、超时和代理
+            info_path: 写入端口和密钥的文件
+            queue_dir: 任务队列目录
+            host: 监听地址，只应为本机地址
+            port: 监听端口，为0时自动选择
+        """
+        self.config = config if config is not None else ConfigManager()
+        self.info_path = Path(info_path)
+        self.queue_dir = queue_dir
+        self.host = host
+        self.port = port
+        self.secret = secrets.token_hex(16)
+        self._stop = threading.Event()
+        self._clients: List[_ClientConnection] = []
+        self._clients_lock = threading.Lock()
+        # 未结束的任务: job_id -> [总项数, 上次推送的已完成数]
+        self._active: Dict[str, List[int]] = {}
+        self._active_lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self.queue: Optional[JobQueue] = None
+        self.worker: Optional[ShardWorker] = None
+        self._server: Optional[_Server] = None
+        self._ops: Dict[str, Callable[[Dict], object]] = {
+            'ping': lambda params: 'pong',
+            'submit': self._op_submit,
+            'status': self._op_status,
+            'results': self._op_results,
+            'configure': self._op_configure,
+            'stats': self._op_stats,
+            'shutdown': self._op_shutdown,
+        }
+
+    def start(self):
+        """打开任务队列，启动工作线程和监听"""
+        settings = self.config.get_app_settings()
+        self.queue = JobQueue(self.queue_dir)
+        self.worker = ShardWorker(self.queue, settings['max_threads'],
+                                  worker_id=f"daemon:{os.getpid()}")
+        configure_network(settings)
+        for job in self.queue.jobs():
+            status = self.queue.status(job['id'])
+            if not status['finished']:
+                self._active[job['id']] = [job['total_items'], status['results']]
+
+        self._server = _Server((self.host, self.port), _RequestHandler)
+        self._server.owner = self
+        self.port = self._server.server_address[1]
+        self._start_thread(self._server.serve_forever, "DaemonServer")
+        self._start_thread(self._run_worker, "DaemonWorker")
+        self._start_thread(self._watch_progress, "DaemonProgress")
+
+        self.info_path.parent.mkdir(parents=True, exist_ok=True)
+        # 文件含连接密钥，从创建起只有当前用户可读
+        atomic_write_json(self.info_path, {'host': self.host, 'port': self.port,
+                                           'secret': self.secret, 'pid': os.getpid()},
+                          mode=0o600)
+        logger.info(f"后台服务已启动: {self.host}:{self.port}, 未完成任务{len(self._active)}个")
+
+    def _start_thread(self, target, name: str):
+        thread = threading.Thread(target=target, name=name, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def serve_forever(self):
+        """启动并运行到stop()被调用或收到Ctrl+C"""
+        self.start()
+        try:
+            while not self._stop.wait(1):
+                pass
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def stop(self):
+        """停止服务，正在处理的分片放回队列，下次启动后继续"""
+        if self._server is None:
+            return
+        self._stop.set()
+        self.worker.stop()
+        self._server.shutdown()
+        self._server.server_close()
+        # 断开客户端，界面据此改为在本进程执行
+        with self._clients_lock:
+            clients = list(self._clients)
+        for client in clients:
+            client.close()
+        for thread in self._threads:
+            if thread is not threading.current_thread():
+                thread.join(timeout=30)
+        self._server = None
+        get_shared_proxy_pool().stop()
+        self.queue.close()
+        try:
+            with open(self.info_path, 'r', encoding='utf-8') as f:
+                if json.load(f).get('pid') == os.getpid():
+                    os.remove(self.info_path)
+        except (OSError, ValueError):
+            pass
+        logger.info("后台服务已停止")
+
+    def _run_worker(self):
+        try:
+            self.worker.run(exit_when_idle=False, idle_wait=1.0)
+        except Exception as e:
+            logger.error(f"后台工作线程出错: {str(e)}", exc_info=True)
+
+    def _watch_progress(self):
+        """定期检查未结束任务的进度，有变化时推送给所有客户端"""
+        while not self._stop.wait(PROGRESS_INTERVAL):
+            with self._active_lock:
+                active = list(self._active.items())
+            for job_id, (total, last_done) in active:
+                try:
+                    status = self.queue.status(job_id)
+                except Exception as e:
+                    logger.error(f"读取任务进度失败: {str(e)}")
+                    continue
+                if status['results'] == last_done and not status['finished']:
+                    continue
+                with self._active_lock:
+                    if status['finished']:
+                        self._active.pop(job_id, None)
+                    elif job_id in self._active:
+                        self._active[job_id][1] = status['results']
+                self.broadcast({'event': 'progress', 'job': job_id, 'done': status['results'],
+                                'total': total, 'finished': status['finished']})
+                if status['finished']:
+                    logger.info(f"任务 {job_id} 完成: {status['results']}/{total}项")
+
+    def broadcast(self, message: Dict):
+        with self._clients_lock:
+            clients = [c for c in self._clients if c.authenticated]
+        for client in clients:
+            client.send(message)
+
+    def serve_client(self, sock: socket.socket, rfile, wfile):
+        """处理一个客户端连接直到断开"""
+        client = _ClientConnection(sock, wfile)
+        with self._clients_lock:
+            self._clients.append(client)
+        try:
+            for line in rfile:
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    break
+                if not client.authenticated:
+                    if (request.get('op') != 'hello' or not hmac.compare_digest(
+                            str(request.get('secret', '')), self.secret)):
+                        client.send({'id': request.get('id'), 'ok': False, 'error': "认证失败"})
+                        break
+                    client.authenticated = True
+                    client.send({'id': request.get('id'), 'ok': True,
+                                 'result': {'version': PROTOCOL_VERSION, 'pid': os.getpid()}})
+                    continue
+                self._dispatch(client, request)
+        except OSError:
+            pass
+        finally:
+            with self._clients_lock:
+                self._clients.remove(client)
+
+    def _dispatch(self, client: _ClientConnection, request: Dict):
+        op = self._ops.get(request.get('op'))
+        if op is None:
+            client.send({'id': request.get('id'), 'ok': False,
+                         'error': f"未知操作: {request.get('op')}"})
+            return
+        try:
+            result = op(request)
+        except Exception as e:
+            logger.error(f"处理请求 {request.get('op')} 出错: {str(e)}")
+            client.send({'id': request.get('id'), 'ok': False, 'error': str(e)})
+            return
+        client.send({'id': request.get('id'), 'ok': True, 'result': result})
+
+    def _op_submit(self, params: Dict) -> Dict:
+        tokens = [t.strip() for t in params.get('tokens', []) if t and t.strip()]
+        if not tokens:
+            raise ValueError("没有可验证的token")
+        job_id = self.queue.create_job(tokens, params.get('shard_size') or shard_size_for(len(tokens)))
+        with self._active_lock:
+            self._active[job_id] = [len(tokens), 0]
+        logger.info(f"收到验证任务 {job_id}: {len(tokens)}个token")
+        return {'job': job_id, 'total': len(tokens)}
+
+    def _op_status(self, params: Dict) -> List[Dict]:
+        jobs = self.queue.jobs()
+        if params.get('job'):
+            jobs = [j for j in jobs if j['id'] == params['job']]
+        return [{'job': j['id'], 'created_at': j['created_at'], 'total': j['total_items'],
+                 **self.queue.status(j['id'])} for j in jobs]
+
+    def _op_results(self, params: Dict) -> List[Dict]:
+        return list(self.queue.iter_results(params['job']))
+
+    def _op_configure(self, params: Dict) -> bool:
+        """应用客户端保存的设置，新的线程数从下一个分片开始生效"""
+        settings = params['settings']
+        configure_network(settings)
+        self.worker.threads = settings['max_threads']
+        return True
+
+    def _op_stats(self, params: Dict) -> Dict:
+        client = get_shared_client()
+        with self._clients_lock:
+            clients = sum(1 for c in self._clients if c.authenticated)
+        with self._active_lock:
+            active = len(self._active)
+        return {
+            'clients': clients,
+            'active_jobs': active,
+            'threads': self.worker.threads,
+            'pool_size': client.pool_size,
+            'proxies': get_shared_proxy_pool().stats(),
+        }
+
+    def _op_shutdown(self, params: Dict) -> bool:
+        self._stop.set()
+        return True
+
+
+class DaemonClient:
+    """后台服务客户端
+
+    读取线程接收回复和事件，事件通过on_event回调(在读取线程中执行)，
+    连接断开时调用on_disconnect。
+    """
+
+    def __init__(self, info_path: str = DEFAULT_INFO_PATH,
+                 on_event: Optional[Callable[[Dict], None]] = None,
+                 on_disconnect: Optional[Callable[[], None]] = None):
+        self.info_path = info_path
+        self.on_event = on_event
+        self.on_disconnect = on_disconnect
+        self._sock: Optional[socket.socket] = None
+        self._wfile = None
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self._pending: Dict[int, List] = {}
+        self._reader: Optional[threading.Thread] = None
+
+    @property
+    def connected(self) -> bool:
+        return self._sock is not None
+
+    def connect(self, timeout: float = 5.0):
+        """按info文件连接并认证
+
+        Raises:
+            DaemonError: 服务未运行或认证失败
+        """
+        try:
+            with open(self.info_path, 'r', encoding='utf-8') as f:
+                info = json.load(f)
+            sock = socket.create_connection((info['host'], info['port']), timeout=timeout)
+        except (OSError, ValueError, KeyError) as e:
+            raise DaemonError(f"后台服务未运行: {str(e)}")
+        sock.settimeout(None)
+        self._sock = sock
+        self._wfile = sock.makefile('wb')
+        self._reader = threading.Thread(target=self._read, args=(sock.makefile('rb'),),
+                                        name="DaemonClient", daemon=True)
+        self._reader.start()
+        try:
+            self.call('hello', timeout=timeout, secret=info.get('secret'))
+        except DaemonError:
+            self.close()
+            raise
+
+    def _read(self, rfile):
+        try:
+            for line in rfile:
+                message = json.loads(line)
+                if 'event' in message:
+                    if self.on_event is not None:
+                        try:
+                            self.on_event(message)
+                        except Exception as e:
+                            logger.error(f"处理后台服务事件出错: {str(e)}")
+                    continue
+                with self._lock:
+                    waiter = self._pending.pop(message.get('id'), None)
+                if waiter is not None:
+                    waiter[1] = message
+                    waiter[0].set()
+        except (OSError, ValueError):
+            pass
+        self._disconnected()
+
+    def _disconnected(self):
+        with self._lock:
+            was_connected = self._sock is not None
+            self._sock = None
+            pending, self._pending = self._pending, {}
+        for waiter in pending.values():
+            waiter[0].set()
+        if was_connected and self.on_disconnect is not None:
+            self.on_disconnect()
+
+    def call(self, op: str, timeout: float = 30.0, **params):
+        """发送请求并等待回复
+
+        Returns:
+            回复中的result
+
+        Raises:
+            DaemonError: 未连接、超时或服务端返回错误
+        """
+        with self._lock:
+            if self._sock is None:
+                raise DaemonError("未连接后台服务")
+            self._next_id += 1
+            request_id = self._next_id
+            waiter = [threading.Event(), None]
+            self._pending[request_id] = waiter
+            try:
+                self._wfile.write((json.dumps({'id': request_id, 'op': op, **params}) + "\n")
+                                  .encode('utf-8'))
+                self._wfile.flush()
+            except OSError as e:
+                self._pending.pop(request_id, None)
+                raise DaemonError(f"发送请求失败: {str(e)}")
+        if not waiter[0].wait(timeout):
+            with self._lock:
+                self._pending.pop(request_id, None)
+            raise DaemonError(f"请求 {op} 超时")
+        reply = waiter[1]
+        if reply is None:
+            raise DaemonError("后台服务连接已断开")
+        if not reply.get('ok'):
+            raise DaemonError(reply.get('error', "请求失败"))
+        return reply.get('result')
+
+    def close(self):
+        with self._lock:
+            sock, self._sock = self._sock, None
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            sock.close()
+
+
+def spawn_daemon() -> subprocess.Popen:
+    """在独立的进程组中启动后台服务，关闭界面不会结束它"""
+    main_script = Path(__file__).resolve().parent.parent / "main.py"
+    kwargs = {}
+    if sys.platform == 'win32':
+        kwargs['creationflags'] = (subprocess.CREATE_NEW_PROCESS_GROUP
+                                   | subprocess.DETACHED_PROCESS)
+    else:
+        kwargs['start_new_session'] = True
+    return subprocess.Popen([sys.executable, str(main_script), '--daemon'],
+                            stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                            stderr=subprocess.DEVNULL, **kwargs)
+
+
+def connect_or_spawn(info_path: str = DEFAULT_INFO_PATH, wait: float = 10.0,
+                     **client_kwargs) -> DaemonClient:
+    """连接后台服务，未运行时启动一个并等待其就绪
+
+    Raises:
+        DaemonError: 在wait秒内无法连接
+    """
+    client = DaemonClient(info_path, **client_kwargs)
+    try:
+        client.connect()
+        return client
+    except DaemonError:
+        pass
+    logger.info("后台服务未运行，正在启动")
+    process = spawn_daemon()
+    deadline = time.monotonic() + wait
+    while True:
+        time.sleep(0.2)
+        try:
+            client.connect()
+            return client
+        except DaemonError as e:
+            if process.poll() is not None:
+                raise DaemonError(f"后台服务启动失败，退出码 {process.returncode}")
+            if time.monotonic() >= deadline:
+                raise DaemonError(f"等待后台服务启动超时: {str(e)}")
+
+
+def run_daemon(info_path: str = DEFAULT_INFO_PATH, queue_dir: str = DEFAULT_QUEUE_DIR) -> int:
+    """运行后台服务，已有服务在运行时直接退出"""
+    probe = DaemonClient(info_path)
+    try:
+        probe.connect()
+        probe.close()
+        logger.info("后台服务已在运行")
+        return 0
+    except DaemonError:
+        pass
+    DaemonServer(info_path=info_path, queue_dir=queue_dir).serve_forever()
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="后台服务客户端")
+    parser.add_argument('--info', default=DEFAULT_INFO_PATH, help="服务信息文件")
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('serve', help="在前台运行后台服务")
+    p_status = sub.add_parser('status', help="查看任务进度")
+    p_status.add_argument('job', nargs='?')
+    p_submit = sub.add_parser('submit', help="提交验证任务")
+    p_submit.add_argument('tokens', help="token文件")
+    p_results = sub.add_parser('results', help="输出任务结果(JSON Lines)")
+    p_results.add_argument('job')
+    sub.add_parser('stats', help="查看服务状态")
+    sub.add_parser('stop', help="停止后台服务")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    if args.command == 'serve':
+        return run_daemon(args.info)
+
+    client = DaemonClient(args.info)
+    try:
+        client.connect()
+        if args.command == 'status':
+            for job in client.call('status', job=args.job):
+                print(json.dumps(job, ensure_ascii=False))
+        elif args.command == 'submit':
+            print(client.call('submit', tokens=read_tokens(args.tokens))['job'])
+        elif args.command == 'results':
+            for result in client.call('results', timeout=300, job=args.job):
+                print(json.dumps(result, ensure_ascii=False))
+        elif args.command == 'stats':
+            print(json.dumps(client.call('stats'), ensure_ascii=False, indent=2))
+        elif args.command == 'stop':
+            client.call('shutdown')
+    except DaemonError as e:
+        print(str(e), file=sys.stderr)
+        return 1
+    finally:
+        client.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,348 @@
+# -*- coding: utf-8 -*-
+"""分布式批量验证
+
+协调进程把token切分成分片写入共享目录中的JobQueue，多个工作进程
+(可在共享该目录的多台机器上)领取分片并验证，结果写回队列。
+
+用法:
+    python -m core.distributed --queue jobs run tokens.txt --processes 4
+    python -m core.distributed --queue jobs submit tokens.txt
+    python -m core.distributed --queue jobs worker --threads 8
+    python -m core.distributed --queue jobs --proxies http://p1:8080,http://p2:8080 worker
+    python -m core.distributed --queue jobs status JOB_ID
+    python -m core.distributed --queue jobs apply JOB_ID
+    python -m core.distributed --queue jobs --record traffic.cassette run tokens.txt
+    python -m core.distributed --queue jobs --replay traffic.cassette --replay-speed 0 run tokens.txt
+
+--record把实际的API请求录制到文件(token已脱敏)，--replay在没有网络时
+按录制内容回放，见core.cassette。
+"""
+import argparse
+import glob
+import json
+import logging
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from core.account_registry import STATUS_VALID, STATUS_INVALID, STATUS_ERROR
+from core.cassette import (CassettePlayer, CassetteRecorder, install_transport,
+                           merge_cassettes)
+from core.concurrency import (classify_error, is_auth_rejected, RETRYABLE_OUTCOMES,
+                              OUTCOME_CIRCUIT_OPEN)
+from core.http_client import get_shared_client
+from core.job_queue import JobQueue, ShardLease
+from core.proxy_pool import get_shared_proxy_pool, parse_proxy_list
+from core.twitter_api import TwitterAPI, TwitterAPIError
+
+logger = logging.getLogger("Distributed")
+
+
+def verify_token(token: str, max_retries: int = 3,
+                 retry_backoff: float = 2.0) -> Dict:
+    """验证单个token
+
+    限流、超时和网络错误退避后重试，熔断期间等待恢复且不计重试次数。
+
+    Returns:
+        结果字典，status为valid、invalid或error
+    """
+    attempt = 0
+    while True:
+        try:
+            data = TwitterAPI(token).verify_credentials().get('data', {})
+            return {
+                'token': token,
+                'username': data.get('username'),
+                'name': data.get('name'),
+                'id': data.get('id'),
+                'profile_image_url': data.get('profile_image_url'),
+                'status': STATUS_VALID,
+                'last_verified': time.time(),
+            }
+        except TwitterAPIError as e:
+            outcome = classify_error(e)
+            if outcome == OUTCOME_CIRCUIT_OPEN:
+                time.sleep(max(getattr(e, 'retry_after', 0.0), 1.0))
+                continue
+            if outcome in RETRYABLE_OUTCOMES and attempt < max_retries:
+                time.sleep(retry_backoff * (2 ** attempt))
+                attempt += 1
+                continue
+            return {
+                'token': token,
+                'status': STATUS_INVALID if is_auth_rejected(e) else STATUS_ERROR,
+                'error': str(e),
+                'last_verified': time.time(),
+            }
+        except Exception as e:
+            return {'token': token, 'status': STATUS_ERROR, 'error': str(e),
+                    'last_verified': time.time()}
+
+
+class ShardWorker:
+    """工作进程: 循环领取分片、验证并提交结果"""
+
+    def __init__(self, queue: JobQueue, threads: int = 8,
+                 worker_id: Optional[str] = None):
+        """初始化工作进程
+
+        Args:
+            queue: 任务队列
+            threads: 每个分片内的并发验证数
+            worker_id: 工作进程标识，默认为 主机名:进程号
+        """
+        self.queue = queue
+        self.threads = threads
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self._stop = threading.Event()
+        get_shared_client().configure(pool_size=max(10, threads * 2))
+        get_shared_proxy_pool().configure(pool_size=max(10, threads * 2))
+
+    def stop(self):
+        self._stop.set()
+
+    def _keep_alive(self, lease: ShardLease, done: threading.Event,
+                    lost: threading.Event):
+        """处理分片期间定期续约"""
+        interval = max(1.0, self.queue.lease_seconds / 3)
+        while not done.wait(interval):
+            if not self.queue.renew(lease):
+                logger.warning(f"分片 {lease.job_id}/{lease.seq} 租约丢失")
+                lost.set()
+                return
+
+    def process(self, lease: ShardLease) -> bool:
+        """处理一个分片
+
+        Returns:
+            结果是否已提交
+        """
+        done = threading.Event()
+        lost = threading.Event()
+        heartbeat = threading.Thread(target=self._keep_alive, args=(lease, done, lost),
+                                     daemon=True)
+        heartbeat.start()
+        results: Dict[str, Dict] = {}
+        executor = ThreadPoolExecutor(max_workers=self.threads)
+        try:
+            for result in executor.map(verify_token, lease.items):
+                results[result['token']] = result
+                if lost.is_set() or self._stop.is_set():
+                    break
+        finally:
+            executor.shutdown(cancel_futures=True)
+            done.set()
+            heartbeat.join()
+
+        if lost.is_set():
+            return False
+        if self._stop.is_set() and len(results) < len(lease.items):
+            self.queue.release(lease, "工作进程停止")
+            return False
+        return self.queue.complete(lease, results)
+
+    def run(self, job_id: Optional[str] = None, exit_when_idle: bool = True,
+            idle_wait: float = 5.0) -> int:
+        """领取并处理分片直到队列为空或被停止
+
+        Args:
+            job_id: 只处理该任务
+            exit_when_idle: 没有可领取的分片时退出，否则等待新分片
+            idle_wait: 队列为空时的轮询间隔(秒)
+
+        Returns:
+            提交的分片数
+        """
+        completed = 0
+        logger.info(f"工作进程 {self.worker_id} 启动")
+        while not self._stop.is_set():
+            lease = self.queue.claim(self.worker_id, job_id)
+            if lease is None:
+                # 其他进程的租约过期后分片会重新可领取，任务结束前不退出
+                if exit_when_idle and (job_id is None or self.queue.status(job_id)['finished']):
+                    break
+                self._stop.wait(idle_wait)
+                continue
+            started = time.monotonic()
+            if self.process(lease):
+                completed += 1
+                logger.info(f"分片 {lease.job_id}/{lease.seq} 完成: "
+                            f"{len(lease.items)}项, {time.monotonic() - started:.1f}秒")
+        logger.info(f"工作进程 {self.worker_id} 退出，共完成{completed}个分片")
+        return completed
+
+
+def read_tokens(path: str) -> List[str]:
+    """读取token文件，支持JSON列表或每行一个"""
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read().strip()
+    if content.startswith('['):
+        return [t.strip() for t in json.loads(content) if t and t.strip()]
+    return [line.strip() for line in content.splitlines() if line.strip()]
+
+
+def apply_results(queue: JobQueue, job_id: str,
+                  groups_path: str = "config/groups.json",
+                  group_name: Optional[str] = None) -> Dict[str, int]:
+    """把任务结果合并到分组数据并保存
+
+    已保存账号按token匹配更新验证状态；有效的新账号只有指定group_name时
+    才会加入该分组(分组不存在时创建)，未被分组引用的账号不会被保存。
+    全部结果在内存中合并，最后只写入一次文件。
+
+    直接读写groups_path，图形界面打开同一文件时不要执行: 界面保存时会用
+    自己的内存数据覆盖合并结果。界面中应通过守护进程模式提交和合并任务。
+
+    Returns:
+        各状态的结果数
+    """
+    from core.group_manager import GroupManager, MERGE_UPDATE
+
+    manager = GroupManager(groups_path)
+    # 合并期间关闭自动写入，close时统一保存一次
+    manager.configure_autosave(True, None)
+    by_token = {r.token: r for r in manager.registry if r.token}
+    if group_name and group_name not in manager.get_group_names():
+        manager.create_group(group_name)
+    counts: Dict[str, int] = {}
+    valid = []
+    for result in queue.iter_results(job_id):
+        status = result.get('status')
+        counts[status] = counts.get(status, 0) + 1
+        record = by_token.get(result['token'])
+        if status == STATUS_VALID and result.get('username'):
+            data = {k: v for k, v in result.items() if k != 'error'}
+            if group_name:
+                valid.append(data)
+            else:
+                manager.registry.upsert(data)
+        elif record is not None:
+            record.update({'status': status, 'last_verified': result.get('last_verified')})
+    if valid:
+        manager.import_accounts({group_name: valid}, MERGE_UPDATE)
+    manager.mark_accounts_changed()
+    manager.close()
+    logger.info(f"任务 {job_id} 结果已合并: {counts}")
+    return counts
+
+
+def _spawn_workers(queue_dir: str, lease_seconds: float, job_id: str,
+                   processes: int, threads: int,
+                   proxies: str = '', record: Optional[str] = None,
+                   replay: Optional[str] = None,
+                   replay_speed: float = 1.0) -> List[subprocess.Popen]:
+    cmd = [sys.executable, '-m', 'core.distributed', '--queue', queue_dir,
+           '--lease', str(lease_seconds), '--proxies', proxies]
+    if replay:
+        cmd += ['--replay', replay, '--replay-speed', str(replay_speed)]
+    procs = []
+    for i in range(processes):
+        # 每个工作进程录制到各自的文件，结束后合并
+        extra = ['--record', f"{record}.{i}"] if record else []
+        procs.append(subprocess.Popen(
+            cmd + extra + ['worker', '--job', job_id, '--threads', str(threads)]))
+    return procs
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m core.distributed",
+                                     description="分布式批量验证token")
+    parser.add_argument('--queue', default='jobs', help="队列目录(可为共享目录)")
+    parser.add_argument('--lease', type=float, default=120, help="分片租约时长(秒)")
+    parser.add_argument('--proxies', default='', help="出口代理URL，逗号分隔")
+    parser.add_argument('--record', help="把API请求录制到该文件")
+    parser.add_argument('--replay', help="按该录制文件回放API请求，不访问网络")
+    parser.add_argument('--replay-speed', type=float, default=1.0,
+                        help="回放速度倍数，1为按原始耗时，0为不等待")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_submit = sub.add_parser('submit', help="创建验证任务")
+    p_submit.add_argument('tokens', help="token文件")
+    p_submit.add_argument('--shard-size', type=int, default=1000)
+
+    p_worker = sub.add_parser('worker', help="运行工作进程")
+    p_worker.add_argument('--job', help="只处理该任务")
+    p_worker.add_argument('--threads', type=int, default=8)
+    p_worker.add_argument('--wait', action='store_true', help="队列为空时继续等待新任务")
+
+    p_status = sub.add_parser('status', help="查看任务进度")
+    p_status.add_argument('job', nargs='?')
+
+    p_apply = sub.add_parser('apply', help="把结果合并到账号数据(图形界面打开该分组文件时不要执行)")
+    p_apply.add_argument('job')
+    p_apply.add_argument('--groups', default="config/groups.json")
+    p_apply.add_argument('--group', help="把有效的新账号加入该分组")
+
+    p_run = sub.add_parser('run', help="创建任务、启动本机工作进程并合并结果")
+    p_run.add_argument('tokens', help="token文件")
+    p_run.add_argument('--shard-size', type=int, default=1000)
+    p_run.add_argument('--processes', type=int, default=os.cpu_count() or 2)
+    p_run.add_argument('--threads', type=int, default=8)
+    p_run.add_argument('--groups', default="config/groups.json")
+    p_run.add_argument('--group', help="把有效的新账号加入该分组")
+
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    if args.record and args.replay:
+        parser.error("--record和--replay不能同时使用")
+    get_shared_proxy_pool().configure(proxies=parse_proxy_list(args.proxies))
+    # 只有工作进程发出API请求，run命令的录制和回放由各工作进程完成
+    transport = None
+    if args.command == 'worker' and args.replay:
+        transport = CassettePlayer(args.replay, speed=args.replay_speed)
+    elif args.command == 'worker' and args.record:
+        transport = CassetteRecorder(args.record)
+    install_transport(transport)
+    queue = JobQueue(args.queue, lease_seconds=args.lease)
+    try:
+        if args.command == 'submit':
+            print(queue.create_job(read_tokens(args.tokens), args.shard_size))
+        elif args.command == 'worker':
+            ShardWorker(queue, args.threads).run(args.job, exit_when_idle=not args.wait)
+        elif args.command == 'status':
+            jobs = [args.job] if args.job else [j['id'] for j in queue.jobs()]
+            for job_id in jobs:
+                print(job_id, json.dumps(queue.status(job_id), ensure_ascii=False))
+        elif args.command == 'apply':
+            print(json.dumps(apply_results(queue, args.job, args.groups, args.group), ensure_ascii=False))
+        elif args.command == 'run':
+            job_id = queue.create_job(read_tokens(args.tokens), args.shard_size)
+            started = time.monotonic()
+            procs = _spawn_workers(args.queue, args.lease, job_id,
+                                   args.processes, args.threads, args.proxies,
+                                   args.record, args.replay, args.replay_speed)
+            try:
+                while any(p.poll() is None for p in procs):
+                    time.sleep(2)
+                    status = queue.status(job_id)
+                    logger.info(f"任务 {job_id}: {status['results']}项完成, 分片 {status['shards']}")
+            except KeyboardInterrupt:
+                for p in procs:
+                    p.terminate()
+                raise
+            logger.info(f"任务 {job_id} 验证耗时 {time.monotonic() - started:.1f}秒")
+            if args.record:
+                parts = sorted(glob.glob(f"{glob.escape(args.record)}.[0-9]*"))
+                count = merge_cassettes(args.record, parts)
+                for part in parts:
+                    os.remove(part)
+                logger.info(f"录制已合并: {count}个请求 -> {args.record}")
+            print(json.dumps(apply_results(queue, job_id, args.groups, args.group), ensure_ascii=False))
+    finally:
+        queue.close()
+        if transport is not None:
+            install_transport(None)
+            transport.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,40 @@
+from typing import Optional, Tuple
+
+# 变更类型
+GROUP_CREATED = 'group_created'
+GROUP_DELETED = 'group_deleted'
+ACCOUNTS_ADDED = 'accounts_added'
+ACCOUNTS_REMOVED = 'accounts_removed'
+ACCOUNTS_MOVED = 'accounts_moved'
+ACCOUNTS_UPDATED = 'accounts_updated'  # 账号字段(名称、验证状态等)变化，成员不变
+GROUPS_RELOADED = 'groups_reloaded'    # 整体重新加载，订阅者需要全量刷新
+
+
+class GroupChangeEvent:
+    """分组数据的一次变更
+
+    Attributes:
+        kind: 变更类型，见上方常量
+        group: 受影响的分组；移动时为源分组，ACCOUNTS_UPDATED时为None
+        target: 移动的目标分组
+        usernames: 受影响的账号用户名
+    """
+
+    __slots__ = ('kind', 'group', 'target', 'usernames')
+
+    def __init__(self, kind: str, group: Optional[str] = None,
+                 target: Optional[str] = None, usernames: Tuple[str, ...] = ()):
+        self.kind = kind
+        self.group = group
+        self.target = target
+        self.usernames = tuple(usernames)
+
+    @property
+    def changes_groups(self) -> bool:
+        """是否改变了分组列表本身"""
+        return self.kind in (GROUP_CREATED, GROUP_DELETED, GROUPS_RELOADED)
+
+    def __repr__(self):
+        target = f" -> {self.target}" if self.target else ""
+        return (f"GroupChangeEvent({self.kind}, {self.group}{target}, "
+                f"{len(self.usernames)} accounts)")
@@ -0,0 +1,238 @@
+import csv
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from core.account_registry import FIELDS
+from core.group_manager import GroupManager, MERGE_UPDATE
+
+logger = logging.getLogger("GroupIO")
+
+FORMAT_JSONL = 'jsonl'
+FORMAT_JSON = 'json'
+FORMAT_CSV = 'csv'
+
+# 导出文件的列: 分组名 + 账号字段，同一账号在多个分组中时每个分组一行
+COLUMNS = ('group',) + FIELDS
+
+DEFAULT_CHUNK_SIZE = 5000
+
+
+def detect_format(path: str) -> str:
+    """按扩展名判断文件格式"""
+    suffix = Path(path).suffix.lower()
+    if suffix == '.csv':
+        return FORMAT_CSV
+    if suffix in ('.jsonl', '.ndjson'):
+        return FORMAT_JSONL
+    if suffix == '.json':
+        return FORMAT_JSON
+    raise ValueError(f"不支持的文件格式: {suffix or path}")
+
+
+def _report(progress_callback, percent: int, message: str):
+    if progress_callback is not None:
+        progress_callback.emit(percent, message)
+
+
+def _export_rows(manager: GroupManager, group_names: Iterable[str],
+                 include_tokens: bool, chunk_size: int) -> Iterator[List[dict]]:
+    """按块生成导出行，每次只持有一个分组的用户名快照"""
+    for group_name in group_names:
+        usernames = manager.get_usernames_in_group(group_name)
+        if not usernames:
+            # 空分组也导出一行，导入时可以重建
+            yield [{'group': group_name}]
+            continue
+        for start in range(0, len(usernames), chunk_size):
+            rows = []
+            for username in usernames[start:start + chunk_size]:
+                record = manager.registry.get(username)
+                if record is None:
+                    continue
+                row = record.to_dict()
+                if not include_tokens:
+                    row.pop('token', None)
+                row['group'] = group_name
+                rows.append(row)
+            yield rows
+
+
+def export_groups(manager: GroupManager, path: str, fmt: Optional[str] = None,
+                  group_names: Optional[List[str]] = None,
+                  include_tokens: bool = True,
+                  chunk_size: int = DEFAULT_CHUNK_SIZE,
+                  progress_callback=None) -> int:
+    """流式导出分组和账号
+
+    先写入临时文件，完成后原子替换目标文件。json格式写为行对象的数组。
+
+    Args:
+        manager: 分组管理器
+        path: 导出文件路径
+        fmt: jsonl、json或csv，默认按扩展名判断
+        group_names: 要导出的分组，默认全部
+        include_tokens: 是否导出token
+        chunk_size: 每块的行数
+        progress_callback: 进度信号(WorkerSignals.progress)
+
+    Returns:
+        导出的账号行数
+    """
+    fmt = fmt or detect_format(path)
+    names = group_names if group_names is not None else manager.get_group_names()
+    total = sum(max(1, manager.get_group_size(g)) for g in names) or 1
+    written = 0
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+        writer = None
+        if fmt == FORMAT_CSV:
+            writer = csv.DictWriter(f, fieldnames=COLUMNS, extrasaction='ignore')
+            writer.writeheader()
+        elif fmt == FORMAT_JSON:
+            f.write('[')
+        for rows in _export_rows(manager, names, include_tokens, chunk_size):
+            if writer is not None:
+                writer.writerows(rows)
+            elif fmt == FORMAT_JSON:
+                f.write(''.join((',\n' if written + i else '\n')
+                                + json.dumps(row, ensure_ascii=False)
+                                for i, row in enumerate(rows)))
+            else:
+                f.write(''.join(json.dumps(row, ensure_ascii=False) + '\n' for row in rows))
+            written += len(rows)
+            _report(progress_callback, min(99, written * 100 // total),
+                    f"已导出 {written}/{total}")
+        if fmt == FORMAT_JSON:
+            f.write('\n]\n')
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    _report(progress_callback, 100, f"导出完成，共{written}行")
+    logger.info(f"导出 {len(names)} 个分组到 {path}: {written}行")
+    return written
+
+
+class _ByteCounter:
+    """逐行解码二进制文件并记录已读取的字节数，用于计算进度"""
+
+    def __init__(self, f):
+        self.f = f
+        self.bytes_read = 0
+
+    def __iter__(self) -> Iterator[str]:
+        for line in self.f:
+            self.bytes_read += len(line)
+            yield line.decode('utf-8-sig' if self.bytes_read == len(line) else 'utf-8')
+
+
+def _normalize_row(row: dict) -> Tuple[Optional[str], Optional[dict]]:
+    """规范化一行: 空字符串视为缺失，时间戳转为浮点数
+
+    Returns:
+        (分组名, 账号字典)，该行没有账号时账号字典为None
+    """
+    group = (row.get('group') or '').strip() or None
+    account = {}
+    for key in FIELDS:
+        value = row.get(key)
+        if value is None or value == '':
+            continue
+        if key == 'last_verified':
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                continue
+        elif not isinstance(value, str):
+            value = str(value)
+        account[key] = value
+    if not account.get('username'):
+        return group, None
+    account['username'] = account['username'].lstrip('@')
+    return group, account
+
+
+def _read_rows(counter: _ByteCounter, fmt: str) -> Iterator[dict]:
+    if fmt == FORMAT_CSV:
+        yield from csv.DictReader(counter)
+        return
+    if fmt == FORMAT_JSON:
+        # JSON文档只能整体解析，不能按行流式读取
+        data = json.loads(''.join(counter))
+        if not isinstance(data, list):
+            raise ValueError("JSON文件应为账号行对象的数组")
+        yield from (row for row in data if isinstance(row, dict))
+        return
+    for line_no, line in enumerate(counter, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError:
+            logger.warning(f"第{line_no}行不是有效的JSON，已跳过")
+            continue
+        if isinstance(row, dict):
+            yield row
+
+
+def import_groups(manager: GroupManager, path: str, fmt: Optional[str] = None,
+                  policy: str = MERGE_UPDATE,
+                  default_group: Optional[str] = None,
+                  chunk_size: int = DEFAULT_CHUNK_SIZE,
+                  progress_callback=None) -> Dict[str, int]:
+    """流式导入分组和账号
+
+    文件按块读取，每块在GroupManager中批量合并一次，内存占用与文件大小无关
+    (json格式需要整体解析，大文件应使用jsonl或csv)。
+    同一账号在多个块中出现时只按第一次出现的数据更新，updated按账号计数。
+
+    Args:
+        manager: 分组管理器
+        path: 导入文件路径
+        fmt: jsonl、json或csv，默认按扩展名判断
+        policy: 已有账号的合并策略，见GroupManager.MERGE_*
+        default_group: 行中没有分组名时使用的分组
+        chunk_size: 每块的行数
+        progress_callback: 进度信号(WorkerSignals.progress)
+
+    Returns:
+        统计: rows、added、created、updated、skipped
+    """
+    fmt = fmt or detect_format(path)
+    size = os.path.getsize(path) or 1
+    stats = {'rows': 0, 'added': 0, 'created': 0, 'updated': 0, 'skipped': 0}
+    seen = set()
+
+    def flush(batch: Dict[str, List[dict]]):
+        result = manager.import_accounts(batch, policy, seen)
+        for key, value in result.items():
+            stats[key] += value
+
+    with open(path, 'rb') as f:
+        counter = _ByteCounter(f)
+        batch: Dict[str, List[dict]] = {}
+        pending = 0
+        for row in _read_rows(counter, fmt):
+            stats['rows'] += 1
+            group, account = _normalize_row(row)
+            group = group or default_group
+            if group is None:
+                stats['skipped'] += 1
+                continue
+            accounts = batch.setdefault(group, [])
+            if account is not None:
+                accounts.append(account)
+                pending += 1
+            if pending >= chunk_size:
+                flush(batch)
+                batch, pending = {}, 0
+                _report(progress_callback, min(99, counter.bytes_read * 100 // size),
+                        f"已导入 {stats['rows']}行")
+        if batch:
+            flush(batch)
+    _report(progress_callback, 100, f"导入完成，共{stats['rows']}行")
+    logger.info(f"从 {path} 导入: {stats}")
+    return stats
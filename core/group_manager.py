@@ -1,18 +1,82 @@
 import json
 import os
+import shutil
+import threading
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
 from PyQt5.QtWidgets import QMessageBox
+from core.account_index import AccountSearchIndex
+from core.account_registry import AccountRecord, AccountRegistry
+from core.group_events import (GroupChangeEvent, GROUP_CREATED, GROUP_DELETED,
+                               ACCOUNTS_ADDED, ACCOUNTS_REMOVED, ACCOUNTS_MOVED,
+                               ACCOUNTS_UPDATED, GROUPS_RELOADED)
+from core.persistence import WriteBehindSaver, atomic_write_json
+from core.snapshot import Snapshot, json_stat, write_snapshot
 import logging
 
 logger = logging.getLogger("GroupManager")
 
+GROUPS_FORMAT_VERSION = 2
+
+# 批量导入时已有账号的合并策略
+MERGE_UPDATE = 'update'    # 用导入数据中的非空字段更新已有账号
+MERGE_KEEP = 'keep'        # 保留已有账号数据，只加入分组
+MERGE_REPLACE = 'replace'  # 用导入数据整体替换已有账号
+MERGE_POLICIES = (MERGE_UPDATE, MERGE_KEEP, MERGE_REPLACE)
+
+# 每次保存JSON后延迟写入二进制快照的间隔(秒)
+SNAPSHOT_INTERVAL = 2.0
+
 class GroupManager:
-    def __init__(self, config_path: str = "config/groups.json"):
+    def __init__(self, config_path: str = "config/groups.json",
+                 registry: Optional[AccountRegistry] = None,
+                 background_load: bool = False):
+        """初始化分组管理器
+        
+        Args:
+            config_path: 分组文件路径，同目录下的.snap文件为其二进制快照
+            registry: 共享的账号表，默认新建
+            background_load: 快照有效时只打开快照并在后台线程中加载完整数据，
+                加载完成前分组名、分组大小和分组账号从快照读取，
+                其他操作等待加载完成；完成后发布GROUPS_RELOADED
+        """
         self.config_path = Path(config_path)
-        self.groups: Dict[str, List[dict]] = {}
+        self.snapshot_path = self.config_path.with_suffix('.snap')
+        self.registry = registry if registry is not None else AccountRegistry()
+        # 分组只保存用户名(有序集合)，账号数据统一保存在registry中
+        self.groups: Dict[str, Dict[str, None]] = {}
+        # 反向索引: 用户名 -> 所在分组(有序集合)
+        self._memberships: Dict[str, Dict[str, None]] = {}
+        # 分组中账号的搜索索引，随成员变化增量更新
+        self.index = AccountSearchIndex()
+        self._lock = threading.RLock()
+        self._subscribers: List[Callable[[GroupChangeEvent], None]] = []
+        # 默认每次变更立即写入，configure_autosave启用延迟写入
+        self.saver = WriteBehindSaver(self._write_groups, name="GroupsSaver")
+        # 快照总在JSON写入之后由后台线程生成，与JSON内容一致
+        self.snapshot_saver = WriteBehindSaver(self._write_snapshot, SNAPSHOT_INTERVAL,
+                                               enabled=True, name="SnapshotSaver")
+        self._snapshot_data: Optional[Tuple[dict, Tuple[int, int]]] = None
+        self._snapshot: Optional[Snapshot] = None
+        self._snapshot_lock = threading.Lock()
+        self._loaded = threading.Event()
+        self._loader: Optional[threading.Thread] = None
         self._ensure_config_exists()
-        self.load_groups()
+        
+        snapshot = (Snapshot.open_if_fresh(self.snapshot_path, self.config_path)
+                    if background_load else None)
+        if snapshot is not None:
+            self._snapshot = snapshot
+            self._loader = threading.Thread(target=self._load_from_snapshot,
+                                            name="GroupsLoader", daemon=True)
+            self._loader.start()
+        else:
+            # 同步加载时其他线程还拿不到本对象，直接视为已加载
+            self._loaded.set()
+            self.load_groups()
+            if background_load or not os.path.exists(self.snapshot_path):
+                # 快照缺失或已过期
+                self.snapshot_saver.mark_dirty()
     
     def _ensure_config_exists(self):
         """确保配置文件存在"""
@@ -29,40 +93,253 @@ class GroupManager:
         """加载分组数据"""
         try:
             if os.path.exists(self.config_path):
-                with open(self.config_path, 'r') as f:
-                    self.groups = json.load(f)
-                    # 确保数据格式正确
-                    if not isinstance(self.groups, dict):
-                        self.groups = {}
-                        self.save_groups()
+                with open(self.config_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                # 确保数据格式正确
+                if not isinstance(data, dict):
+                    self.groups = {}
+                    self.save_groups()
+                elif 'version' in data:
+                    self._load_data(data)
+                else:
+                    self._load_legacy(data)
+                self._rebuild_memberships()
         except json.JSONDecodeError:
             logger.warning("分组文件损坏，重置为空")
             self.groups = {}
+            self._rebuild_memberships()
             self.save_groups()
         except Exception as e:
             logger.error(f"加载分组失败: {str(e)}")
             raise
+        self._publish(GroupChangeEvent(GROUPS_RELOADED))
+    
+    def _load_from_snapshot(self):
+        """后台线程: 从快照解码全部账号和分组，失败时改为加载JSON"""
+        snapshot = self._snapshot
+        try:
+            accounts = list(snapshot.records())
+            usernames = [acc.get('username') for acc in accounts]
+            data = {'accounts': accounts,
+                    'groups': {name: [usernames[i] for i in members]
+                               for name, members in snapshot.groups()}}
+            with self._lock:
+                self._load_data(data)
+                self._rebuild_memberships()
+            logger.info(f"从快照加载 {len(accounts)} 个账号")
+        except Exception as e:
+            logger.warning(f"从快照加载失败，改为加载JSON: {str(e)}")
+            data = None
+        finally:
+            with self._snapshot_lock:
+                self._snapshot = None
+                snapshot.close()
+        
+        try:
+            if data is None:
+                self.load_groups()
+                self.snapshot_saver.mark_dirty()
+        finally:
+            self._loaded.set()
+        if data is not None:
+            self._publish(GroupChangeEvent(GROUPS_RELOADED))
+    
+    def _wait_loaded(self):
+        """等待后台加载完成，加载线程自身(如迁移旧格式时保存)不等待"""
+        if threading.current_thread() is not self._loader:
+            self._loaded.wait()
+    
+    @property
+    def loaded(self) -> bool:
+        """完整数据是否已加载"""
+        return self._loaded.is_set()
+    
+    def wait_until_loaded(self, timeout: Optional[float] = None) -> bool:
+        """等待后台加载完成
+        
+        Returns:
+            是否已加载完成
+        """
+        return self._loaded.wait(timeout)
+    
+    def subscribe(self, callback: Callable[[GroupChangeEvent], None]):
+        """订阅变更事件
+        
+        回调在执行变更的线程中、释放锁之后同步调用，
+        需要更新界面的订阅者应自行转发到GUI线程。
+        """
+        self._subscribers.append(callback)
+    
+    def unsubscribe(self, callback: Callable[[GroupChangeEvent], None]):
+        """取消订阅"""
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+    
+    def _publish(self, event: GroupChangeEvent):
+        """通知订阅者，单个订阅者出错不影响其他订阅者"""
+        for callback in list(self._subscribers):
+            try:
+                callback(event)
+            except Exception as e:
+                logger.error(f"处理分组变更事件出错: {str(e)}", exc_info=True)
+    
+    def _load_data(self, data: dict):
+        """加载当前格式: 账号表 + 分组到用户名列表的映射
+
+        账号表可能与其他组件共享，后台加载期间已登记或重新验证过的账号
+        比文件中的数据新，只补充其空字段。
+        """
+        self.registry.load(data.get('accounts', []), keep_newer=True)
+        self.groups = {}
+        for group_name, usernames in data.get('groups', {}).items():
+            members = {}
+            for username in usernames:
+                record = self.registry.get(username)
+                if record is not None:
+                    members[record.username] = None
+            self.groups[group_name] = members
+    
+    def _load_legacy(self, data: dict):
+        """迁移旧格式: 每个分组保存完整账号字典的副本
+
+        写入新格式前把原文件复制为groups.json.bak，旧版本程序无法读取新格式。
+        """
+        self.groups = {}
+        for group_name, accounts in data.items():
+            members = {}
+            for acc in accounts if isinstance(accounts, list) else []:
+                if isinstance(acc, dict) and acc.get('username'):
+                    record = self.registry.upsert(acc)
+                    members[record.username] = None
+            self.groups[group_name] = members
+        backup_path = self.config_path.with_name(self.config_path.name + '.bak')
+        shutil.copy2(self.config_path, backup_path)
+        self.save_groups()
+        logger.info(f"分组文件已迁移为新格式，原文件备份为 {backup_path.name}")
+    
+    def _rebuild_memberships(self):
+        """加载后重建反向索引和搜索索引"""
+        with self._lock:
+            self._memberships = {}
+            for group_name, members in self.groups.items():
+                for username in members:
+                    self._memberships.setdefault(username, {})[group_name] = None
+            self.index.load(
+                (username, self.registry.get(username).name)
+                for username in self._memberships)
+    
+    def _add_member(self, group_name: str, record: AccountRecord,
+                    reindex: bool = True):
+        """把账号加入分组并更新索引(需持有锁)
+        
+        reindex为False时由调用方随后批量更新搜索索引。
+        """
+        self.groups[group_name][record.username] = None
+        self._memberships.setdefault(record.username, {})[group_name] = None
+        if reindex:
+            self.index.add(record.username, record.name)
+    
+    def _remove_member(self, group_name: str, username: str):
+        """把账号移出分组并更新索引(需持有锁)"""
+        del self.groups[group_name][username]
+        groups = self._memberships.get(username)
+        if groups is not None:
+            groups.pop(group_name, None)
+            if not groups:
+                # 不再属于任何分组，从搜索结果中去掉
+                del self._memberships[username]
+                self.index.remove(username)
+    
+    def _to_data(self) -> dict:
+        """序列化为保存格式，只保存被分组引用的账号"""
+        referenced = {}
+        for members in self.groups.values():
+            referenced.update(members)
+        return {
+            'version': GROUPS_FORMAT_VERSION,
+            'accounts': self.registry.to_list(referenced),
+            'groups': {name: list(members) for name, members in self.groups.items()}
+        }
     
     def save_groups(self):
-        """保存分组数据"""
+        """立即保存分组数据"""
         try:
-            with open(self.config_path, 'w') as f:
-                json.dump(self.groups, f, indent=4)
+            self.saver.save_now()
         except Exception as e:
             logger.error(f"保存分组失败: {str(e)}")
             raise
     
+    def _write_groups(self):
+        """将当前分组数据原子写入文件(可在后台线程中调用)"""
+        self._wait_loaded()
+        with self._lock:
+            data = self._to_data()
+        atomic_write_json(self.config_path, data, ensure_ascii=False,
+                          separators=(',', ':'))
+        self._snapshot_data = (data, json_stat(self.config_path))
+        self.snapshot_saver.mark_dirty()
+    
+    def _write_snapshot(self):
+        """把最近一次写入JSON的数据写成快照(在SnapshotSaver线程中调用)
+        
+        没有待写数据时(如快照缺失或已过期)按当前内存数据生成，
+        有未保存的变更时跳过，等下次保存JSON后再写。
+        """
+        pending, self._snapshot_data = self._snapshot_data, None
+        if pending is None:
+            self._wait_loaded()
+            with self._lock:
+                if self.saver.dirty:
+                    return
+                pending = (self._to_data(), json_stat(self.config_path))
+        write_snapshot(self.snapshot_path, *pending)
+    
+    def _mark_dirty(self):
+        """标记分组数据已变更，按自动保存设置延迟或立即写入"""
+        self.saver.mark_dirty()
+    
+    def mark_accounts_changed(self, usernames: Optional[Iterable[str]] = None):
+        """账号记录被外部更新(如验证状态)后调用，按自动保存设置写入
+        
+        Args:
+            usernames: 被更新的账号，给出时刷新其搜索索引并发布ACCOUNTS_UPDATED
+        """
+        self.saver.mark_dirty()
+        if usernames is not None:
+            self.notify_accounts_updated(usernames)
+    
+    def configure_autosave(self, enabled: bool, interval: Optional[float]):
+        """配置自动保存
+        
+        Args:
+            enabled: 为True时变更由后台线程按间隔合并写入，否则每次变更立即写入
+            interval: 写入间隔(秒)，为None时不自动写入，只在save_groups或close时写入
+        """
+        self.saver.configure(enabled, interval)
+    
+    def close(self):
+        """停止后台写入并保存未写入的变更"""
+        self.saver.close()
+        try:
+            self.snapshot_saver.close()
+        except Exception as e:
+            # 快照只用于加速启动，写入失败下次从JSON加载
+            logger.warning(f"写入快照失败: {str(e)}")
+    
     def create_group(self, group_name: str) -> (bool, str):
         """创建新分组"""
         try:
             if not group_name.strip():
                 return False, "分组名不能为空"
-                
-            if group_name in self.groups:
-                return False, "分组已存在"
-                
-            self.groups[group_name] = []
-            self.save_groups()
+            
+            self._wait_loaded()
+            with self._lock:
+                if group_name in self.groups:
+                    return False, "分组已存在"
+                    
+                self.groups[group_name] = {}
+            self._mark_dirty()
+            self._publish(GroupChangeEvent(GROUP_CREATED, group_name))
             logger.info(f"创建分组: {group_name}")
             return True, f"分组 '{group_name}' 创建成功"
         except Exception as e:
@@ -72,31 +349,48 @@ class GroupManager:
     def delete_group(self, group_name: str) -> (bool, str):
         """删除分组"""
         try:
-            if group_name not in self.groups:
-                return False, "分组不存在"
-                
-            del self.groups[group_name]
-            self.save_groups()
+            self._wait_loaded()
+            with self._lock:
+                if group_name not in self.groups:
+                    return False, "分组不存在"
+                    
+                members = list(self.groups[group_name])
+                for username in members:
+                    self._remove_member(group_name, username)
+                del self.groups[group_name]
+            self._mark_dirty()
+            self._publish(GroupChangeEvent(GROUP_DELETED, group_name, usernames=members))
             logger.info(f"删除分组: {group_name}")
             return True, f"分组 '{group_name}' 已删除"
         except Exception as e:
             logger.error(f"删除分组失败: {str(e)}")
             return False, f"删除分组失败: {str(e)}"
     
-    def add_account_to_group(self, group_name: str, account_info: dict) -> (bool, str):
-        """添加账号到分组"""
+    def add_account_to_group(self, group_name: str, account_info) -> (bool, str):
+        """添加账号到分组
+        
+        Args:
+            group_name: 分组名
+            account_info: 账号信息字典或AccountRecord
+        """
         try:
-            if group_name not in self.groups:
-                return False, "分组不存在"
+            self._wait_loaded()
+            with self._lock:
+                if group_name not in self.groups:
+                    return False, "分组不存在"
                 
-            # 检查账号是否已在组中
-            for acc in self.groups[group_name]:
-                if acc.get('username') == account_info.get('username'):
+                username = (account_info.username if isinstance(account_info, AccountRecord)
+                            else account_info.get('username'))
+                # 检查账号是否已在组中
+                if username in self.groups[group_name]:
                     return False, "账号已在组中"
-                    
-            self.groups[group_name].append(account_info)
-            self.save_groups()
-            logger.info(f"添加账号到分组 {group_name}: {account_info.get('username')}")
+                        
+                record = self.registry.upsert(account_info)
+                self._add_member(group_name, record)
+            self._mark_dirty()
+            self._publish(GroupChangeEvent(ACCOUNTS_ADDED, group_name,
+                                           usernames=(record.username,)))
+            logger.info(f"添加账号到分组 {group_name}: {record.username}")
             return True, f"账号已添加到 '{group_name}'"
         except Exception as e:
             logger.error(f"添加账号到分组失败: {str(e)}")
@@ -105,44 +399,213 @@ class GroupManager:
     def move_account(self, from_group: str, to_group: str, username: str) -> (bool, str):
         """移动账号到其他分组"""
         try:
-            if from_group not in self.groups:
-                return False, "源分组不存在"
-                
-            if to_group not in self.groups:
-                return False, "目标分组不存在"
-                
-            # 查找账号
-            account = None
-            for acc in self.groups[from_group]:
-                if acc.get('username') == username:
-                    account = acc
-                    break
+            self._wait_loaded()
+            with self._lock:
+                if from_group not in self.groups:
+                    return False, "源分组不存在"
                     
-            if not account:
-                return False, "账号不在源分组中"
-                
-            # 从原分组移除
-            self.groups[from_group] = [acc for acc in self.groups[from_group] 
-                                     if acc.get('username') != username]
-            
-            # 添加到新分组
-            self.groups[to_group].append(account)
-            self.save_groups()
+                if to_group not in self.groups:
+                    return False, "目标分组不存在"
+                    
+                # 查找账号
+                if username not in self.groups[from_group]:
+                    return False, "账号不在源分组中"
+                    
+                if from_group == to_group:
+                    return True, "账号已在该分组中"
+                # 先加入新分组再从原分组移除，避免账号短暂从索引中消失
+                self._add_member(to_group, self.registry.get(username))
+                self._remove_member(from_group, username)
+            self._mark_dirty()
+            self._publish(GroupChangeEvent(ACCOUNTS_MOVED, from_group, to_group,
+                                           usernames=(username,)))
             logger.info(f"移动账号 {username} 从 {from_group} 到 {to_group}")
             return True, f"账号已从 '{from_group}' 移动到 '{to_group}'"
         except Exception as e:
             logger.error(f"移动账号失败: {str(e)}")
             return False, f"移动账号失败: {str(e)}"
     
+    def remove_account(self, group_name: str, username: str) -> (bool, str):
+        """从分组中移除账号"""
+        try:
+            self._wait_loaded()
+            with self._lock:
+                if group_name not in self.groups:
+                    return False, "分组不存在"
+                if username not in self.groups[group_name]:
+                    return False, "账号不在分组中"
+                self._remove_member(group_name, username)
+            self._mark_dirty()
+            self._publish(GroupChangeEvent(ACCOUNTS_REMOVED, group_name,
+                                           usernames=(username,)))
+            logger.info(f"从分组 {group_name} 移除账号 {username}")
+            return True, f"已从 '{group_name}' 移除账号"
+        except Exception as e:
+            logger.error(f"移除账号失败: {str(e)}")
+            return False, f"移除账号失败: {str(e)}"
+    
+    def import_accounts(self, batch: Dict[str, List[dict]],
+                        policy: str = MERGE_UPDATE,
+                        seen: Optional[Set[str]] = None) -> Dict[str, int]:
+        """批量导入账号到分组，不存在的分组会被创建
+        
+        整批在一次加锁中合并，只触发一次保存，每个分组只发布一个事件。
+        同一账号多次出现时只按第一次出现的数据创建或更新。
+        
+        Args:
+            batch: 分组名 -> 账号字典列表
+            policy: 已有账号的合并策略，见MERGE_*
+            seen: 本次导入中已创建或更新的用户名，分多批导入时传入同一个集合，
+                这些账号在后续批次中不再更新，也不重复计数
+            
+        Returns:
+            统计: added(新加入分组的成员数)、created(新建账号数)、updated(更新的已有账号数)
+        """
+        if policy not in MERGE_POLICIES:
+            raise ValueError(f"未知的合并策略: {policy}")
+        stats = {'added': 0, 'created': 0, 'updated': 0}
+        events = []
+        updated = {}
+        seen = set() if seen is None else seen
+        reindex = {}
+        self._wait_loaded()
+        with self._lock:
+            for group_name, accounts in batch.items():
+                if group_name not in self.groups:
+                    self.groups[group_name] = {}
+                    events.append(GroupChangeEvent(GROUP_CREATED, group_name))
+                members = self.groups[group_name]
+                added = []
+                for data in accounts:
+                    username = data.get('username')
+                    if not username:
+                        continue
+                    record = self.registry.get(username)
+                    if record is None:
+                        record = self.registry.upsert(data)
+                        stats['created'] += 1
+                        seen.add(username)
+                    elif policy != MERGE_KEEP and username not in seen:
+                        if policy == MERGE_REPLACE:
+                            record.replace(data)
+                        else:
+                            record.update(data)
+                        updated[username] = None
+                        seen.add(username)
+                        if username in self._memberships:
+                            reindex[record.username] = record
+                    if record.username not in members:
+                        self._add_member(group_name, record, reindex=False)
+                        reindex[record.username] = record
+                        added.append(record.username)
+                if added:
+                    stats['added'] += len(added)
+                    events.append(GroupChangeEvent(ACCOUNTS_ADDED, group_name,
+                                                   usernames=added))
+            stats['updated'] = len(updated)
+            self.index.add_many((r.username, r.name) for r in reindex.values())
+        if events or updated:
+            self._mark_dirty()
+        for event in events:
+            self._publish(event)
+        if updated:
+            self._publish(GroupChangeEvent(ACCOUNTS_UPDATED, usernames=list(updated)))
+        return stats
+    
     def get_group_names(self) -> List[str]:
         """获取所有分组名"""
+        with self._snapshot_lock:
+            if self._snapshot is not None:
+                return self._snapshot.group_names()
         return list(self.groups.keys())
     
-    def get_accounts_in_group(self, group_name: str) -> List[dict]:
-        """获取分组中的账号"""
-        return self.groups.get(group_name, [])
+    def get_group_size(self, group_name: str) -> int:
+        """分组中的账号数"""
+        with self._snapshot_lock:
+            if self._snapshot is not None:
+                return self._snapshot.group_size(group_name)
+        return len(self.groups.get(group_name, ()))
+    
+    def get_usernames_in_group(self, group_name: str) -> List[str]:
+        """分组中账号用户名的快照"""
+        with self._snapshot_lock:
+            if self._snapshot is not None:
+                return [acc['username'] for acc in self._snapshot.group_records(group_name)]
+        with self._lock:
+            return list(self.groups.get(group_name, ()))
+    
+    def get_accounts_in_group(self, group_name: str) -> List[AccountRecord]:
+        """获取分组中的账号
+        
+        后台加载完成前返回从快照解码的副本: 与账号表中的记录无关，
+        修改不会保存，之后的更新也不会反映到副本上。调用方不应长期持有，
+        收到GROUPS_RELOADED后应重新获取(或先调用wait_until_loaded)。
+        """
+        with self._snapshot_lock:
+            if self._snapshot is not None:
+                return [AccountRecord.from_dict(acc)
+                        for acc in self._snapshot.group_records(group_name)]
+        return [self.registry.get(username)
+                for username in self.groups.get(group_name, {})]
     
     def find_account_groups(self, username: str) -> List[str]:
         """查找账号所在的所有分组"""
-        return [group for group, accounts in self.groups.items() 
-               if any(acc.get('username') == username for acc in accounts)]
\ No newline at end of file
+        self._wait_loaded()
+        return list(self._memberships.get(username, ()))
+    
+    def search_accounts(self, query: str,
+                        limit: int = 50) -> List[Tuple[AccountRecord, List[str]]]:
+        """在所有分组中搜索账号
+        
+        Args:
+            query: 用户名或名称的前缀或子串
+            limit: 最多返回的结果数
+            
+        Returns:
+            按匹配程度排序的(账号记录, 所在分组列表)
+        """
+        results = []
+        self._wait_loaded()
+        for username in self.index.search(query, limit):
+            record = self.registry.get(username)
+            if record is not None:
+                results.append((record, self.find_account_groups(username)))
+        return results
+    
+    def notify_accounts_updated(self, usernames: Iterable[str]):
+        """账号被外部更新(如后台验证)后刷新搜索索引并发布ACCOUNTS_UPDATED，不触发保存"""
+        changed = []
+        for username in usernames:
+            record = self.registry.get(username)
+            if record is not None and username in self._memberships:
+                self.index.add(record.username, record.name)
+                changed.append(username)
+        if changed:
+            self._publish(GroupChangeEvent(ACCOUNTS_UPDATED, usernames=changed))
+    
+    def get_since_id(self, username: str) -> Optional[str]:
+        """获取账号时间线的同步高水位(已同步的最新推文ID)"""
+        self._wait_loaded()
+        record = self.registry.get(username)
+        return record.since_id if record else None
+    
+    def update_since_ids(self, marks: Dict[str, str]) -> int:
+        """批量更新账号的同步高水位
+        
+        Args:
+            marks: 用户名到最新推文ID的映射
+            
+        Returns:
+            更新的账号记录数
+        """
+        updated = 0
+        self._wait_loaded()
+        with self._lock:
+            for username, since_id in marks.items():
+                record = self.registry.get(username)
+                if record is not None and since_id and since_id != record.since_id:
+                    record.since_id = since_id
+                    updated += 1
+        if updated:
+            self._mark_dirty()
+        return updated
\ No newline at end of file
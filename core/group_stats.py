@@ -0,0 +1,220 @@
+import bisect
+import itertools
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from core.account_registry import STATUS_VALID, STATUS_INVALID, STATUS_ERROR
+from core.group_events import (GroupChangeEvent, GROUP_CREATED, GROUP_DELETED,
+                               ACCOUNTS_ADDED, ACCOUNTS_REMOVED, ACCOUNTS_MOVED,
+                               ACCOUNTS_UPDATED, GROUPS_RELOADED)
+
+STATUS_UNVERIFIED = 'unverified'
+STATUSES = (STATUS_VALID, STATUS_INVALID, STATUS_ERROR, STATUS_UNVERIFIED)
+
+# 账号对统计有影响的字段: (状态, 最近验证时间)
+_State = Tuple[str, Optional[float]]
+
+
+class _Aggregate:
+    """一组账号的汇总: 数量、各状态数量和有序的验证时间"""
+
+    __slots__ = ('count', 'statuses', 'times')
+
+    def __init__(self):
+        self.count = 0
+        self.statuses = dict.fromkeys(STATUSES, 0)
+        self.times: List[float] = []
+
+    def add(self, state: _State, keep_sorted: bool = True):
+        self.count += 1
+        self.statuses[state[0]] += 1
+        if state[1] is not None:
+            if keep_sorted:
+                bisect.insort(self.times, state[1])
+            else:
+                self.times.append(state[1])
+
+    def remove(self, state: _State):
+        self.count -= 1
+        self.statuses[state[0]] -= 1
+        if state[1] is not None:
+            i = bisect.bisect_left(self.times, state[1])
+            if i < len(self.times) and self.times[i] == state[1]:
+                del self.times[i]
+
+    def summary(self, now: float, stale_after: float) -> Dict:
+        # 从未验证或验证时间早于阈值的都算过期
+        fresh = len(self.times) - bisect.bisect_left(self.times, now - stale_after)
+        times = self.times
+        return {
+            'count': self.count,
+            **self.statuses,
+            'stale': self.count - fresh,
+            'newest_age': now - times[-1] if times else None,
+            'median_age': now - times[len(times) // 2] if times else None,
+            'oldest_age': now - times[0] if times else None,
+        }
+
+
+def _state_of(record) -> _State:
+    if record is None:
+        return STATUS_UNVERIFIED, None
+    return record.status or STATUS_UNVERIFIED, record.last_verified
+
+
+class GroupStats:
+    """增量维护的分组统计
+
+    订阅GroupManager的变更事件，每个事件只调整受影响账号的计数，
+    只有整体重新加载时才扫描全部账号。查询的耗时只与分组数有关，与账号数无关。
+    """
+
+    def __init__(self, manager, stale_after: float = 24 * 3600):
+        """初始化统计
+
+        Args:
+            manager: GroupManager
+            stale_after: 最近验证早于该时长(秒)的账号视为过期
+        """
+        self.manager = manager
+        self.stale_after = stale_after
+        self._lock = threading.Lock()
+        self._groups: Dict[str, _Aggregate] = {}
+        self._overall = _Aggregate()
+        self._states: Dict[str, _State] = {}
+        # 本对象看到的成员关系，只随事件变化，不依赖GroupManager的当前状态
+        self._member_of: Dict[str, Set[str]] = {}
+        self._overlap: Dict[Tuple[str, str], int] = {}
+        manager.subscribe(self._on_event)
+        if manager.loaded:
+            self.rebuild()
+
+    def rebuild(self):
+        """扫描全部分组重建统计"""
+        registry = self.manager.registry
+        member_of: Dict[str, Set[str]] = {}
+        for group_name in self.manager.get_group_names():
+            for username in self.manager.get_usernames_in_group(group_name):
+                member_of.setdefault(username, set()).add(group_name)
+        with self._lock:
+            self._groups = {name: _Aggregate() for name in self.manager.get_group_names()}
+            self._overall = _Aggregate()
+            self._states = {}
+            self._member_of = {}
+            self._overlap = {}
+            for username, groups in member_of.items():
+                state = _state_of(registry.get(username))
+                self._states[username] = state
+                self._overall.add(state, keep_sorted=False)
+                self._member_of[username] = groups
+                for group_name in groups:
+                    self._groups[group_name].add(state, keep_sorted=False)
+                for pair in itertools.combinations(sorted(groups), 2):
+                    self._overlap[pair] = self._overlap.get(pair, 0) + 1
+            # 全量重建时先追加再统一排序，避免逐个插入
+            for aggregate in itertools.chain(self._groups.values(), (self._overall,)):
+                aggregate.times.sort()
+
+    def _on_event(self, event: GroupChangeEvent):
+        if event.kind == GROUPS_RELOADED:
+            self.rebuild()
+            return
+        registry = self.manager.registry
+        with self._lock:
+            if event.kind == GROUP_CREATED:
+                self._groups.setdefault(event.group, _Aggregate())
+            elif event.kind == GROUP_DELETED:
+                for username in event.usernames:
+                    self._leave(username, event.group)
+                self._groups.pop(event.group, None)
+            elif event.kind == ACCOUNTS_ADDED:
+                for username in event.usernames:
+                    self._join(username, event.group, registry.get(username))
+            elif event.kind == ACCOUNTS_REMOVED:
+                for username in event.usernames:
+                    self._leave(username, event.group)
+            elif event.kind == ACCOUNTS_MOVED:
+                for username in event.usernames:
+                    self._join(username, event.target, registry.get(username))
+                    self._leave(username, event.group)
+            elif event.kind == ACCOUNTS_UPDATED:
+                for username in event.usernames:
+                    self._update(username, _state_of(registry.get(username)))
+
+    def _join(self, username: str, group_name: str, record):
+        """账号加入分组(需持有锁)"""
+        groups = self._member_of.setdefault(username, set())
+        aggregate = self._groups.setdefault(group_name, _Aggregate())
+        if group_name in groups:
+            return
+        state = self._states.get(username)
+        if state is None:
+            state = self._states[username] = _state_of(record)
+            self._overall.add(state)
+        for other in groups:
+            pair = tuple(sorted((group_name, other)))
+            self._overlap[pair] = self._overlap.get(pair, 0) + 1
+        groups.add(group_name)
+        aggregate.add(state)
+
+    def _leave(self, username: str, group_name: str):
+        """账号离开分组(需持有锁)"""
+        groups = self._member_of.get(username)
+        if not groups or group_name not in groups:
+            return
+        groups.discard(group_name)
+        state = self._states[username]
+        aggregate = self._groups.get(group_name)
+        if aggregate is not None:
+            aggregate.remove(state)
+        for other in groups:
+            pair = tuple(sorted((group_name, other)))
+            count = self._overlap.get(pair, 0) - 1
+            if count > 0:
+                self._overlap[pair] = count
+            else:
+                self._overlap.pop(pair, None)
+        if not groups:
+            del self._member_of[username]
+            del self._states[username]
+            self._overall.remove(state)
+
+    def _update(self, username: str, state: _State):
+        """账号状态或验证时间变化(需持有锁)"""
+        old = self._states.get(username)
+        if old is None or old == state:
+            return
+        self._states[username] = state
+        for aggregate in itertools.chain(
+                (self._groups[g] for g in self._member_of.get(username, ()) if g in self._groups),
+                (self._overall,)):
+            aggregate.remove(old)
+            aggregate.add(state)
+
+    def summary(self, group_name: Optional[str] = None,
+                now: Optional[float] = None) -> Dict:
+        """分组或全部账号(group_name为None，同一账号只计一次)的统计
+
+        Returns:
+            count、各状态数量(valid/invalid/error/unverified)、stale，
+            以及最近、中位和最早一次验证距今的秒数(没有验证记录时为None)
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            aggregate = self._overall if group_name is None else self._groups.get(group_name)
+            if aggregate is None:
+                return _Aggregate().summary(now, self.stale_after)
+            return aggregate.summary(now, self.stale_after)
+
+    def all_summaries(self) -> Dict[str, Dict]:
+        """各分组的统计"""
+        now = time.time()
+        with self._lock:
+            return {name: aggregate.summary(now, self.stale_after)
+                    for name, aggregate in self._groups.items()}
+
+    def overlap(self) -> Dict[Tuple[str, str], int]:
+        """同时属于两个分组的账号数，只包含非零的分组对"""
+        with self._lock:
+            return dict(self._overlap)
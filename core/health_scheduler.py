@@ -0,0 +1,202 @@
+from PyQt5.QtCore import QObject, pyqtSignal
+import heapq
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from core.account_registry import (AccountRecord, AccountRegistry,
+                                   STATUS_VALID, STATUS_INVALID, STATUS_ERROR)
+from core.concurrency import (TokenBucket, classify_error, is_auth_rejected,
+                              OUTCOME_CIRCUIT_OPEN)
+from core.twitter_api import TwitterAPI, TwitterAPIError
+
+logger = logging.getLogger("HealthScheduler")
+
+# 风险排序: 从未验证 < 上次出错 < 有效 < 无效
+_RISK_RANK = {None: 0, STATUS_ERROR: 1, STATUS_VALID: 2, STATUS_INVALID: 3}
+
+# 上次出错(网络或限流)的账号在该时间后重试，不必等待整个周期
+ERROR_RETRY_SECONDS = 900
+
+# 无效token很少恢复，检查间隔为正常周期的倍数
+INVALID_PERIOD_FACTOR = 4
+
+
+class HealthCheckScheduler(QObject):
+    """后台账号健康检查调度器
+
+    在配置的周期内把所有已保存账号的重新验证均匀分散开，
+    优先检查从未验证、上次出错和验证时间最久的账号，
+    并通过令牌桶把请求速率限制在预算之内。验证结果直接更新账号记录。
+
+    只检查账号登记表中的账号(分组中保存的账号和本次运行中登录过的账号)。
+    tokens.json只保存token而没有用户名等账号信息，仅存在于其中的token
+    不会被定期检查，需要通过批量登录重新验证。
+    """
+
+    account_checked = pyqtSignal(object)  # 已检查的AccountRecord
+    cycle_progress = pyqtSignal(int, int)  # (本周期已检查数, 账号总数)
+
+    def __init__(self, registry: AccountRegistry, period: float = 24 * 3600,
+                 rate_per_minute: float = 30,
+                 on_update: Optional[Callable[[], None]] = None):
+        """初始化调度器
+
+        Args:
+            registry: 账号登记表
+            period: 每个账号的检查周期(秒)
+            rate_per_minute: 每分钟最多发出的验证请求数
+            on_update: 账号状态更新后的回调，用于标记数据需要保存
+        """
+        super().__init__()
+        self.registry = registry
+        self.period = period
+        self.bucket = TokenBucket(rate_per_minute / 60.0, capacity=1)
+        self.on_update = on_update
+
+        self._heap: List[Tuple[float, int, str]] = []
+        self._heap_size = -1
+        self._checked_in_cycle = 0
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def configure(self, period: float, rate_per_minute: float):
+        """调整检查周期和速率预算，立即生效"""
+        self.period = period
+        self.bucket.set_rate(rate_per_minute / 60.0)
+        # 到期时间依赖周期，下次取账号时重建队列
+        self._heap_size = -1
+        self._wakeup.set()
+        logger.info(f"健康检查配置更新: 周期 {period / 3600:.1f} 小时, 速率 {rate_per_minute}/分钟")
+
+    def start(self):
+        """启动后台检查线程"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="HealthCheck", daemon=True)
+        self._thread.start()
+        logger.info("健康检查调度器已启动")
+
+    def stop(self):
+        """停止后台检查线程"""
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _priority(self, record: AccountRecord) -> Tuple[float, int, str]:
+        """队列排序键: (到期时间, 风险等级, 用户名)"""
+        last = record.last_verified or 0.0
+        if record.status is None or not last:
+            due_at = 0.0
+        elif record.status == STATUS_ERROR:
+            due_at = last + min(self.period, ERROR_RETRY_SECONDS)
+        elif record.status == STATUS_INVALID:
+            due_at = last + self.period * INVALID_PERIOD_FACTOR
+        else:
+            due_at = last + self.period
+        return (due_at, _RISK_RANK.get(record.status, 0), record.username)
+
+    def _rebuild_heap(self):
+        """按风险和验证时间重建检查队列"""
+        self._heap = [self._priority(r) for r in self.registry if r.token]
+        heapq.heapify(self._heap)
+        self._heap_size = len(self.registry)
+        self._checked_in_cycle = 0
+
+    def _next_due(self) -> Tuple[Optional[AccountRecord], float]:
+        """取下一个到期的账号
+
+        Returns:
+            (账号记录, 0) 或 (None, 距下一个账号到期的秒数)
+        """
+        if not self._heap or self._heap_size != len(self.registry):
+            self._rebuild_heap()
+        while self._heap:
+            entry = self._heap[0]
+            record = self.registry.get(entry[2])
+            # 记录已删除或已被其他途径更新，丢弃过期的队列项
+            if record is None or not record.token or self._priority(record) != entry:
+                heapq.heappop(self._heap)
+                if record is not None and record.token:
+                    heapq.heappush(self._heap, self._priority(record))
+                continue
+            due_at = entry[0]
+            now = time.time()
+            if due_at <= now:
+                heapq.heappop(self._heap)
+                return record, 0.0
+            return None, due_at - now
+        return None, self.period
+
+    def _spacing(self) -> float:
+        """相邻两次检查的间隔，使一个周期内的检查均匀分布"""
+        # 检查后的账号会重新入队，队列长度即为账号数
+        return self.period / max(1, len(self._heap))
+
+    def _run(self):
+        """后台检查循环"""
+        while not self._stop.is_set():
+            record, wait = self._next_due()
+            if record is None:
+                self._wakeup.wait(min(wait, 60))
+                self._wakeup.clear()
+                continue
+
+            if not self.bucket.acquire(self._stop):
+                break
+            self.check_account(record)
+            self._checked_in_cycle += 1
+            self.cycle_progress.emit(self._checked_in_cycle, len(self._heap))
+
+            # 均匀分散: 检查之间至少间隔 周期/账号数
+            self._wakeup.wait(self._spacing())
+            self._wakeup.clear()
+
+    def check_account(self, record: AccountRecord) -> str:
+        """验证单个账号并更新其状态
+
+        Returns:
+            新的账号状态
+        """
+        try:
+            data = TwitterAPI(record.token).verify_credentials().get('data', {})
+            status = STATUS_VALID
+            record.update({'name': data.get('name'), 'id': data.get('id'),
+                           'profile_image_url': data.get('profile_image_url')})
+        except TwitterAPIError as e:
+            outcome = classify_error(e)
+            if outcome == OUTCOME_CIRCUIT_OPEN:
+                # 请求未发出，等待熔断结束，账号状态保持不变
+                self._heap_push(record)
+                self._stop.wait(max(getattr(e, 'retry_after', 0.0), 1.0))
+                return record.status
+            # 只有服务端拒绝凭证(401/403)才判定为无效，其他错误只标记为出错
+            status = STATUS_INVALID if is_auth_rejected(e) else STATUS_ERROR
+            logger.info(f"账号 @{record.username} 验证失败({outcome}): {str(e)}")
+        except Exception as e:
+            status = STATUS_ERROR
+            logger.error(f"账号 @{record.username} 验证出错: {str(e)}")
+
+        record.status = status
+        record.last_verified = time.time()
+        self._heap_push(record)
+        if self.on_update:
+            self.on_update()
+        self.account_checked.emit(record)
+        return status
+
+    def _heap_push(self, record: AccountRecord):
+        heapq.heappush(self._heap, self._priority(record))
+
+    def stats(self) -> Dict[str, int]:
+        """各状态的账号数"""
+        counts: Dict[str, int] = {}
+        for record in self.registry:
+            key = record.status or 'unchecked'
+            counts[key] = counts.get(key, 0) + 1
+        return counts
@@ -0,0 +1,72 @@
+import bisect
+import threading
+from collections import deque
+from typing import Optional
+
+
+class HedgePolicy:
+    """对冲请求策略
+
+    记录最近请求的延迟，请求耗时超过滑动p95仍未返回时允许再发一份副本。
+    副本数受预算限制: 每个请求为预算补充budget个令牌(上限burst)，
+    每次对冲消耗1个，长期来看对冲请求不超过总请求数的budget比例，
+    避免在服务变慢时成倍放大请求量而触发限流。
+    """
+
+    def __init__(self, budget: float = 0.05, burst: float = 10,
+                 percentile: float = 0.95, window: int = 200,
+                 min_samples: int = 20):
+        """初始化对冲策略
+
+        Args:
+            budget: 对冲请求占总请求数的比例上限
+            burst: 预算可累积的最大对冲次数
+            percentile: 触发对冲的延迟分位数
+            window: 计算分位数使用的最近样本数
+            min_samples: 样本不足时不对冲
+        """
+        self.budget = budget
+        self.burst = burst
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self._lock = threading.Lock()
+        self._samples = deque(maxlen=window)
+        self._sorted = []
+        self._tokens = 0.0
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    def record(self, latency: float):
+        """记录一次成功请求的延迟"""
+        with self._lock:
+            if len(self._samples) == self._samples.maxlen:
+                old = self._samples[0]
+                del self._sorted[bisect.bisect_left(self._sorted, old)]
+            self._samples.append(latency)
+            bisect.insort(self._sorted, latency)
+
+    def delay(self) -> Optional[float]:
+        """发出对冲副本前的等待时间，样本不足时为None"""
+        with self._lock:
+            if len(self._sorted) < self.min_samples:
+                return None
+            index = min(len(self._sorted) - 1, int(len(self._sorted) * self.percentile))
+            return self._sorted[index]
+
+    def on_request(self):
+        """每个可对冲的请求补充预算"""
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + self.budget)
+
+    def try_hedge(self) -> bool:
+        """取一次对冲预算"""
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            self.hedged += 1
+            return True
+
+    def record_win(self):
+        with self._lock:
+            self.hedge_wins += 1
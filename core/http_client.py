@@ -0,0 +1,252 @@
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.exceptions import Timeout
+
+from core.hedging import HedgePolicy
+
+logger = logging.getLogger("HttpClient")
+
+_local = threading.local()
+
+
+class DeadlineExceeded(Timeout):
+    """当前任务项的时限已到，请求未发出"""
+
+    # classify_error据此按超时归类，批量任务检查时限后不再重试
+    timeout = True
+
+
+@contextmanager
+def request_deadline(seconds: Optional[float]):
+    """限制上下文中当前线程发出的请求的总耗时
+
+    每个请求的连接和读取超时被截短为剩余时间，时限已到时请求直接
+    抛出DeadlineExceeded。嵌套时取较早的时限。
+
+    Args:
+        seconds: 剩余时间(秒)，为None时不限制
+    """
+    previous = getattr(_local, 'deadline', None)
+    deadline = previous
+    if seconds is not None:
+        deadline = time.monotonic() + seconds
+        if previous is not None:
+            deadline = min(deadline, previous)
+    _local.deadline = deadline
+    try:
+        yield
+    finally:
+        _local.deadline = previous
+
+
+def remaining_time() -> Optional[float]:
+    """当前线程的剩余时间(秒)，没有时限时为None"""
+    deadline = getattr(_local, 'deadline', None)
+    return None if deadline is None else deadline - time.monotonic()
+
+
+class HttpClient:
+    """共享HTTP客户端
+
+    所有TwitterAPI实例共用一个keep-alive连接池。连接池大小和请求超时
+    可在运行时调整: 调整时创建新的Session替换旧的，正在进行的请求
+    继续使用旧Session完成，不会被中断；旧Session上的最后一个请求
+    完成后关闭其连接池。
+
+    连接超时和读取超时分开设置，连接不上的主机很快失败，
+    而不是占用工作线程直到读取超时。启用对冲后，可对冲的请求(幂等GET)
+    超过滑动p95仍未返回时再发一份副本，先返回的结果生效。
+    """
+
+    def __init__(self, pool_size: int = 10, timeout: float = 30,
+                 proxy: Optional[str] = None,
+                 connect_timeout: Optional[float] = None,
+                 hedge: bool = False, hedge_budget: float = 0.05):
+        """初始化客户端
+
+        Args:
+            pool_size: 每个主机的最大连接数
+            timeout: 读取超时(秒)
+            proxy: 所有请求经过的代理URL，如 http://host:port
+            connect_timeout: 连接超时(秒)，为None时与读取超时相同
+            hedge: 是否对可对冲的请求发送对冲副本
+            hedge_budget: 对冲请求占总请求数的比例上限
+        """
+        self._lock = threading.Lock()
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.proxy = proxy
+        # 按请求传入，避免被环境变量中的代理设置覆盖
+        self.proxies = {'http': proxy, 'https': proxy} if proxy else None
+        self.hedge = hedge
+        self.hedging = HedgePolicy(budget=hedge_budget)
+        self._hedge_executor: Optional[ThreadPoolExecutor] = None
+        self.session = self._create_session(pool_size)
+        # Session -> 正在使用它的请求数
+        self._session_users: Dict[requests.Session, int] = {}
+
+    @staticmethod
+    def _create_session(pool_size: int) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def configure(self, pool_size: Optional[int] = None,
+                  timeout: Optional[float] = None,
+                  connect_timeout: Optional[float] = None,
+                  hedge: Optional[bool] = None,
+                  hedge_budget: Optional[float] = None):
+        """调整连接池大小、超时和对冲设置
+
+        Args:
+            pool_size: 新的连接池大小，为None时不变
+            timeout: 新的读取超时(秒)，为None时不变
+            connect_timeout: 新的连接超时(秒)，为None时不变
+            hedge: 是否启用对冲，为None时不变
+            hedge_budget: 对冲预算比例，为None时不变
+        """
+        retired = None
+        with self._lock:
+            if timeout is not None:
+                self.timeout = timeout
+            if connect_timeout is not None:
+                self.connect_timeout = connect_timeout
+            if hedge is not None:
+                self.hedge = hedge
+            if hedge_budget is not None:
+                self.hedging.budget = hedge_budget
+            if pool_size is not None and pool_size != self.pool_size:
+                self.pool_size = pool_size
+                old = self.session
+                self.session = self._create_session(pool_size)
+                # 仍有请求在使用旧Session时，由最后一个请求完成后关闭
+                if old not in self._session_users:
+                    retired = old
+        if retired is not None:
+            retired.close()
+        logger.info(f"HTTP客户端配置更新: pool_size={self.pool_size}, "
+                    f"timeout=({self.connect_timeout}, {self.timeout})s, hedge={self.hedge}")
+
+    def _resolve_timeout(self, timeout):
+        """未指定时使用(连接超时, 读取超时)，并按当前线程的时限截短"""
+        if timeout is None:
+            timeout = (self.connect_timeout or self.timeout, self.timeout)
+        remaining = remaining_time()
+        if remaining is None:
+            return timeout
+        if remaining <= 0:
+            raise DeadlineExceeded("已超过任务项时限")
+        if isinstance(timeout, tuple):
+            return tuple(min(t, remaining) for t in timeout)
+        return min(timeout, remaining)
+
+    def request(self, method: str, url: str, hedge: bool = False,
+                **kwargs) -> requests.Response:
+        """发送请求，未指定timeout时使用当前配置
+
+        Args:
+            method: HTTP方法
+            url: 请求地址
+            hedge: 请求是否幂等、可以发送对冲副本(客户端启用对冲时生效)
+            **kwargs: 传递给requests的参数
+        """
+        kwargs['timeout'] = self._resolve_timeout(kwargs.get('timeout'))
+        if self.proxies is not None:
+            kwargs.setdefault('proxies', self.proxies)
+        if not (hedge and self.hedge):
+            return self._send(method, url, kwargs)
+        self.hedging.on_request()
+        delay = self.hedging.delay()
+        if delay is None:
+            return self._send(method, url, kwargs)
+        return self._send_hedged(method, url, kwargs, delay)
+
+    def _send(self, method: str, url: str, kwargs: dict) -> requests.Response:
+        with self._lock:
+            session = self.session
+            self._session_users[session] = self._session_users.get(session, 0) + 1
+        started = time.monotonic()
+        try:
+            response = session.request(method, url, **kwargs)
+        finally:
+            self._release_session(session)
+        # 错误响应(如快速返回的429)会拉低p95，只记录成功请求的延迟
+        if 200 <= response.status_code < 300:
+            self.hedging.record(time.monotonic() - started)
+        return response
+
+    def _release_session(self, session: requests.Session):
+        """请求完成，已被替换的Session没有其他请求使用时关闭"""
+        with self._lock:
+            users = self._session_users[session] - 1
+            if users:
+                self._session_users[session] = users
+                return
+            del self._session_users[session]
+            if session is self.session:
+                return
+        session.close()
+        logger.debug("旧Session的请求已全部完成，连接池已关闭")
+
+    def _executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._hedge_executor is None:
+                self._hedge_executor = ThreadPoolExecutor(
+                    max_workers=max(8, self.pool_size * 2), thread_name_prefix="HttpHedge")
+            return self._hedge_executor
+
+    def _send_hedged(self, method: str, url: str, kwargs: dict,
+                     delay: float) -> requests.Response:
+        """先发一份请求，超过delay仍未返回且有预算时再发一份，返回先成功的结果"""
+        executor = self._executor()
+        primary = executor.submit(self._send, method, url, kwargs)
+        done, _ = wait([primary], timeout=delay)
+        if done or not self.hedging.try_hedge():
+            return primary.result()
+
+        logger.debug(f"请求超过p95({delay:.2f}s)，发送对冲副本: {method} {url}")
+        backup = executor.submit(self._send, method, url, kwargs)
+        pending = {primary, backup}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    if future is primary or error is None:
+                        error = future.exception()
+                    continue
+                if future is backup:
+                    self.hedging.record_win()
+                # 较慢的一份完成后直接释放连接
+                for other in pending:
+                    other.add_done_callback(_close_response)
+                return future.result()
+        raise error
+
+
+def _close_response(future):
+    if future.exception() is None:
+        future.result().close()
+
+
+_shared_client: Optional[HttpClient] = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_client() -> HttpClient:
+    """获取进程内共享的HTTP客户端"""
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is None:
+            _shared_client = HttpClient()
+        return _shared_client
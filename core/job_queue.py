@@ -0,0 +1,299 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+logger = logging.getLogger("JobQueue")
+
+SHARD_PENDING = 'pending'
+SHARD_LEASED = 'leased'
+SHARD_DONE = 'done'
+SHARD_FAILED = 'failed'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    total_items INTEGER NOT NULL,
+    total_shards INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS shards (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    lease_id TEXT,
+    worker TEXT,
+    lease_until REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    completed_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_shards_claim ON shards(status, lease_until);
+CREATE INDEX IF NOT EXISTS idx_shards_job ON shards(job_id, status);
+CREATE TABLE IF NOT EXISTS results (
+    job_id TEXT NOT NULL,
+    item TEXT NOT NULL,
+    shard_id INTEGER NOT NULL,
+    result TEXT NOT NULL,
+    PRIMARY KEY (job_id, item)
+);
+CREATE INDEX IF NOT EXISTS idx_results_shard ON results(job_id, shard_id);
+"""
+
+# iter_results每次加锁读取的结果数
+RESULT_BATCH_SIZE = 1000
+
+
+class ShardLease:
+    """一个分片的租约"""
+
+    __slots__ = ('shard_id', 'job_id', 'seq', 'items', 'lease_id', 'worker', 'lease_until')
+
+    def __init__(self, shard_id: int, job_id: str, seq: int, items: List[str],
+                 lease_id: str, worker: str, lease_until: float):
+        self.shard_id = shard_id
+        self.job_id = job_id
+        self.seq = seq
+        self.items = items
+        self.lease_id = lease_id
+        self.worker = worker
+        self.lease_until = lease_until
+
+    def __repr__(self):
+        return f"ShardLease(job={self.job_id}, seq={self.seq}, items={len(self.items)})"
+
+
+class JobQueue:
+    """基于SQLite的持久化分片任务队列
+
+    协调进程把一批项(如token)切分成分片写入队列目录中的数据库，
+    多个工作进程(可以在共享该目录的多台机器上)以租约方式领取分片。
+    工作进程需在租约到期前续约，进程退出后租约过期，分片被其他进程重新领取。
+
+    完成分片时，结果写入和分片状态更新在同一个事务中进行，且只有仍持有
+    该租约的进程能提交: 租约过期后迟到的提交会被拒绝，每项结果只记录一次。
+
+    队列库使用回滚日志而不是WAL，以便在网络共享目录上也能正确加锁。
+    """
+
+    def __init__(self, queue_dir: str, lease_seconds: float = 120,
+                 max_attempts: int = 5):
+        """打开或创建队列
+
+        Args:
+            queue_dir: 队列目录
+            lease_seconds: 租约时长(秒)
+            max_attempts: 分片的最大领取次数，超过后标记为失败
+        """
+        self.queue_dir = Path(queue_dir)
+        self.queue_dir.mkdir(parents=True, exist_ok=True)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        # 续约线程与处理线程共用连接，由锁串行化
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(self.queue_dir / "queue.db"), timeout=30,
+                                     isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=DELETE")
+        self._conn.execute("PRAGMA busy_timeout=30000")
+        self._conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """写事务，开始时即获取写锁，避免并发领取时读后写冲突"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            else:
+                self._conn.execute("COMMIT")
+
+    def create_job(self, items: List[str], shard_size: int = 1000,
+                   kind: str = 'verify') -> str:
+        """创建任务并切分成分片
+
+        Args:
+            items: 要处理的项，重复项只保留一个
+            shard_size: 每个分片的项数
+            kind: 任务类型
+
+        Returns:
+            任务ID
+        """
+        unique = list(dict.fromkeys(i for i in items if i))
+        shard_size = max(1, shard_size)
+        shards = [unique[i:i + shard_size] for i in range(0, len(unique), shard_size)]
+        job_id = uuid.uuid4().hex[:12]
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, created_at, total_items, total_shards) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (job_id, kind, time.time(), len(unique), len(shards))
+            )
+            conn.executemany(
+                "INSERT INTO shards (job_id, seq, payload) VALUES (?, ?, ?)",
+                ((job_id, seq, json.dumps(shard)) for seq, shard in enumerate(shards))
+            )
+        logger.info(f"创建任务 {job_id}: {len(unique)}项, {len(shards)}个分片")
+        return job_id
+
+    def claim(self, worker: str, job_id: Optional[str] = None) -> Optional[ShardLease]:
+        """领取一个待处理或租约已过期的分片
+
+        Args:
+            worker: 工作进程标识
+            job_id: 只领取该任务的分片，为None时领取任意任务
+
+        Returns:
+            分片租约，没有可领取的分片时返回None
+        """
+        now = time.time()
+        job_filter = "AND job_id = ?" if job_id else ""
+        params = [SHARD_PENDING, SHARD_LEASED, now] + ([job_id] if job_id else [])
+        with self._transaction() as conn:
+            while True:
+                row = conn.execute(
+                    "SELECT id, job_id, seq, payload, attempts, status FROM shards "
+                    "WHERE (status = ? OR (status = ? AND lease_until < ?)) "
+                    f"{job_filter} ORDER BY id LIMIT 1",
+                    params
+                ).fetchone()
+                if row is None:
+                    return None
+                shard_id, shard_job, seq, payload, attempts, status = row
+                if status == SHARD_LEASED:
+                    logger.warning(f"分片 {shard_job}/{seq} 租约过期，重新分配")
+                if attempts >= self.max_attempts:
+                    conn.execute(
+                        "UPDATE shards SET status = ?, lease_id = NULL WHERE id = ?",
+                        (SHARD_FAILED, shard_id)
+                    )
+                    logger.error(f"分片 {shard_job}/{seq} 超过最大重试次数，标记为失败")
+                    continue
+                lease_id = uuid.uuid4().hex
+                lease_until = now + self.lease_seconds
+                conn.execute(
+                    "UPDATE shards SET status = ?, lease_id = ?, worker = ?, "
+                    "lease_until = ?, attempts = attempts + 1 WHERE id = ?",
+                    (SHARD_LEASED, lease_id, worker, lease_until, shard_id)
+                )
+                return ShardLease(shard_id, shard_job, seq, json.loads(payload),
+                                  lease_id, worker, lease_until)
+
+    def renew(self, lease: ShardLease) -> bool:
+        """续约
+
+        Returns:
+            是否仍持有租约
+        """
+        lease_until = time.time() + self.lease_seconds
+        with self._transaction() as conn:
+            cur = conn.execute(
+                "UPDATE shards SET lease_until = ? WHERE id = ? AND lease_id = ? AND status = ?",
+                (lease_until, lease.shard_id, lease.lease_id, SHARD_LEASED)
+            )
+        if cur.rowcount:
+            lease.lease_until = lease_until
+            return True
+        return False
+
+    def complete(self, lease: ShardLease, results: Dict[str, Dict]) -> bool:
+        """提交分片结果
+
+        Args:
+            lease: 分片租约
+            results: 项 -> 结果字典
+
+        Returns:
+            是否提交成功，租约已失效时返回False且不写入任何结果
+        """
+        with self._transaction() as conn:
+            cur = conn.execute(
+                "UPDATE shards SET status = ?, lease_id = NULL, completed_at = ?, error = NULL "
+                "WHERE id = ? AND lease_id = ? AND status = ?",
+                (SHARD_DONE, time.time(), lease.shard_id, lease.lease_id, SHARD_LEASED)
+            )
+            if not cur.rowcount:
+                logger.warning(f"分片 {lease.job_id}/{lease.seq} 租约已失效，丢弃结果")
+                return False
+            conn.executemany(
+                "INSERT OR IGNORE INTO results (job_id, item, shard_id, result) "
+                "VALUES (?, ?, ?, ?)",
+                ((lease.job_id, item, lease.shard_id, json.dumps(result, ensure_ascii=False))
+                 for item, result in results.items())
+            )
+        return True
+
+    def release(self, lease: ShardLease, error: Optional[str] = None):
+        """放弃租约，分片回到待处理状态"""
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE shards SET status = ?, lease_id = NULL, lease_until = NULL, error = ? "
+                "WHERE id = ? AND lease_id = ? AND status = ?",
+                (SHARD_PENDING, error, lease.shard_id, lease.lease_id, SHARD_LEASED)
+            )
+
+    def jobs(self) -> List[Dict]:
+        """所有任务，按创建时间倒序"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, kind, created_at, total_items, total_shards FROM jobs "
+                "ORDER BY created_at DESC"
+            ).fetchall()
+        return [dict(zip(('id', 'kind', 'created_at', 'total_items', 'total_shards'), r))
+                for r in rows]
+
+    def status(self, job_id: str) -> Dict:
+        """任务进度
+
+        Returns:
+            各状态的分片数、已记录结果数和任务是否结束
+        """
+        counts = {s: 0 for s in (SHARD_PENDING, SHARD_LEASED, SHARD_DONE, SHARD_FAILED)}
+        with self._lock:
+            for status, count in self._conn.execute(
+                    "SELECT status, COUNT(*) FROM shards WHERE job_id = ? GROUP BY status",
+                    (job_id,)):
+                counts[status] = count
+            results = self._conn.execute(
+                "SELECT COUNT(*) FROM results WHERE job_id = ?", (job_id,)).fetchone()[0]
+        return {
+            'shards': counts,
+            'results': results,
+            'finished': counts[SHARD_PENDING] == 0 and counts[SHARD_LEASED] == 0,
+        }
+
+    def iter_results(self, job_id: str) -> Iterator[Dict]:
+        """按分片顺序逐条读取任务结果
+
+        每次加锁只读取RESULT_BATCH_SIZE条，从上一批的最后位置继续，
+        内存占用与结果总数无关，读取期间其他线程仍可使用连接。
+        """
+        position = (-1, -1)
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT shard_id, rowid, item, result FROM results "
+                    "WHERE job_id = ? AND (shard_id, rowid) > (?, ?) "
+                    "ORDER BY shard_id, rowid LIMIT ?",
+                    (job_id, *position, RESULT_BATCH_SIZE)).fetchall()
+            for _, _, item, result in rows:
+                data = json.loads(result)
+                data.setdefault('token', item)
+                yield data
+            if len(rows) < RESULT_BATCH_SIZE:
+                return
+            position = rows[-1][:2]
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,174 @@
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger("Persistence")
+
+
+def atomic_write_json(path, data: Any, mode: Optional[int] = None, **dump_kwargs):
+    """原子写入JSON文件
+
+    先写入同目录下的临时文件再替换原文件，写入过程中崩溃不会损坏原文件。
+
+    Args:
+        path: 目标文件路径
+        data: 可JSON序列化的数据
+        mode: 文件权限(如0o600)，临时文件创建时即使用该权限，
+            写入的内容任何时刻都不会以更宽的权限出现在磁盘上；为None时按umask
+        **dump_kwargs: 传递给json.dump的参数
+    """
+    path = Path(path)
+    tmp_path = path.with_name(path.name + ".tmp")
+    if mode is None:
+        f = open(tmp_path, 'w', encoding='utf-8')
+    else:
+        # 上次残留的临时文件可能权限更宽，删除后独占创建
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, mode)
+        f = os.fdopen(fd, 'w', encoding='utf-8')
+    with f:
+        json.dump(data, f, **dump_kwargs)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class WriteBehindSaver:
+    """延迟写入调度器
+
+    数据变更时只标记为脏，由后台线程按固定间隔合并写入磁盘，
+    关闭时再写入一次。一连串修改只产生一次磁盘写入。
+    未启用时退化为每次变更立即同步写入。
+    """
+
+    def __init__(self, save_func: Callable[[], None], interval: Optional[float] = 300,
+                 enabled: bool = False, name: str = "WriteBehindSaver"):
+        """初始化调度器
+
+        Args:
+            save_func: 执行实际写入的函数
+            interval: 写入间隔(秒)，为None时不定时写入，只在flush或close时写入
+            enabled: 是否启用延迟写入
+            name: 后台线程名
+        """
+        self.save_func = save_func
+        self.interval = interval
+        self.enabled = enabled
+        self.name = name
+
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        # 当前写入周期的开始时间，到达开始时间加间隔时写入
+        self._period_start = time.monotonic()
+        if enabled and interval is not None:
+            self._start_thread()
+
+    def _start_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopped.clear()
+        self._period_start = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        """后台写入循环
+
+        被configure唤醒时只按新的间隔重新计算下次写入时间，不提前写入。
+        """
+        while not self._stopped.is_set():
+            self._wakeup.wait(max(0.0, self._due() - time.monotonic()))
+            self._wakeup.clear()
+            if self._stopped.is_set():
+                break
+            if time.monotonic() < self._due():
+                continue
+            self._period_start = time.monotonic()
+            try:
+                self.flush()
+            except Exception:
+                # 已记录日志，保留脏标记等待下次重试
+                pass
+
+    def _due(self) -> float:
+        return self._period_start + self.interval
+
+    @property
+    def dirty(self) -> bool:
+        return self._dirty
+
+    def mark_dirty(self):
+        """标记数据已变更"""
+        if not self.enabled:
+            self.save_now()
+            return
+        with self._lock:
+            self._dirty = True
+
+    def save_now(self):
+        """无论是否有变更都立即写入"""
+        with self._lock:
+            self._dirty = True
+        self.flush()
+
+    def flush(self) -> bool:
+        """如有未保存的变更则立即写入
+
+        Returns:
+            是否执行了写入
+        """
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return False
+                self._dirty = False
+            try:
+                self.save_func()
+                return True
+            except Exception as e:
+                with self._lock:
+                    self._dirty = True
+                logger.error(f"{self.name} 写入失败: {str(e)}")
+                raise
+
+    def configure(self, enabled: bool, interval: Optional[float]):
+        """修改写入策略，关闭延迟写入时立即写入未保存的变更
+
+        修改间隔不会触发写入，下次写入时间按当前周期的开始时间加新间隔计算。
+        interval为None时停止定时写入，变更保留到flush或close时写入。
+        """
+        self.interval = interval
+        self.enabled = enabled
+        if enabled and interval is not None:
+            self._start_thread()
+            # 唤醒后台线程以使用新的间隔
+            self._wakeup.set()
+        elif enabled:
+            self._stop_thread()
+        else:
+            self._stop_thread()
+            self.flush()
+        logger.debug(f"{self.name} 配置更新: enabled={enabled}, interval={interval}s")
+
+    def _stop_thread(self):
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+        self._thread = None
+
+    def close(self):
+        """停止后台线程并写入未保存的变更"""
+        self._stop_thread()
+        self.flush()
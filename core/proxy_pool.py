@@ -0,0 +1,306 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlsplit, urlunsplit
+
+import requests
+from requests.exceptions import ProxyError, RequestException
+
+from core.http_client import DeadlineExceeded, HttpClient
+
+logger = logging.getLogger("ProxyPool")
+
+# 健康检查访问的地址，收到任何非5xx响应即说明代理可用
+DEFAULT_CHECK_URL = "https://api.twitter.com/2/openapi.json"
+# 延迟滑动平均中新样本的权重
+LATENCY_ALPHA = 0.3
+
+
+def parse_proxy_list(text: str) -> List[str]:
+    """解析逗号、空白或换行分隔的代理URL列表，缺少协议时按http处理"""
+    proxies = []
+    for part in text.replace(',', ' ').split():
+        url = part if '://' in part else f"http://{part}"
+        if url not in proxies:
+            proxies.append(url)
+    return proxies
+
+
+def redact_proxy_url(url: str) -> str:
+    """去掉代理URL中的用户名和密码，用于日志和状态显示"""
+    parts = urlsplit(url)
+    if '@' not in parts.netloc:
+        return url
+    return urlunsplit(parts._replace(netloc="***@" + parts.netloc.rpartition('@')[2]))
+
+
+class ProxyEndpoint:
+    """一个出口代理: 独立的keep-alive连接池和健康状态
+
+    Attributes:
+        url: 代理URL
+        label: 去掉认证信息的代理URL，用于日志和显示
+        client: 经该代理发出请求的HTTP客户端
+        healthy: 是否参与分配
+        latency: 请求延迟的滑动平均(秒)，尚无样本时为None
+        failures: 连续失败次数
+        tokens: 绑定到该代理的token数
+    """
+
+    def __init__(self, url: str, client_options: Dict):
+        self.url = url
+        self.label = redact_proxy_url(url)
+        self.client = HttpClient(proxy=url, **client_options)
+        self.healthy = True
+        self.latency: Optional[float] = None
+        self.failures = 0
+        self.tokens = 0
+        self.requests = 0
+        self.errors = 0
+
+    def observe(self, latency: float):
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency += LATENCY_ALPHA * (latency - self.latency)
+
+    def to_dict(self) -> Dict:
+        return {
+            'url': self.label,
+            'healthy': self.healthy,
+            'latency': self.latency,
+            'failures': self.failures,
+            'tokens': self.tokens,
+            'requests': self.requests,
+            'errors': self.errors,
+        }
+
+
+class ProxyClient:
+    """绑定到一个token的HTTP客户端，接口与HttpClient.request相同"""
+
+    def __init__(self, pool: "ProxyPool", token: str):
+        self.pool = pool
+        self.token = token
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        return self.pool.request(self.token, method, url, **kwargs)
+
+
+class ProxyPool:
+    """出口代理池
+
+    每个token固定使用一个代理(连接亲和)，同一token的请求复用该代理的
+    keep-alive连接。新token分配给 延迟×(已绑定token数+1) 最小的健康代理。
+    连续失败或延迟过高的代理被移出分配，其token在下次请求时改绑其他代理；
+    后台线程定期检查全部代理，恢复正常的代理重新参与分配。
+    """
+
+    def __init__(self, proxies: Iterable[str] = (), pool_size: int = 10,
+                 timeout: float = 30, check_url: str = DEFAULT_CHECK_URL,
+                 check_interval: float = 60, max_latency: float = 5.0,
+                 max_failures: int = 3):
+        """初始化代理池
+
+        Args:
+            proxies: 代理URL列表
+            pool_size: 每个代理的连接池大小
+            timeout: 请求超时(秒)
+            check_url: 健康检查访问的地址
+            check_interval: 健康检查间隔(秒)，为0时不启动后台检查
+            max_latency: 延迟滑动平均超过该值(秒)的代理视为过慢
+            max_failures: 连续失败达到该次数的代理视为故障
+        """
+        self._lock = threading.Lock()
+        # 创建各代理HttpClient的参数
+        self._client_options: Dict = {'pool_size': pool_size, 'timeout': timeout}
+        self.check_url = check_url
+        self.check_interval = check_interval
+        self.max_latency = max_latency
+        self.max_failures = max_failures
+        self._endpoints: Dict[str, ProxyEndpoint] = {}
+        self._assignments: Dict[str, ProxyEndpoint] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.configure(proxies)
+
+    @property
+    def enabled(self) -> bool:
+        """是否配置了代理"""
+        return bool(self._endpoints)
+
+    def configure(self, proxies: Optional[Iterable[str]] = None, **client_options):
+        """更新代理列表和连接参数
+
+        保留仍在列表中的代理及其状态和token绑定，被删除代理上的token
+        在下次请求时重新分配。
+
+        Args:
+            proxies: 新的代理URL列表，为None时不变
+            **client_options: 各代理HttpClient的参数(pool_size、timeout、
+                connect_timeout、hedge、hedge_budget)，值为None的不变
+        """
+        client_options = {k: v for k, v in client_options.items() if v is not None}
+        with self._lock:
+            self._client_options.update(client_options)
+            if proxies is not None:
+                endpoints = {}
+                for url in proxies:
+                    endpoints[url] = (self._endpoints.get(url)
+                                      or ProxyEndpoint(url, self._client_options))
+                self._endpoints = endpoints
+                self._assignments = {token: ep for token, ep in self._assignments.items()
+                                     if ep.url in endpoints}
+                for ep in endpoints.values():
+                    ep.tokens = 0
+                for ep in self._assignments.values():
+                    ep.tokens += 1
+            if client_options:
+                for ep in self._endpoints.values():
+                    ep.client.configure(**client_options)
+            enabled = bool(self._endpoints)
+        if enabled and self.check_interval > 0:
+            self.start()
+        elif not enabled:
+            self.stop()
+        logger.info(f"代理池配置更新: {len(self._endpoints)}个代理")
+
+    def client_for(self, token: str) -> ProxyClient:
+        """获取绑定到token的HTTP客户端"""
+        return ProxyClient(self, token)
+
+    def _score(self, ep: ProxyEndpoint) -> float:
+        # 没有延迟样本的新代理按延迟上限的一半估计
+        latency = ep.latency if ep.latency is not None else self.max_latency / 2
+        return latency * (ep.tokens + 1)
+
+    def proxy_for(self, token: str) -> ProxyEndpoint:
+        """返回token绑定的代理，未绑定或原代理不健康时重新分配
+
+        Raises:
+            ProxyError: 没有健康的代理
+        """
+        with self._lock:
+            ep = self._assignments.get(token)
+            if ep is not None and ep.healthy:
+                return ep
+            candidates = [e for e in self._endpoints.values() if e.healthy]
+            if not candidates:
+                raise ProxyError("没有可用的代理")
+            new = min(candidates, key=self._score)
+            if ep is not None:
+                ep.tokens -= 1
+                logger.info(f"token改绑代理: {ep.label} -> {new.label}")
+            new.tokens += 1
+            self._assignments[token] = new
+            return new
+
+    def request(self, token: str, method: str, url: str, **kwargs) -> requests.Response:
+        """经token绑定的代理发送请求，并记录延迟和失败"""
+        ep = self.proxy_for(token)
+        started = time.monotonic()
+        try:
+            response = ep.client.request(method, url, **kwargs)
+        except DeadlineExceeded:
+            # 任务项时限已到，请求没有发出，与代理无关
+            raise
+        except RequestException as e:
+            self._record_failure(ep, str(e))
+            raise
+        if response.status_code == 407:
+            self._record_failure(ep, "代理认证失败")
+        else:
+            self._record_success(ep, time.monotonic() - started)
+        return response
+
+    def _record_success(self, ep: ProxyEndpoint, latency: float):
+        with self._lock:
+            ep.requests += 1
+            ep.failures = 0
+            ep.observe(latency)
+            if ep.healthy and ep.latency > self.max_latency:
+                ep.healthy = False
+                logger.warning(f"代理 {ep.label} 延迟过高({ep.latency:.1f}秒)，暂停使用")
+
+    def _record_failure(self, ep: ProxyEndpoint, reason: str):
+        with self._lock:
+            ep.requests += 1
+            ep.errors += 1
+            ep.failures += 1
+            if ep.healthy and ep.failures >= self.max_failures:
+                ep.healthy = False
+                logger.warning(f"代理 {ep.label} 连续失败{ep.failures}次，暂停使用: {reason}")
+
+    def _check(self, ep: ProxyEndpoint):
+        """检查一个代理，恢复延迟正常的代理"""
+        started = time.monotonic()
+        try:
+            response = ep.client.request('GET', self.check_url, timeout=self.max_latency)
+            ok = response.status_code < 500 and response.status_code != 407
+            reason = f"状态码 {response.status_code}"
+        except RequestException as e:
+            ok, reason = False, str(e)
+        latency = time.monotonic() - started
+        with self._lock:
+            if not ok:
+                ep.failures += 1
+                if ep.healthy and ep.failures >= self.max_failures:
+                    ep.healthy = False
+                    logger.warning(f"代理 {ep.label} 健康检查失败，暂停使用: {reason}")
+                return
+            ep.failures = 0
+            ep.observe(latency)
+            if not ep.healthy and ep.latency <= self.max_latency:
+                ep.healthy = True
+                logger.info(f"代理 {ep.label} 已恢复，延迟{ep.latency:.2f}秒")
+
+    def check_now(self):
+        """并发检查全部代理"""
+        endpoints = list(self._endpoints.values())
+        if not endpoints:
+            return
+        with ThreadPoolExecutor(max_workers=min(len(endpoints), 16)) as executor:
+            list(executor.map(self._check, endpoints))
+
+    def _run(self):
+        while not self._stop.wait(self.check_interval):
+            try:
+                self.check_now()
+            except Exception as e:
+                logger.error(f"代理健康检查出错: {str(e)}")
+
+    def start(self):
+        """启动后台健康检查"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="ProxyHealthCheck",
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止后台健康检查"""
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+        self._thread = None
+
+    def stats(self) -> List[Dict]:
+        """各代理的状态"""
+        with self._lock:
+            return [ep.to_dict() for ep in self._endpoints.values()]
+
+
+_shared_pool: Optional[ProxyPool] = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_proxy_pool() -> ProxyPool:
+    """获取进程内共享的代理池，未配置代理时enabled为False"""
+    global _shared_pool
+    with _shared_lock:
+        if _shared_pool is None:
+            _shared_pool = ProxyPool()
+        return _shared_pool
@@ -0,0 +1,180 @@
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger("Snapshot")
+
+MAGIC = b'TGSNAP\x00\x01'
+VERSION = 1
+
+# 文件头: 魔数, 版本, 账号数, 分组数, 分组表偏移, 记录索引偏移, 记录区偏移,
+#         对应JSON文件的mtime_ns和大小(用于判断快照是否过期)
+_HEADER = struct.Struct('<8sIIIQQQqQ')
+_GROUP_HEAD = struct.Struct('<HI')   # 分组名长度, 成员数
+_INDEX_ENTRY = struct.Struct('<QI')  # 记录偏移, 记录长度
+_MEMBER = 'I'                        # 成员的账号序号
+
+
+def json_stat(json_path) -> Tuple[int, int]:
+    """JSON文件的(mtime_ns, 大小)，快照头中记录该值以检测JSON被外部修改"""
+    st = os.stat(json_path)
+    return st.st_mtime_ns, st.st_size
+
+
+def write_snapshot(path, data: dict, stat: Tuple[int, int]):
+    """把分组数据写成二进制快照
+
+    布局: 文件头 | 分组表(名称、成员数、成员序号数组) | 记录索引(定长) | 记录区
+    记录区整体是一个紧凑的JSON数组，既能按索引单独解码一条记录，
+    也能一次解码全部记录。先写临时文件再原子替换。
+
+    Args:
+        path: 快照文件路径
+        data: GroupManager的保存格式(accounts列表和groups映射)
+        stat: 写入该数据的JSON文件的json_stat()
+    """
+    path = Path(path)
+    accounts = data.get('accounts', [])
+    positions = {acc['username']: i for i, acc in enumerate(accounts)}
+
+    group_parts = []
+    for name, usernames in data.get('groups', {}).items():
+        members = [positions[u] for u in usernames if u in positions]
+        encoded = name.encode('utf-8')
+        group_parts.append(_GROUP_HEAD.pack(len(encoded), len(members)))
+        group_parts.append(encoded)
+        group_parts.append(struct.pack(f'<{len(members)}{_MEMBER}', *members))
+    group_blob = b''.join(group_parts)
+
+    records = [json.dumps(acc, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+               for acc in accounts]
+    groups_off = _HEADER.size
+    index_off = groups_off + len(group_blob)
+    records_off = index_off + _INDEX_ENTRY.size * len(records)
+    index_parts = []
+    offset = records_off + 1  # 跳过'['
+    for record in records:
+        index_parts.append(_INDEX_ENTRY.pack(offset, len(record)))
+        offset += len(record) + 1  # 记录后的','或']'
+
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, len(records), len(data.get('groups', {})),
+                             groups_off, index_off, records_off, stat[0], stat[1]))
+        f.write(group_blob)
+        f.write(b''.join(index_parts))
+        f.write(b'[' + b','.join(records) + b']')
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    logger.debug(f"快照已写入 {path}: {len(records)}个账号")
+
+
+class Snapshot:
+    """只读的内存映射快照
+
+    打开时只解析文件头和分组表(与分组数相关，与账号数无关)，
+    账号记录在访问时才按偏移解码。
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._file = open(self.path, 'rb')
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._file.close()
+            raise
+        self._lock = threading.Lock()
+        (magic, version, self.account_count, group_count, groups_off,
+         self._index_off, self._records_off, mtime_ns, size) = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError("快照格式不匹配")
+        self.json_stat = (mtime_ns, size)
+
+        # 分组名 -> (成员数组偏移, 成员数)
+        self._groups: Dict[str, Tuple[int, int]] = {}
+        pos = groups_off
+        for _ in range(group_count):
+            name_len, count = _GROUP_HEAD.unpack_from(self._mm, pos)
+            pos += _GROUP_HEAD.size
+            name = self._mm[pos:pos + name_len].decode('utf-8')
+            pos += name_len
+            self._groups[name] = (pos, count)
+            pos += count * struct.calcsize(_MEMBER)
+
+    @classmethod
+    def open_if_fresh(cls, path, json_path) -> Optional["Snapshot"]:
+        """打开快照，文件不存在、格式不对或与JSON不一致时返回None"""
+        try:
+            if not os.path.exists(path) or not os.path.exists(json_path):
+                return None
+            snapshot = cls(path)
+        except Exception as e:
+            logger.warning(f"快照不可用，使用JSON加载: {str(e)}")
+            return None
+        if snapshot.json_stat != json_stat(json_path):
+            logger.info("分组文件已在外部修改，快照过期")
+            snapshot.close()
+            return None
+        return snapshot
+
+    def group_names(self) -> List[str]:
+        return list(self._groups)
+
+    def group_size(self, name: str) -> int:
+        entry = self._groups.get(name)
+        return entry[1] if entry else 0
+
+    def group_members(self, name: str) -> List[int]:
+        """分组成员的账号序号"""
+        entry = self._groups.get(name)
+        if not entry:
+            return []
+        offset, count = entry
+        with self._lock:
+            return list(struct.unpack_from(f'<{count}{_MEMBER}', self._mm, offset))
+
+    def record(self, index: int) -> dict:
+        """解码第index个账号记录"""
+        with self._lock:
+            offset, length = _INDEX_ENTRY.unpack_from(
+                self._mm, self._index_off + index * _INDEX_ENTRY.size)
+            raw = self._mm[offset:offset + length]
+        return json.loads(raw)
+
+    def group_records(self, name: str) -> List[dict]:
+        """解码一个分组的全部账号记录"""
+        members = self.group_members(name)
+        with self._lock:
+            parts = []
+            for i in members:
+                offset, length = _INDEX_ENTRY.unpack_from(
+                    self._mm, self._index_off + i * _INDEX_ENTRY.size)
+                parts.append(self._mm[offset:offset + length])
+        # 拼成一个数组一次解码，比逐条json.loads快得多
+        return json.loads(b'[' + b','.join(parts) + b']')
+
+    def records(self) -> Iterator[dict]:
+        """按序解码全部账号记录"""
+        with self._lock:
+            blob = self._mm[self._records_off:]
+        yield from json.loads(blob)
+
+    def groups(self) -> Iterator[Tuple[str, List[int]]]:
+        """全部分组及成员序号"""
+        for name in self._groups:
+            yield name, self.group_members(name)
+
+    def close(self):
+        with self._lock:
+            if self._mm is not None:
+                self._mm.close()
+                self._mm = None
+            self._file.close()
@@ -0,0 +1,218 @@
+from PyQt5.QtCore import QRunnable, QThreadPool
+from collections import OrderedDict, deque
+import itertools
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger("TaskScheduler")
+
+# 优先级类别，数值越小越优先
+PRIORITY_INTERACTIVE = 0
+PRIORITY_NORMAL = 1
+PRIORITY_BATCH = 2
+PRIORITY_BACKGROUND = 3
+
+PRIORITIES = (PRIORITY_INTERACTIVE, PRIORITY_NORMAL, PRIORITY_BATCH, PRIORITY_BACKGROUND)
+
+
+class _Task:
+    __slots__ = ('fn', 'args', 'priority', 'job_id')
+
+    def __init__(self, fn: Callable, args: tuple, priority: int, job_id: Any):
+        self.fn = fn
+        self.args = args
+        self.priority = priority
+        self.job_id = job_id
+
+
+class _TaskRunnable(QRunnable):
+    """在线程池中执行任务，完成后通知调度器派发下一个"""
+
+    def __init__(self, scheduler: "TaskScheduler", task: _Task):
+        super().__init__()
+        self.scheduler = scheduler
+        self.task = task
+
+    def run(self):
+        try:
+            self.task.fn(*self.task.args)
+        except Exception as e:
+            logger.error(f"任务执行出错: {str(e)}", exc_info=True)
+        finally:
+            self.scheduler._task_done(self.task)
+
+
+class _JobExecutor:
+    """绑定优先级和作业ID的提交接口，供批量任务逐项提交"""
+
+    def __init__(self, scheduler: "TaskScheduler", priority: int, job_id: Any):
+        self.scheduler = scheduler
+        self.priority = priority
+        self.job_id = job_id
+
+    def submit(self, fn: Callable, *args):
+        self.scheduler.submit_callable(fn, *args, priority=self.priority,
+                                       job_id=self.job_id)
+
+
+class TaskScheduler:
+    """带优先级的任务调度器
+
+    所有工作任务按优先级类别排队，每个类别有并发配额。非交互任务合计
+    最多占用max_threads个线程，线程池另外为交互任务保留reserved_interactive个
+    线程，因此批量验证占满配额时交互任务提交后仍能立即执行。
+    同一类别内不同作业(job_id)的任务轮流派发，多个批量作业公平共享配额。
+
+    批量作业的协调线程(如AdaptiveBatchWorker)运行在单独的控制线程池中，
+    只有其逐项提交的请求占用工作线程。
+    """
+
+    def __init__(self, max_threads: int = 5, reserved_interactive: int = 1):
+        """初始化调度器
+
+        Args:
+            max_threads: 工作线程数
+            reserved_interactive: 为交互任务保留的线程数
+        """
+        self.reserved_interactive = reserved_interactive
+        self.pool = QThreadPool()
+        self.control_pool = QThreadPool()
+        self.control_pool.setMaxThreadCount(16)
+
+        self._lock = threading.Lock()
+        self._queues: Dict[int, "OrderedDict[Any, deque]"] = {
+            p: OrderedDict() for p in PRIORITIES}
+        self._running: Dict[int, int] = {p: 0 for p in PRIORITIES}
+        self._job_ids = itertools.count(1)
+        self.max_threads = 0
+        self.set_max_threads(max_threads)
+
+    def set_max_threads(self, max_threads: int):
+        """调整工作线程数，正在执行的任务不受影响"""
+        with self._lock:
+            self.max_threads = max(1, max_threads)
+            self.pool.setMaxThreadCount(self.max_threads + self.reserved_interactive)
+        self._dispatch()
+
+    def quota(self, priority: int) -> int:
+        """类别的并发配额"""
+        if priority == PRIORITY_INTERACTIVE:
+            return self.max_threads + self.reserved_interactive
+        if priority in (PRIORITY_NORMAL, PRIORITY_BATCH):
+            return self.max_threads
+        # 后台任务最多占用四分之一的线程
+        return max(1, self.max_threads // 4)
+
+    def new_job_id(self) -> int:
+        """分配作业ID"""
+        return next(self._job_ids)
+
+    def submit(self, runnable: QRunnable, priority: int = PRIORITY_NORMAL,
+               job_id: Any = None):
+        """提交Worker等QRunnable任务
+
+        Args:
+            runnable: 要执行的任务
+            priority: 优先级类别
+            job_id: 作业ID，同一作业的任务与其他作业轮流执行
+        """
+        self.submit_callable(runnable.run, priority=priority,
+                             job_id=job_id if job_id is not None else id(runnable))
+
+    def submit_callable(self, fn: Callable, *args, priority: int = PRIORITY_NORMAL,
+                        job_id: Any = None):
+        """提交可调用对象"""
+        task = _Task(fn, args, priority, job_id)
+        with self._lock:
+            jobs = self._queues[priority]
+            queue = jobs.get(job_id)
+            if queue is None:
+                queue = jobs[job_id] = deque()
+            queue.append(task)
+        self._dispatch()
+
+    def executor(self, priority: int, job_id: Any = None) -> _JobExecutor:
+        """获取绑定到某个作业的提交接口"""
+        return _JobExecutor(self, priority,
+                            job_id if job_id is not None else self.new_job_id())
+
+    def start_batch(self, worker, priority: int = PRIORITY_BATCH,
+                    job_id: Any = None):
+        """启动批量作业
+
+        协调线程在控制线程池中运行，逐项任务按优先级提交到工作线程池。
+
+        Args:
+            worker: 支持executor属性的批量工作线程(AdaptiveBatchWorker)
+            priority: 逐项任务的优先级类别
+            job_id: 作业ID，默认自动分配
+        """
+        worker.executor = self.executor(priority, job_id)
+        self.control_pool.start(worker)
+
+    def _pick(self) -> Optional[_Task]:
+        """按优先级和配额选出下一个任务(需持有锁)"""
+        if sum(self._running.values()) >= self.max_threads + self.reserved_interactive:
+            return None
+        for priority in PRIORITIES:
+            if self._running[priority] >= self.quota(priority):
+                continue
+            # 非交互任务总数不能占用保留线程
+            if (priority != PRIORITY_INTERACTIVE
+                    and sum(self._running[p] for p in PRIORITIES[1:]) >= self.max_threads):
+                continue
+            jobs = self._queues[priority]
+            if not jobs:
+                continue
+            job_id, queue = next(iter(jobs.items()))
+            task = queue.popleft()
+            # 轮转到队尾，下次派发其他作业的任务
+            if queue:
+                jobs.move_to_end(job_id)
+            else:
+                del jobs[job_id]
+            return task
+        return None
+
+    def _dispatch(self):
+        """在配额允许的范围内启动排队的任务"""
+        while True:
+            with self._lock:
+                task = self._pick()
+                if task is None:
+                    return
+                self._running[task.priority] += 1
+            self.pool.start(_TaskRunnable(self, task))
+
+    def _task_done(self, task: _Task):
+        with self._lock:
+            self._running[task.priority] -= 1
+        self._dispatch()
+
+    def wait_for_done(self, msecs: int = -1) -> bool:
+        """等待所有作业和任务完成"""
+        ok = self.control_pool.waitForDone(msecs)
+        return self.pool.waitForDone(msecs) and ok
+
+    def stats(self) -> Dict[str, Dict[int, int]]:
+        """各类别的排队和运行任务数"""
+        with self._lock:
+            return {
+                'queued': {p: sum(len(q) for q in self._queues[p].values())
+                           for p in PRIORITIES},
+                'running': dict(self._running),
+            }
+
+
+_shared_scheduler: Optional[TaskScheduler] = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_scheduler() -> TaskScheduler:
+    """获取进程内共享的任务调度器"""
+    global _shared_scheduler
+    with _shared_lock:
+        if _shared_scheduler is None:
+            _shared_scheduler = TaskScheduler()
+        return _shared_scheduler
@@ -0,0 +1,267 @@
+import asyncio
+import heapq
+import logging
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional
+
+logger = logging.getLogger("Timeline")
+
+_END = object()
+
+
+class TimelineIterator:
+    """用户时间线的流式迭代器
+
+    自动跟随 meta.next_token 翻页，每取到一页就逐条产出推文，
+    不在内存中保留已处理的页面。prefetch > 0 时由后台线程提前获取
+    后续页面，调用方处理当前页的同时下一页已在请求中。
+
+    支持同步迭代(for)和异步迭代(async for)。
+    """
+
+    def __init__(self, api, user_id: str, page_size: int = 100,
+                 start_time=None, end_time=None,
+                 tweet_fields: Optional[Iterable[str]] = None,
+                 prefetch: int = 1,
+                 max_pages: Optional[int] = None,
+                 since_id: Optional[str] = None,
+                 use_cache: bool = False):
+        """初始化迭代器
+
+        Args:
+            api: TwitterAPI实例
+            user_id: 用户ID
+            page_size: 每页推文数(5-100)
+            start_time: 最早时间
+            end_time: 最晚时间
+            tweet_fields: 返回的推文字段
+            prefetch: 预取页数，为0时在调用线程中同步获取
+            max_pages: 最多获取的页数
+            since_id: 只遍历比该ID更新的推文
+            use_cache: 是否使用响应缓存，默认不使用: 逐页遍历的页面很少被
+                再次请求，写入缓存只会挤出其他条目
+        """
+        self.api = api
+        self.user_id = user_id
+        self.page_size = max(5, min(100, page_size))
+        self.start_time = start_time
+        self.end_time = end_time
+        self.tweet_fields = tuple(tweet_fields) if tweet_fields else None
+        self.prefetch = max(0, prefetch)
+        self.max_pages = max_pages
+        self.since_id = since_id
+        self.use_cache = use_cache
+
+        self.pages_fetched = 0
+        self.next_token: Optional[str] = None
+        self.newest_id: Optional[str] = None
+
+        self._stop = threading.Event()
+        self._queue: Optional[queue.Queue] = None
+        self._producer: Optional[threading.Thread] = None
+        self._page_iter: Optional[Iterator[Dict]] = None
+        self._buffer: List[Dict] = []
+
+    def _fetch_page(self, pagination_token: Optional[str]) -> Dict:
+        """获取单页数据"""
+        return self.api.get_user_tweets(
+            self.user_id,
+            max_results=self.page_size,
+            pagination_token=pagination_token,
+            start_time=self.start_time,
+            end_time=self.end_time,
+            tweet_fields=self.tweet_fields,
+            since_id=self.since_id,
+            use_cache=self.use_cache
+        )
+
+    def _iter_pages_sync(self) -> Iterator[Dict]:
+        """在当前线程中逐页获取"""
+        token = None
+        while not self._stop.is_set():
+            if self.max_pages is not None and self.pages_fetched >= self.max_pages:
+                return
+            page = self._fetch_page(token)
+            self._record_page(page)
+            yield page
+            token = self.next_token
+            if not token:
+                return
+
+    def _record_page(self, page: Dict):
+        """记录分页状态"""
+        meta = page.get('meta', {})
+        self.pages_fetched += 1
+        self.next_token = meta.get('next_token')
+        if self.newest_id is None and meta.get('newest_id'):
+            self.newest_id = meta['newest_id']
+
+    def _produce(self):
+        """后台预取线程"""
+        try:
+            for page in self._iter_pages_sync():
+                if not self._put(page):
+                    return
+        except Exception as e:
+            self._put(e)
+            return
+        self._put(_END)
+
+    def _put(self, item) -> bool:
+        """放入队列，迭代器关闭时返回False"""
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.2)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _iter_pages_prefetched(self) -> Iterator[Dict]:
+        """从预取队列中逐页读取"""
+        self._queue = queue.Queue(maxsize=self.prefetch)
+        self._producer = threading.Thread(
+            target=self._produce,
+            name=f"TimelinePrefetch-{self.user_id}",
+            daemon=True
+        )
+        self._producer.start()
+        try:
+            while True:
+                try:
+                    item = self._queue.get(timeout=0.2)
+                except queue.Empty:
+                    if self._stop.is_set():
+                        return
+                    continue
+                if item is _END:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            self.close()
+
+    def pages(self) -> Iterator[Dict]:
+        """逐页产出原始API响应"""
+        if self.prefetch:
+            return self._iter_pages_prefetched()
+        return self._iter_pages_sync()
+
+    def __iter__(self) -> Iterator[Dict]:
+        for page in self.pages():
+            for tweet in page.get('data', []):
+                yield tweet
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Dict:
+        """异步获取下一条推文，翻页在线程池中执行，不阻塞事件循环"""
+        if self._page_iter is None:
+            self._page_iter = self.pages()
+        while not self._buffer:
+            page = await asyncio.get_running_loop().run_in_executor(
+                None, next, self._page_iter, None)
+            if page is None:
+                raise StopAsyncIteration
+            self._buffer = list(reversed(page.get('data', [])))
+        return self._buffer.pop()
+
+    def close(self):
+        """停止迭代并结束预取线程"""
+        self._stop.set()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def _account_stream(executor: ThreadPoolExecutor, first_page: Future,
+                    fetch, account,
+                    max_pages: Optional[int]) -> Iterator[Dict]:
+    """单个账号的推文流，消费当前页时已提交下一页的请求"""
+    future = first_page
+    pages = 0
+    while future is not None:
+        try:
+            page = future.result()
+        except Exception as e:
+            logger.warning(f"获取账号 {account.username} 时间线失败: {str(e)}")
+            return
+        pages += 1
+        token = page.get('meta', {}).get('next_token')
+        if token and (max_pages is None or pages < max_pages):
+            future = executor.submit(fetch, token)
+        else:
+            future = None
+        for tweet in page.get('data', []):
+            # 页面可能来自响应缓存，不修改缓存中的字典
+            yield tweet if tweet.get('author_id') else {**tweet, 'author_id': account.id}
+
+
+def iter_group_timeline(group_manager, group_name: str,
+                        page_size: int = 100,
+                        max_pages: Optional[int] = 1,
+                        start_time=None, end_time=None,
+                        max_workers: int = 8,
+                        tweet_store=None) -> Iterator[Dict]:
+    """并发获取分组内所有账号的时间线，按created_at合并为单一时间线
+
+    每个账号使用自己的token请求，各账号的首页请求同时提交，
+    后续页在消费当前页时提交。各账号的推文本身按时间倒序返回，
+    使用k路堆合并产出整体按时间倒序的推文流，无需收集后排序。
+
+    Args:
+        group_manager: GroupManager实例
+        group_name: 分组名
+        page_size: 每页推文数(5-100)
+        max_pages: 每个账号最多获取的页数，为None时获取完整时间线
+        start_time: 最早时间
+        end_time: 最晚时间
+        max_workers: 并发请求数
+        tweet_store: 推文存储，获取到的推文会同时写入
+
+    Returns:
+        按created_at从新到旧排列的推文迭代器
+    """
+    from core.twitter_api import TwitterAPI, DEFAULT_TWEET_FIELDS
+
+    accounts = [acc for acc in group_manager.get_accounts_in_group(group_name)
+                if acc.token and acc.id]
+    page_size = max(5, min(100, page_size))
+    tweet_fields = DEFAULT_TWEET_FIELDS + ("author_id",)
+    executor = ThreadPoolExecutor(max_workers=max_workers,
+                                  thread_name_prefix="GroupTimeline")
+    try:
+        streams = []
+        for acc in accounts:
+            api = TwitterAPI(acc.token, tweet_store=tweet_store)
+
+            def fetch(token, api=api, user_id=acc.id):
+                return api.get_user_tweets(
+                    user_id,
+                    max_results=page_size,
+                    pagination_token=token,
+                    start_time=start_time,
+                    end_time=end_time,
+                    tweet_fields=tweet_fields
+                )
+
+            first_page = executor.submit(fetch, None)
+            streams.append(_account_stream(executor, first_page, fetch,
+                                           acc, max_pages))
+
+        logger.info(f"开始获取分组 {group_name} 的时间线: {len(streams)} 个账号")
+        yield from heapq.merge(
+            *streams,
+            key=lambda tweet: tweet.get('created_at', ''),
+            reverse=True
+        )
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
\ No newline at end of file
@@ -0,0 +1,138 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional, Tuple
+
+from core.twitter_api import TwitterAPI, DEFAULT_TWEET_FIELDS
+from core.tweet_store import get_shared_store
+
+logger = logging.getLogger("TimelineSync")
+
+SYNC_TWEET_FIELDS = DEFAULT_TWEET_FIELDS + ("author_id",)
+
+# initial_pages参数未传入时使用构造时的设置(None表示不限页数)
+_DEFAULT = object()
+
+
+def newest_tweet_id(tweets: List[Dict], current: Optional[str] = None) -> Optional[str]:
+    """返回推文列表中最新的推文ID(推文ID按数值递增)"""
+    newest = int(current) if current else 0
+    for tweet in tweets:
+        tweet_id = int(tweet['id'])
+        if tweet_id > newest:
+            newest = tweet_id
+    return str(newest) if newest else None
+
+
+class TimelineSync:
+    """基于since_id的增量时间线同步
+
+    每个账号记录已同步的最新推文ID(高水位)，刷新时只请求更新的推文，
+    分组内所有账号的更新合并写入同一个本地存储。
+
+    没有高水位的账号首次同步时只拉取最新的initial_pages页，不回溯更早的
+    历史推文；之后的同步获取高水位之后的全部新推文。需要完整历史时
+    可在调用sync_account/sync_group时传入更大的initial_pages(None为不限)。
+    """
+
+    def __init__(self, group_manager, store=None, page_size: int = 100,
+                 initial_pages: int = 1, max_workers: int = 5):
+        """初始化同步器
+
+        Args:
+            group_manager: GroupManager实例，保存各账号的高水位
+            store: 推文存储，需提供upsert_tweets(tweets)方法，默认为共享的TweetStore
+            page_size: 每页推文数
+            initial_pages: 首次同步(无高水位)时默认最多拉取的页数
+            max_workers: 并发同步的账号数
+        """
+        self.group_manager = group_manager
+        self.store = store if store is not None else get_shared_store()
+        self.page_size = page_size
+        self.initial_pages = initial_pages
+        self.max_workers = max_workers
+
+    def sync_account(self, account,
+                     initial_pages: Optional[int] = _DEFAULT) -> Tuple[int, Optional[str]]:
+        """同步单个账号的新推文
+
+        Args:
+            account: AccountRecord，需包含token和id
+            initial_pages: 首次同步时最多拉取的页数，为None时拉取完整时间线，
+                默认使用构造时的设置
+
+        Returns:
+            (获取的推文数, 新的高水位)
+        """
+        if initial_pages is _DEFAULT:
+            initial_pages = self.initial_pages
+        since_id = account.since_id
+        api = TwitterAPI(account.token)
+        timeline = api.iter_user_tweets(
+            account.id,
+            page_size=self.page_size,
+            tweet_fields=SYNC_TWEET_FIELDS,
+            since_id=since_id,
+            max_pages=None if since_id else initial_pages,
+            use_cache=False
+        )
+
+        fetched = 0
+        newest = since_id
+        for page in timeline.pages():
+            tweets = page.get('data', [])
+            if not tweets:
+                continue
+            for tweet in tweets:
+                tweet.setdefault('author_id', account.id)
+            self.store.upsert_tweets(tweets)
+            newest = newest_tweet_id(tweets, newest)
+            fetched += len(tweets)
+
+        logger.debug(f"同步账号 {account.username}: {fetched} 条新推文")
+        return fetched, newest
+
+    def sync_group(self, group_name: str,
+                   progress_callback: Optional[Callable] = None,
+                   initial_pages: Optional[int] = _DEFAULT) -> Dict:
+        """并发同步分组中所有账号的新推文
+
+        Args:
+            group_name: 分组名
+            progress_callback: 进度信号，emit(进度百分比, 状态消息)
+            initial_pages: 首次同步的账号最多拉取的页数，见sync_account
+
+        Returns:
+            同步结果摘要
+        """
+        accounts = [acc for acc in self.group_manager.get_accounts_in_group(group_name)
+                    if acc.token and acc.id]
+        total = len(accounts)
+        marks: Dict[str, str] = {}
+        fetched = 0
+        failed = 0
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self.sync_account, acc, initial_pages): acc
+                       for acc in accounts}
+            for i, future in enumerate(as_completed(futures), 1):
+                acc = futures[future]
+                try:
+                    count, newest = future.result()
+                    fetched += count
+                    if newest:
+                        marks[acc.username] = newest
+                except Exception as e:
+                    failed += 1
+                    logger.warning(f"同步账号 {acc.username} 失败: {str(e)}")
+                if progress_callback:
+                    progress_callback.emit(
+                        int((i / total) * 100), f"同步中 {i}/{total}")
+
+        self.group_manager.update_since_ids(marks)
+        logger.info(f"分组 {group_name} 同步完成: {fetched} 条新推文, {failed} 个账号失败")
+        return {
+            'group': group_name,
+            'accounts': total,
+            'fetched': fetched,
+            'failed': failed
+        }
@@ -0,0 +1,247 @@
+import json
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger("TweetStore")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tweets (
+    id INTEGER PRIMARY KEY,
+    author_id TEXT,
+    created_at TEXT,
+    text TEXT,
+    retweet_count INTEGER DEFAULT 0,
+    reply_count INTEGER DEFAULT 0,
+    like_count INTEGER DEFAULT 0,
+    quote_count INTEGER DEFAULT 0,
+    impression_count INTEGER DEFAULT 0,
+    raw TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_tweets_author_created ON tweets(author_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_tweets_created ON tweets(created_at);
+CREATE INDEX IF NOT EXISTS idx_tweets_likes ON tweets(like_count);
+CREATE INDEX IF NOT EXISTS idx_tweets_retweets ON tweets(retweet_count);
+CREATE INDEX IF NOT EXISTS idx_tweets_impressions ON tweets(impression_count);
+CREATE TEMP TABLE IF NOT EXISTS author_filter (author_id TEXT PRIMARY KEY);
+"""
+
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS tweets_fts USING fts5(
+    text, content='tweets', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS tweets_ai AFTER INSERT ON tweets BEGIN
+    INSERT INTO tweets_fts(rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS tweets_ad AFTER DELETE ON tweets BEGIN
+    INSERT INTO tweets_fts(tweets_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+CREATE TRIGGER IF NOT EXISTS tweets_au AFTER UPDATE OF text ON tweets BEGIN
+    INSERT INTO tweets_fts(tweets_fts, rowid, text) VALUES ('delete', old.id, old.text);
+    INSERT INTO tweets_fts(rowid, text) VALUES (new.id, new.text);
+END;
+"""
+
+_UPSERT = """
+INSERT INTO tweets (id, author_id, created_at, text, retweet_count, reply_count,
+                    like_count, quote_count, impression_count, raw)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(id) DO UPDATE SET
+    author_id = excluded.author_id,
+    created_at = excluded.created_at,
+    text = excluded.text,
+    retweet_count = excluded.retweet_count,
+    reply_count = excluded.reply_count,
+    like_count = excluded.like_count,
+    quote_count = excluded.quote_count,
+    impression_count = excluded.impression_count,
+    raw = excluded.raw
+"""
+
+METRIC_COLUMNS = ('retweet_count', 'reply_count', 'like_count',
+                  'quote_count', 'impression_count')
+
+
+class TweetStore:
+    """本地推文存储，基于SQLite，带全文索引
+
+    推文按ID去重保存，作者、发布时间和互动指标均建有索引，
+    正文使用FTS5全文索引(不可用时退化为LIKE查询)。
+    """
+
+    def __init__(self, db_path: str = "config/tweets.db"):
+        """初始化存储
+
+        Args:
+            db_path: 数据库文件路径
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        try:
+            self._conn.executescript(_FTS_SCHEMA)
+            self.has_fts = True
+        except sqlite3.OperationalError as e:
+            logger.warning(f"FTS5不可用，全文搜索将使用LIKE: {str(e)}")
+            self.has_fts = False
+        self._conn.commit()
+
+    def _fill_author_filter(self, author_ids: List[str]):
+        """把作者ID写入连接的临时表(需持有锁)
+
+        按作者过滤时与临时表关联，而不是展开成IN (?, ?, ...)，
+        大分组的作者数不受SQLite变量数上限的限制。
+        """
+        with self._conn:
+            self._conn.execute("DELETE FROM temp.author_filter")
+            self._conn.executemany("INSERT OR IGNORE INTO temp.author_filter VALUES (?)",
+                                   ((author_id,) for author_id in author_ids))
+
+    @staticmethod
+    def _row_from_tweet(tweet: Dict, author_id: Optional[str]) -> tuple:
+        metrics = tweet.get('public_metrics') or {}
+        return (
+            int(tweet['id']),
+            tweet.get('author_id') or author_id,
+            tweet.get('created_at'),
+            tweet.get('text', ''),
+            *(int(metrics.get(col, 0) or 0) for col in METRIC_COLUMNS),
+            json.dumps(tweet, ensure_ascii=False)
+        )
+
+    def upsert_tweets(self, tweets: Iterable[Dict],
+                      author_id: Optional[str] = None) -> int:
+        """批量写入推文，已存在的推文更新正文和互动指标
+
+        Args:
+            tweets: 推文列表(API返回的data数组)
+            author_id: 推文不含author_id时使用的作者ID
+
+        Returns:
+            写入的推文数
+        """
+        rows = [self._row_from_tweet(t, author_id) for t in tweets]
+        if not rows:
+            return 0
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(_UPSERT, rows)
+        return len(rows)
+
+    def search(self, query: Optional[str] = None,
+               author_ids: Optional[Iterable[str]] = None,
+               start_time: Optional[str] = None,
+               end_time: Optional[str] = None,
+               order_by: str = 'created_at',
+               limit: int = 100) -> List[Dict]:
+        """关键词与时间范围搜索
+
+        Args:
+            query: 关键词，多个词之间为AND关系
+            author_ids: 限定作者ID
+            start_time: 最早发布时间(ISO 8601)
+            end_time: 最晚发布时间(ISO 8601)
+            order_by: 排序字段，created_at或某个互动指标，均为降序
+            limit: 最大结果数
+
+        Returns:
+            推文列表
+        """
+        if order_by != 'created_at' and order_by not in METRIC_COLUMNS:
+            raise ValueError(f"不支持的排序字段: {order_by}")
+
+        clauses = []
+        params: list = []
+        if query and query.strip():
+            terms = query.split()
+            if self.has_fts:
+                clauses.append(
+                    "t.id IN (SELECT rowid FROM tweets_fts WHERE tweets_fts MATCH ?)")
+                params.append(" ".join(
+                    '"' + term.replace('"', '""') + '"' for term in terms))
+            else:
+                for term in terms:
+                    clauses.append("t.text LIKE ?")
+                    params.append(f"%{term}%")
+        if author_ids is not None:
+            author_ids = list(author_ids)
+            if not author_ids:
+                return []
+            clauses.append("t.author_id IN (SELECT author_id FROM temp.author_filter)")
+        if start_time:
+            clauses.append("t.created_at >= ?")
+            params.append(start_time)
+        if end_time:
+            clauses.append("t.created_at <= ?")
+            params.append(end_time)
+
+        sql = "SELECT t.raw FROM tweets t"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += f" ORDER BY t.{order_by} DESC LIMIT ?"
+        params.append(limit)
+
+        with self._lock:
+            if author_ids is not None:
+                self._fill_author_filter(author_ids)
+            rows = self._conn.execute(sql, params).fetchall()
+        return [json.loads(row['raw']) for row in rows]
+
+    def search_group(self, group_manager, group_name: str, **kwargs) -> List[Dict]:
+        """在分组内所有账号的推文中搜索，参数同search"""
+        author_ids = [acc.id for acc in group_manager.get_accounts_in_group(group_name)
+                      if acc.id]
+        return self.search(author_ids=author_ids, **kwargs)
+
+    def load_metrics(self, author_ids: Optional[Iterable[str]] = None) -> List[tuple]:
+        """按列读取推文指标，供分析模块构建数组
+
+        Args:
+            author_ids: 限定作者ID，为None时读取全部
+
+        Returns:
+            (id, author_id, created_at秒级时间戳, retweet, reply, like, quote, impression)元组列表
+        """
+        sql = ("SELECT id, author_id, CAST(strftime('%s', created_at) AS INTEGER), "
+               + ", ".join(METRIC_COLUMNS) + " FROM tweets")
+        if author_ids is not None:
+            author_ids = list(author_ids)
+            if not author_ids:
+                return []
+            sql += " WHERE author_id IN (SELECT author_id FROM temp.author_filter)"
+        with self._lock:
+            if author_ids is not None:
+                self._fill_author_filter(author_ids)
+            cursor = self._conn.execute(sql)
+            cursor.row_factory = None
+            return cursor.fetchall()
+
+    def count(self) -> int:
+        """推文总数"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM tweets").fetchone()[0]
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
+
+
+_shared_store: Optional[TweetStore] = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_store() -> TweetStore:
+    """获取进程内共享的推文存储"""
+    global _shared_store
+    with _shared_lock:
+        if _shared_store is None:
+            _shared_store = TweetStore()
+        return _shared_store
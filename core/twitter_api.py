@@ -1,23 +1,82 @@
-import requests
-from PyQt5.QtWidgets import QMessageBox
-from requests.exceptions import RequestException
+from PyQt5.QtWidgets import QMessageBox, QApplication
+from PyQt5.QtCore import QThread
+from requests.exceptions import ProxyError, RequestException, Timeout
 import json
 import logging
-from typing import Dict, Any, Optional
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Dict, Any, Iterable, Optional, Union
+from urllib.parse import urlparse
+from core.cache import ResponseCache, get_shared_cache
+from core.cassette import get_transport
+from core.circuit_breaker import get_breaker
+from core.http_client import DeadlineExceeded, HttpClient, get_shared_client
+from core.proxy_pool import get_shared_proxy_pool
+
+if TYPE_CHECKING:
+    from core.timeline import TimelineIterator
 
 logger = logging.getLogger("TwitterAPI")
 
+DEFAULT_TWEET_FIELDS = ("created_at", "public_metrics")
+
+TimeArg = Optional[Union[datetime, str]]
+
+
+def _format_time(value: Union[datetime, str]) -> str:
+    """将时间转换为API要求的ISO 8601格式(UTC)"""
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value.strftime("%Y-%m-%dT%H:%M:%SZ")
+    return value
+
+
 class TwitterAPIError(Exception):
-    """自定义Twitter API错误"""
-    pass
+    """自定义Twitter API错误
+    
+    Attributes:
+        status_code: HTTP状态码，网络错误时为None
+        timeout: 是否为请求超时
+        network: 是否为网络连接错误(未收到响应)
+    """
+    def __init__(self, message: str, status_code: Optional[int] = None,
+                 timeout: bool = False, network: bool = False):
+        super().__init__(message)
+        self.status_code = status_code
+        self.timeout = timeout
+        self.network = network
+    
+    def with_context(self, prefix: str) -> "TwitterAPIError":
+        """返回添加了前缀说明的同类错误，保留状态码等信息"""
+        error = type(self).__new__(type(self))
+        error.__dict__.update(self.__dict__)
+        error.args = (f"{prefix}: {str(self)}",)
+        return error
+
+class CircuitOpenError(TwitterAPIError):
+    """目标主机已熔断，请求未发出"""
+    circuit_open = True
+    
+    def __init__(self, message: str, retry_after: float = 0.0):
+        super().__init__(message, network=True)
+        self.retry_after = retry_after
+
 
 class TwitterAPI:
-    def __init__(self, bearer_token: str, parent_ui=None):
+    def __init__(self, bearer_token: str, parent_ui=None,
+                 cache: Optional[ResponseCache] = None,
+                 tweet_store=None,
+                 http_client: Optional[HttpClient] = None):
         """初始化Twitter API客户端
         
         Args:
             bearer_token: Twitter Bearer Token
             parent_ui: 父UI组件，用于显示错误消息
+            cache: 响应缓存，默认使用进程内共享缓存
+            tweet_store: 推文存储(TweetStore)，获取到的推文会批量写入
+            http_client: HTTP客户端，默认使用共享连接池，超时取自其配置；
+                共享代理池配置了代理时改为经该token绑定的代理发送。
+                设置了录制器或回放器(core.cassette)时经其包装或替代
         """
         self.base_url = "https://api.twitter.com/2/"
         self.headers = {
@@ -25,6 +84,17 @@ class TwitterAPI:
             "Content-Type": "application/json"
         }
         self.parent_ui = parent_ui
+        self.bearer_token = bearer_token
+        self.cache = cache if cache is not None else get_shared_cache()
+        self.tweet_store = tweet_store
+        if http_client is None:
+            proxy_pool = get_shared_proxy_pool()
+            http_client = (proxy_pool.client_for(bearer_token) if proxy_pool.enabled
+                           else get_shared_client())
+        transport = get_transport()
+        if transport is not None:
+            http_client = transport.wrap(http_client)
+        self.http = http_client
         self.logger = logging.getLogger(f"TwitterAPI.{id(self)}")
     
     def _handle_request(self, method: str, endpoint: str, 
@@ -47,30 +117,79 @@ class TwitterAPI:
         url = f"{self.base_url}{endpoint}"
         self.logger.debug(f"请求 {method} {url}")
         
+        host = urlparse(url).netloc
+        breaker = get_breaker(host)
+        if not breaker.allow_request():
+            raise CircuitOpenError(
+                f"{host} 暂时不可用(熔断中)", retry_after=breaker.retry_after())
+        
         try:
-            response = requests.request(
+            # 只有幂等的GET可以发送对冲副本
+            response = self.http.request(
                 method,
                 url,
                 headers=self.headers,
                 params=params,
                 json=data,
-                timeout=30
+                hedge=(method == 'GET')
             )
             
             self.logger.debug(f"响应状态码: {response.status_code}")
             
+            # 5xx视为主机故障，其余响应说明主机可达
+            if response.status_code >= 500:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            
             if response.status_code != 200:
                 error_msg = self._parse_error(response)
                 self.logger.error(f"API请求失败: {error_msg}")
-                raise TwitterAPIError(error_msg)
+                raise TwitterAPIError(error_msg, status_code=response.status_code)
                 
             return response.json()
             
+        except DeadlineExceeded:
+            # 任务项时限已到，请求没有发出，与主机状态无关
+            breaker.release_probe()
+            raise
         except RequestException as e:
+            # 代理故障由代理池记录并改绑，不计入目标主机的熔断
+            if not isinstance(e, ProxyError):
+                breaker.record_failure()
             error_msg = f"网络请求失败: {str(e)}"
             self.logger.error(error_msg)
             self._show_error(error_msg)
-            raise TwitterAPIError(error_msg)
+            raise TwitterAPIError(error_msg, timeout=isinstance(e, Timeout),
+                                  network=True)
+    
+    def _cached_get(self, cache_name: str, endpoint: str,
+                    params: Optional[Dict] = None,
+                    token_scoped: bool = False,
+                    use_cache: bool = True) -> Dict:
+        """带缓存的GET请求
+        
+        Args:
+            cache_name: 缓存端点名，决定TTL
+            endpoint: API端点
+            params: 查询参数
+            token_scoped: 响应是否依赖token，为True时缓存按token隔离
+            use_cache: 为False时跳过缓存直接请求
+            
+        Returns:
+            API响应数据
+        """
+        if not use_cache:
+            return self._handle_request('GET', endpoint, params=params)
+        
+        key = ResponseCache.make_key(
+            cache_name, endpoint, params,
+            token=self.bearer_token if token_scoped else None
+        )
+        return self.cache.get_or_fetch(
+            cache_name, key,
+            lambda: self._handle_request('GET', endpoint, params=params)
+        )
     
     def _parse_error(self, response) -> str:
         """解析API错误信息
@@ -93,10 +212,15 @@ class TwitterAPI:
     def _show_error(self, message: str):
         """显示错误消息到UI
         
+        只在GUI线程中弹窗；工作线程中的错误由调用方汇总后通过信号报告。
+        
         Args:
             message: 错误消息
         """
-        if self.parent_ui:
+        if not self.parent_ui:
+            return
+        app = QApplication.instance()
+        if app is not None and QThread.currentThread() is app.thread():
             QMessageBox.critical(self.parent_ui, "API错误", message)
     
     def verify_credentials(self) -> Dict:
@@ -109,18 +233,33 @@ class TwitterAPI:
             TwitterAPIError: 当验证失败时
         """
         try:
-            user_data = self._handle_request('GET', 'users/me')
+            user_data = self._handle_request(
+                'GET', 'users/me', params={"user.fields": "profile_image_url"})
             self.logger.info(f"验证成功: {user_data.get('data', {}).get('username')}")
             return user_data
         except TwitterAPIError as e:
-            raise TwitterAPIError(f"验证凭证失败: {str(e)}")
+            raise e.with_context("验证凭证失败") from e
     
-    def get_user_tweets(self, user_id: str, max_results: int = 10) -> Dict:
+    def get_user_tweets(self, user_id: str, max_results: int = 10,
+                        pagination_token: Optional[str] = None,
+                        start_time: TimeArg = None,
+                        end_time: TimeArg = None,
+                        tweet_fields: Optional[Iterable[str]] = None,
+                        since_id: Optional[str] = None,
+                        use_cache: bool = True) -> Dict:
         """获取用户推文
         
+        受保护账号的推文仅对部分token可见，因此缓存按token隔离。
+        
         Args:
             user_id: 用户ID
             max_results: 最大结果数
+            pagination_token: 分页token，取自上一页的meta.next_token
+            start_time: 最早时间(datetime或ISO 8601字符串)
+            end_time: 最晚时间(datetime或ISO 8601字符串)
+            tweet_fields: 返回的推文字段，默认为DEFAULT_TWEET_FIELDS
+            since_id: 只返回比该ID更新的推文
+            use_cache: 是否使用响应缓存
             
         Returns:
             推文数据
@@ -130,22 +269,74 @@ class TwitterAPI:
         """
         params = {
             "max_results": max_results,
-            "tweet.fields": "created_at,public_metrics"
+            "tweet.fields": ",".join(tweet_fields or DEFAULT_TWEET_FIELDS)
         }
+        if pagination_token:
+            params["pagination_token"] = pagination_token
+        if start_time:
+            params["start_time"] = _format_time(start_time)
+        if end_time:
+            params["end_time"] = _format_time(end_time)
+        if since_id:
+            params["since_id"] = since_id
         try:
-            return self._handle_request(
-                'GET', 
-                f'users/{user_id}/tweets', 
-                params=params
+            result = self._cached_get(
+                'user_tweets',
+                f'users/{user_id}/tweets',
+                params=params,
+                token_scoped=True,
+                use_cache=use_cache
             )
         except TwitterAPIError as e:
-            raise TwitterAPIError(f"获取推文失败: {str(e)}")
+            raise e.with_context("获取推文失败") from e
+        
+        if self.tweet_store is not None and result.get('data'):
+            self.tweet_store.upsert_tweets(result['data'], author_id=user_id)
+        return result
     
-    def get_user_info(self, username: str) -> Dict:
+    def iter_user_tweets(self, user_id: str, page_size: int = 100,
+                         start_time: TimeArg = None,
+                         end_time: TimeArg = None,
+                         tweet_fields: Optional[Iterable[str]] = None,
+                         prefetch: int = 1,
+                         max_pages: Optional[int] = None,
+                         since_id: Optional[str] = None,
+                         use_cache: bool = False) -> "TimelineIterator":
+        """按页流式遍历用户的完整时间线
+        
+        Args:
+            user_id: 用户ID
+            page_size: 每页推文数(5-100)
+            start_time: 最早时间
+            end_time: 最晚时间
+            tweet_fields: 返回的推文字段
+            prefetch: 预取页数，处理当前页时后台提前获取后续页
+            max_pages: 最多获取的页数，为None时直到最后一页
+            since_id: 只遍历比该ID更新的推文
+            use_cache: 是否使用响应缓存，默认不使用
+            
+        Returns:
+            TimelineIterator，可用for或async for逐条遍历推文
+        """
+        from core.timeline import TimelineIterator
+        return TimelineIterator(
+            self, user_id,
+            page_size=page_size,
+            start_time=start_time,
+            end_time=end_time,
+            tweet_fields=tweet_fields,
+            prefetch=prefetch,
+            max_pages=max_pages,
+            since_id=since_id,
+            use_cache=use_cache
+        )
+    
+    def get_user_info(self, username: str, use_cache: bool = True) -> Dict:
         """获取用户信息
         
         Args:
             username: Twitter用户名
+            use_cache: 是否使用响应缓存
             
         Returns:
             用户信息
@@ -157,10 +348,11 @@ class TwitterAPI:
             "user.fields": "description,profile_image_url"
         }
         try:
-            return self._handle_request(
-                'GET',
+            return self._cached_get(
+                'user_info',
                 f'users/by/username/{username}',
-                params=params
+                params=params,
+                use_cache=use_cache
             )
         except TwitterAPIError as e:
-            raise TwitterAPIError(f"获取用户信息失败: {str(e)}")
\ No newline at end of file
+            raise e.with_context("获取用户信息失败") from e
\ No newline at end of file
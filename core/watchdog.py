@@ -0,0 +1,190 @@
+import bisect
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, deque
+from typing import Dict, List, Optional, Tuple
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+logger = logging.getLogger("Watchdog")
+
+# 事件循环延迟直方图的桶上限(毫秒)，最后一个桶为无上限
+LAG_BUCKETS_MS = (16, 50, 100, 250, 500, 1000, 2000, 5000)
+# 项目源码目录，用于在堆栈中定位项目内的阻塞调用
+_THIS_FILE = os.path.abspath(__file__)
+_PROJECT_DIR = os.path.dirname(os.path.dirname(_THIS_FILE))
+
+
+class StallRecord:
+    """一次界面卡顿
+
+    Attributes:
+        started: 开始时间(时间戳)
+        duration: 持续时间(秒)
+        samples: 卡顿期间采集的堆栈样本数
+        stacks: (堆栈, 出现次数)列表，按次数降序；堆栈为 "文件:行 函数" 的列表，最内层在后
+        culprit: 最常见堆栈中最内层的项目代码位置
+    """
+
+    __slots__ = ('started', 'duration', 'samples', 'stacks', 'culprit')
+
+    def __init__(self, started: float, duration: float,
+                 stacks: List[Tuple[Tuple[str, ...], int]]):
+        self.started = started
+        self.duration = duration
+        self.samples = sum(count for _, count in stacks)
+        self.stacks = stacks
+        self.culprit = _find_culprit(stacks[0][0]) if stacks else None
+
+    def format_stack(self) -> str:
+        """最常见的堆栈，每帧一行"""
+        if not self.stacks:
+            return "(卡顿期间未采集到堆栈样本)"
+        stack, count = self.stacks[0]
+        return f"{count}/{self.samples}个样本:\n" + "\n".join(f"  {frame}" for frame in stack)
+
+
+def _find_culprit(stack: Tuple[str, ...]) -> Optional[str]:
+    for frame in reversed(stack):
+        if frame.startswith(_PROJECT_DIR) and not frame.startswith(_THIS_FILE):
+            return os.path.relpath(frame, _PROJECT_DIR)
+    return stack[-1] if stack else None
+
+
+class EventLoopWatchdog(QObject):
+    """Qt事件循环卡顿监测
+
+    GUI线程中的心跳定时器按固定间隔触发，实际间隔超出部分即事件循环延迟，
+    计入直方图。采样线程在心跳超过阈值未到达时，通过sys._current_frames
+    周期性采集GUI线程的Python堆栈，直到心跳恢复；恢复后汇总为一条卡顿记录，
+    写入日志并通过stall_detected信号通知界面。
+    """
+
+    stall_detected = pyqtSignal(object)  # StallRecord
+
+    def __init__(self, interval_ms: int = 50, threshold_ms: int = 200,
+                 sample_interval_ms: int = 50, window: int = 1200,
+                 max_records: int = 50, parent: Optional[QObject] = None):
+        """初始化监测
+
+        必须在GUI线程中创建。
+
+        Args:
+            interval_ms: 心跳间隔(毫秒)
+            threshold_ms: 延迟超过该值(毫秒)视为卡顿并采集堆栈
+            sample_interval_ms: 卡顿期间的采样间隔(毫秒)
+            window: 计算分位数使用的最近心跳数
+            max_records: 保留的卡顿记录数
+        """
+        super().__init__(parent)
+        self.interval = interval_ms / 1000
+        self.threshold = threshold_ms / 1000
+        self.sample_interval = sample_interval_ms / 1000
+        self._gui_thread_id = threading.get_ident()
+        self._lock = threading.Lock()
+        self._timer = QTimer(self)
+        self._timer.setInterval(interval_ms)
+        self._timer.timeout.connect(self._beat)
+        self._last_beat = time.monotonic()
+        self._histogram = [0] * (len(LAG_BUCKETS_MS) + 1)
+        self._recent = deque(maxlen=window)
+        self._sorted: List[float] = []
+        self._max_lag = 0.0
+        self._beats = 0
+        self._stall_count = 0
+        self._stall_time = 0.0
+        self._samples: Counter = Counter()
+        self._records = deque(maxlen=max_records)
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+
+    def start(self):
+        """启动心跳和采样线程"""
+        if self._timer.isActive():
+            return
+        self._last_beat = time.monotonic()
+        self._timer.start()
+        self._stop.clear()
+        self._sampler = threading.Thread(target=self._sample_loop, name="WatchdogSampler",
+                                         daemon=True)
+        self._sampler.start()
+
+    def stop(self):
+        self._timer.stop()
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join(timeout=1)
+            self._sampler = None
+
+    def _beat(self):
+        """GUI线程: 记录延迟，结束进行中的卡顿"""
+        now = time.monotonic()
+        with self._lock:
+            elapsed = now - self._last_beat
+            self._last_beat = now
+            samples, self._samples = self._samples, Counter()
+        lag = max(0.0, elapsed - self.interval)
+        self._record_lag(lag)
+        if lag >= self.threshold:
+            record = StallRecord(time.time() - elapsed, elapsed, samples.most_common())
+            self._records.append(record)
+            self._stall_count += 1
+            self._stall_time += elapsed
+            logger.warning(f"界面卡顿 {elapsed * 1000:.0f}ms，阻塞位置: {record.culprit or '未知'}\n"
+                           f"{record.format_stack()}")
+            self.stall_detected.emit(record)
+
+    def _record_lag(self, lag: float):
+        lag_ms = lag * 1000
+        self._histogram[bisect.bisect_right(LAG_BUCKETS_MS, lag_ms)] += 1
+        with self._lock:
+            if len(self._recent) == self._recent.maxlen:
+                del self._sorted[bisect.bisect_left(self._sorted, self._recent[0])]
+            self._recent.append(lag)
+            bisect.insort(self._sorted, lag)
+        self._max_lag = max(self._max_lag, lag)
+        self._beats += 1
+
+    def _sample_loop(self):
+        """采样线程: 心跳超过阈值未到达时采集GUI线程的堆栈"""
+        while not self._stop.wait(self.sample_interval):
+            with self._lock:
+                overdue = time.monotonic() - self._last_beat - self.interval
+            if overdue < self.threshold:
+                continue
+            frame = sys._current_frames().get(self._gui_thread_id)
+            if frame is None:
+                continue
+            stack = tuple(f"{f.filename}:{f.lineno} {f.name}"
+                          for f in traceback.extract_stack(frame, limit=40))
+            del frame
+            with self._lock:
+                self._samples[stack] += 1
+
+    def percentile(self, q: float) -> float:
+        """最近心跳延迟的分位数(秒)"""
+        with self._lock:
+            if not self._sorted:
+                return 0.0
+            return self._sorted[min(len(self._sorted) - 1, int(len(self._sorted) * q))]
+
+    def stats(self) -> Dict:
+        """延迟统计: 心跳数、分位数、最大值、卡顿次数与总时长和直方图"""
+        labels = [f"<{b}ms" for b in LAG_BUCKETS_MS] + [f">={LAG_BUCKETS_MS[-1]}ms"]
+        return {
+            'beats': self._beats,
+            'p50': self.percentile(0.5),
+            'p99': self.percentile(0.99),
+            'max': self._max_lag,
+            'stalls': self._stall_count,
+            'stall_time': self._stall_time,
+            'histogram': list(zip(labels, self._histogram)),
+        }
+
+    def records(self) -> List[StallRecord]:
+        """最近的卡顿记录，最新的在前"""
+        return list(reversed(self._records))
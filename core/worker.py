@@ -1,8 +1,13 @@
 from PyQt5.QtCore import QObject, pyqtSignal, QRunnable, pyqtSlot
-from PyQt5.QtWidgets import QMessageBox
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
 import traceback
 import logging
-from typing import Callable, Any, Optional, Dict
+from typing import Callable, Optional, Dict
+from core.concurrency import (AdaptiveLimiter, classify_error, OUTCOME_OK,
+                              OUTCOME_CIRCUIT_OPEN, RETRYABLE_OUTCOMES)
+from core.http_client import request_deadline
 
 logger = logging.getLogger("Worker")
 
@@ -12,6 +17,8 @@ class WorkerSignals(QObject):
     error = pyqtSignal(str)
     result = pyqtSignal(object)
     progress = pyqtSignal(int, str)  # (进度百分比, 状态消息)
+    concurrency = pyqtSignal(int)  # 当前并发数
+    summary = pyqtSignal(object)  # 批量任务的错误汇总
 
 class Worker(QRunnable):
     """通用工作线程，用于执行耗时操作而不阻塞UI"""
@@ -86,4 +93,197 @@ class BatchWorker(Worker):
                 )
                 continue
         
+        return results
+
+class ErrorAggregator:
+    """汇总批量任务中的错误，任务结束后一次性报告，而不是逐条弹窗"""
+    
+    CATEGORY_NAMES = {
+        'throttled': "请求被限流",
+        'timeout': "请求超时",
+        'network': "网络错误",
+        'circuit_open': "服务不可用",
+        'error': "其他错误",
+    }
+    
+    def __init__(self, max_samples: int = 3):
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        self.counts: Dict[str, int] = {}
+        self.samples: Dict[str, list] = {}
+    
+    def add(self, category: str, message: str):
+        """记录一个错误"""
+        with self._lock:
+            self.counts[category] = self.counts.get(category, 0) + 1
+            samples = self.samples.setdefault(category, [])
+            if len(samples) < self.max_samples and message not in samples:
+                samples.append(message)
+    
+    def __bool__(self):
+        return bool(self.counts)
+    
+    def summary(self) -> Dict:
+        """错误汇总: 总数、各类别数量和示例消息"""
+        with self._lock:
+            return {
+                'total': sum(self.counts.values()),
+                'counts': dict(self.counts),
+                'samples': {k: list(v) for k, v in self.samples.items()},
+            }
+    
+    @classmethod
+    def format(cls, summary: Dict) -> str:
+        """将汇总格式化为可读文本"""
+        lines = [f"共 {summary['total']} 项失败:"]
+        for category, count in summary['counts'].items():
+            lines.append(f"  {cls.CATEGORY_NAMES.get(category, category)}: {count}")
+            for sample in summary['samples'].get(category, []):
+                lines.append(f"    - {sample}")
+        return "\n".join(lines)
+
+
+class AdaptiveBatchWorker(BatchWorker):
+    """自适应并发的批量处理工作线程
+    
+    并发数由AdaptiveLimiter按延迟、错误率和限流情况动态调整。
+    因限流、超时或网络错误失败的项会退避后重试，结果顺序与输入一致。
+    目标主机熔断时暂停整个批量任务，熔断结束后继续。
+    设置item_deadline后每项(含重试)的总耗时不超过该时限，
+    一个卡住的连接不会拖住整个批量任务。
+    最终失败的项汇总后通过signals.summary报告一次。
+
+    executor为None时使用私有线程池；由TaskScheduler.start_batch启动时，
+    逐项请求提交到调度器，与其他任务按优先级共享线程。
+    """
+    
+    def __init__(self, items: list, process_func: Callable,
+                 limiter: AdaptiveLimiter, *args,
+                 max_retries: int = 3, retry_backoff: float = 2.0,
+                 item_deadline: Optional[float] = None, **kwargs):
+        """初始化自适应批量工作线程
+        
+        Args:
+            items: 要处理的项列表
+            process_func: 处理单个项的函数
+            limiter: 并发限制器
+            *args: 传递给process_func的位置参数
+            max_retries: 限流、超时或网络错误时每项的最大重试次数
+            retry_backoff: 重试的基础退避时间(秒)，按重试次数指数增长
+            item_deadline: 每项从首次执行起的总时限(秒)，期间的请求超时
+                被截短为剩余时间，到期后不再重试；为None时不限制
+            **kwargs: 传递给process_func的关键字参数
+        """
+        self.limiter = limiter
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.item_deadline = item_deadline
+        self.errors = ErrorAggregator()
+        self.executor = None
+        super().__init__(items, process_func, *args, **kwargs)
+    
+    def _batch_process(self, items: list, process_func: Callable,
+                      progress_callback: Callable, *args, **kwargs):
+        """并发批量处理项"""
+        total = len(items)
+        results = [None] * total
+        lock = threading.Lock()
+        done = [0]
+        pending = list(range(total))
+        retries = {}
+        not_before = {}  # 重试项退避结束的时间，之前不派发
+        started = {}  # 项首次执行的时间，用于计算时限
+        pause_until = [0.0]
+        
+        def run_one(index: int):
+            start = time.monotonic()
+            first_start = started.setdefault(index, start)
+            remaining = None
+            if self.item_deadline is not None:
+                remaining = self.item_deadline - (start - first_start)
+            error = None
+            outcome = OUTCOME_OK
+            try:
+                with request_deadline(remaining):
+                    results[index] = process_func(items[index], *args, **kwargs)
+            except Exception as e:
+                error = e
+                outcome = classify_error(e)
+            self.limiter.release(time.monotonic() - start, outcome)
+            self.signals.concurrency.emit(self.limiter.limit)
+            
+            if outcome == OUTCOME_CIRCUIT_OPEN:
+                # 请求未发出，暂停派发直到熔断结束，该项不计重试次数和时限
+                started.pop(index, None)
+                delay = max(getattr(error, 'retry_after', 0.0), 1.0)
+                with lock:
+                    resume = time.monotonic() + delay
+                    if resume > pause_until[0]:
+                        pause_until[0] = resume
+                        progress_callback.emit(
+                            int((done[0] / total) * 100),
+                            f"服务不可用，批量任务暂停 {delay:.0f} 秒"
+                        )
+                    pending.append(index)
+                return
+            
+            if error is not None:
+                attempt = retries.get(index, 0)
+                backoff = self.retry_backoff * (2 ** attempt)
+                expired = (self.item_deadline is not None and
+                           time.monotonic() + backoff - first_start >= self.item_deadline)
+                if outcome in RETRYABLE_OUTCOMES and attempt < self.max_retries and not expired:
+                    retries[index] = attempt + 1
+                    logger.info(f"第{index + 1}项{outcome}，第{attempt + 1}次重试")
+                    # 不在工作线程中等待，由派发循环在退避结束后再派发
+                    with lock:
+                        not_before[index] = time.monotonic() + backoff
+                        pending.append(index)
+                    return
+                logger.error(f"处理项失败: {str(error)}")
+                self.errors.add(outcome, str(error))
+            
+            with lock:
+                done[0] += 1
+                finished = done[0]
+            if error is None:
+                message = f"处理中 {finished}/{total} (并发 {self.limiter.limit})"
+            else:
+                message = f"处理失败 {finished}/{total}: {str(error)}"
+            progress_callback.emit(int((finished / total) * 100), message)
+        
+        self.signals.concurrency.emit(self.limiter.limit)
+        executor = self.executor
+        if executor is None:
+            # 线程按需创建，实际并发由limiter控制，上限留出余量以便运行中调高max_limit
+            executor = ThreadPoolExecutor(max_workers=max(self.limiter.max_limit, 32))
+        try:
+            while True:
+                now = time.monotonic()
+                with lock:
+                    if not pending and done[0] >= total:
+                        break
+                    # 跳过退避未结束的重试项
+                    index = next((i for i in pending if not_before.get(i, 0.0) <= now), None)
+                    if index is not None:
+                        pending.remove(index)
+                        not_before.pop(index, None)
+                if index is None:
+                    # 等待进行中的项完成、重新入队或退避结束
+                    time.sleep(0.05)
+                    continue
+                wait = pause_until[0] - time.monotonic()
+                if wait > 0:
+                    with lock:
+                        pending.insert(0, index)
+                    time.sleep(min(wait, 0.5))
+                    continue
+                self.limiter.acquire()
+                executor.submit(run_one, index)
+        finally:
+            if executor is not self.executor:
+                executor.shutdown()
+        
+        if self.errors:
+            self.signals.summary.emit(self.errors.summary())
         return results
\ No newline at end of file
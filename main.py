@@ -1,25 +1,36 @@
 # -*- coding: utf-8 -*-
 import sys
+import argparse
 import logging
 from PyQt5.QtWidgets import QApplication, QMessageBox
 from ui.main_window import MainWindow
 
-def setup_logging():
+def setup_logging(log_file='twitter_manager.log'):
     logging.basicConfig(
         level=logging.INFO,
         format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
         handlers=[
-            logging.FileHandler('twitter_manager.log', encoding='utf-8'),
+            logging.FileHandler(log_file, encoding='utf-8'),
             logging.StreamHandler()
         ]
     )
 
 def main():
+    parser = argparse.ArgumentParser(description="Twitter账号管理工具")
+    parser.add_argument('--daemon', action='store_true',
+                        help="以后台服务模式运行，不显示界面(见core/daemon.py)")
+    args, qt_args = parser.parse_known_args()
+    
+    if args.daemon:
+        setup_logging('daemon.log')
+        from core.daemon import run_daemon
+        sys.exit(run_daemon())
+    
     setup_logging()
     logger = logging.getLogger("Main")
     
     try:
-        app = QApplication(sys.argv)
+        app = QApplication(sys.argv[:1] + qt_args)
         window = MainWindow()
         window.show()
         sys.exit(app.exec_())
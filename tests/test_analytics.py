@@ -0,0 +1,55 @@
+import numpy as np
+
+from core.analytics import DAY_SECONDS, MetricsFrame
+
+T0 = 1_700_000_000 // DAY_SECONDS * DAY_SECONDS
+
+
+def _rows():
+    rng = np.random.default_rng(7)
+    rows = []
+    for i in range(60):
+        author = f"a{i % 3}"
+        created = T0 + (i % 10) * DAY_SECONDS
+        retweets, replies, likes, quotes = (int(x) for x in rng.integers(0, 50, 4))
+        impressions = int(rng.integers(0, 2000)) if i % 7 else 0
+        rows.append((i + 1, author, created, retweets, replies, likes, quotes, impressions))
+    return rows
+
+
+def test_account_percentiles_match_numpy():
+    frame = MetricsFrame.from_rows(_rows())
+    for row in frame.account_summary(percentiles=(10, 50, 90, 99)):
+        code = frame.authors.index(row['author_id'])
+        rates = frame.engagement_rate[frame.author_codes == code]
+        rates = rates[~np.isnan(rates)]
+        for p, value in row['percentiles'].items():
+            assert np.isclose(value, np.percentile(rates, p))
+
+
+def test_summary_totals():
+    rows = _rows()
+    frame = MetricsFrame.from_rows(rows)
+    summary = frame.summary()
+    assert summary['tweets'] == 60 and summary['accounts'] == 3
+    assert summary['impressions'] == sum(r[7] for r in rows)
+    assert summary['engagement'] == sum(sum(r[3:7]) for r in rows)
+
+
+def test_missing_created_at_is_masked():
+    rows = [(1, 'a', T0, 1, 0, 0, 0, 10),
+            (2, 'a', None, 5, 0, 0, 0, 10),
+            (3, 'b', T0 + DAY_SECONDS, 2, 0, 0, 0, 10)]
+    frame = MetricsFrame.from_rows(rows)
+    rolling = frame.rolling(window_days=7)
+    # 没有发布时间的推文不会被放到1970年的桶里
+    assert rolling['buckets'].tolist() == [T0, T0 + DAY_SECONDS]
+    assert rolling['tweets'].tolist() == [1, 2]
+    assert rolling['engagement'].tolist() == [1, 3]
+    assert frame.summary()['engagement'] == 8
+    top = frame.top_n(1)
+    assert top[0]['id'] == '2' and top[0]['created_at'] is None
+
+    no_times = MetricsFrame.from_rows([(1, 'a', None, 1, 0, 0, 0, 10)])
+    assert len(no_times.rolling()['buckets']) == 0
+    assert len(MetricsFrame.from_rows([]).rolling()['buckets']) == 0
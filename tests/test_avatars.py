@@ -0,0 +1,36 @@
+from core.avatars import AvatarDiskCache
+
+
+def _open(path, max_bytes=1000):
+    cache = AvatarDiskCache(str(path), max_bytes=max_bytes)
+    cache._scanner.join(timeout=5)
+    return cache
+
+
+def test_content_addressed_round_trip(tmp_path):
+    cache = _open(tmp_path)
+    cache.put("http://a/1.png", b"x" * 100)
+    cache.put("http://a/2.png", b"x" * 100)
+    assert cache.get("http://a/1.png") == b"x" * 100
+    assert len(list(cache.objects_dir.iterdir())) == 1
+    cache.close()
+
+    reopened = _open(tmp_path)
+    assert reopened.get("http://a/2.png") == b"x" * 100
+    assert reopened.get("http://a/3.png") is None
+    assert reopened._bytes == 100
+    reopened.close()
+
+
+def test_existing_files_count_toward_limit(tmp_path):
+    cache = _open(tmp_path, max_bytes=10000)
+    for i in range(5):
+        cache.put(f"http://a/{i}.png", bytes([i]) * 300)
+    cache.close()
+
+    # 重新打开时上限变小，后台统计后淘汰到上限的90%以下
+    small = _open(tmp_path, max_bytes=1000)
+    assert small._bytes <= 900
+    remaining = sum(p.stat().st_size for p in small.objects_dir.iterdir())
+    assert remaining == small._bytes
+    small.close()
@@ -0,0 +1,141 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from requests import exceptions as request_errors
+
+from core.cassette import (CassettePlayer, CassetteRecorder, merge_cassettes,
+                           read_cassette, summarize, token_alias)
+from core.http_client import HttpClient
+
+TOKEN = "secret-token-1"
+
+
+class _EchoHandler(BaseHTTPRequestHandler):
+    """/me 把请求中的token写入响应体，/limited 返回429"""
+
+    def do_GET(self):
+        if self.path.startswith('/limited'):
+            status, body = 429, b'{"error":"rate"}'
+        else:
+            token = self.headers.get('Authorization', '')[len("Bearer "):]
+            status, body = 200, ('{"token":"%s","path":"%s"}' % (token, self.path)).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Retry-After', '7')
+        self.send_header('X-Unrelated', 'x')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server_url():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _EchoHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def _auth(token):
+    return {'headers': {'Authorization': f"Bearer {token}"}}
+
+
+def _record(path, server_url):
+    recorder = CassetteRecorder(path)
+    client = recorder.wrap(HttpClient(timeout=5))
+    first = client.request('GET', f"{server_url}/me?b=2", params={'a': 1}, **_auth(TOKEN))
+    client.request('GET', f"{server_url}/limited", **_auth(TOKEN))
+    recorder.close()
+    return first
+
+
+def test_recorded_file_has_no_token(tmp_path, server_url):
+    path = str(tmp_path / "traffic.cassette")
+    first = _record(path, server_url)
+    assert TOKEN in first.text
+
+    header, entries = read_cassette(path)
+    assert header['version'] == 1
+    assert [e['status'] for e in entries] == [200, 429]
+    assert all(e['token'] == token_alias(TOKEN) for e in entries)
+    assert TOKEN not in (tmp_path / "traffic.cassette").read_bytes().decode('latin-1')
+    assert token_alias(TOKEN) in entries[0]['body']
+    assert set(k.lower() for k in entries[1]['headers']) == {'content-type', 'retry-after'}
+
+
+def test_replay_returns_recorded_responses(tmp_path, server_url):
+    path = str(tmp_path / "traffic.cassette")
+    _record(path, server_url)
+
+    player = CassettePlayer(path, speed=0)
+    assert player.tokens == [token_alias(TOKEN)]
+    # 查询参数顺序不同也能匹配
+    response = player.request('GET', f"{server_url}/me?a=1", params={'b': 2},
+                              **_auth(TOKEN))
+    assert response.status_code == 200
+    assert response.json()['token'] == token_alias(TOKEN)
+
+    limited = player.request('GET', f"{server_url}/limited", **_auth(TOKEN))
+    assert limited.status_code == 429
+    assert limited.headers['retry-after'] == '7'
+    # 用完后重复最后一条
+    again = player.request('GET', f"{server_url}/limited", **_auth(TOKEN))
+    assert again.status_code == 429
+    assert player.replayed == 3
+
+    with pytest.raises(request_errors.ConnectionError):
+        player.request('GET', f"{server_url}/limited", **_auth("other-token"))
+    assert player.missed == 1
+
+
+def test_replay_with_alias_as_token(tmp_path, server_url):
+    """用 `cassette tokens` 输出的别名作为token回放"""
+    path = str(tmp_path / "traffic.cassette")
+    _record(path, server_url)
+
+    player = CassettePlayer(path, speed=0)
+    response = player.request('GET', f"{server_url}/limited", **_auth(player.tokens[0]))
+    assert response.status_code == 429
+
+
+def test_replay_slower_than_timeout_raises_read_timeout(tmp_path):
+    path = str(tmp_path / "slow.cassette")
+    recorder = CassetteRecorder(path)
+    recorder.record({'method': 'GET', 'url': 'host/slow', 'token': None, 'started': 0.0,
+                     'elapsed': 30.0, 'status': 200, 'body': '{}'})
+    recorder.close()
+
+    player = CassettePlayer(path, speed=0)
+    with pytest.raises(request_errors.ReadTimeout):
+        player.request('GET', "https://host/slow", timeout=(3, 10))
+
+
+def test_recorded_error_is_raised_again(tmp_path):
+    path = str(tmp_path / "error.cassette")
+    recorder = CassetteRecorder(path)
+    recorder.record({'method': 'GET', 'url': 'host/x', 'token': None, 'started': 0.0,
+                     'elapsed': 0.1, 'error': 'ConnectTimeout', 'message': 'boom'})
+    recorder.close()
+
+    with pytest.raises(request_errors.ConnectTimeout):
+        CassettePlayer(path, speed=0).request('GET', "https://host/x")
+
+
+def test_merge_and_summarize(tmp_path, server_url):
+    parts = [str(tmp_path / f"part{i}.cassette") for i in range(2)]
+    for part in parts:
+        _record(part, server_url)
+    merged = str(tmp_path / "merged.cassette")
+    assert merge_cassettes(merged, parts) == 4
+
+    _, entries = read_cassette(merged)
+    assert [e['at'] for e in entries] == sorted(e['at'] for e in entries)
+    summary = summarize(entries)
+    assert summary['requests'] == 4
+    assert summary['tokens'] == 1
+    assert summary['statuses'] == {'200': 2, '429': 2}
@@ -0,0 +1,31 @@
+from core.config_manager import ConfigManager
+
+
+def test_default_config_created(tmp_path):
+    path = tmp_path / "config" / "config.ini"
+    config = ConfigManager(str(path))
+    assert path.exists()
+    assert config.get_app_settings()['max_threads'] == 5
+
+
+def test_settings_round_trip(tmp_path):
+    path = tmp_path / "config.ini"
+    config = ConfigManager(str(path))
+    config.set('DEFAULT', 'max_threads', 12)
+    config.set('DEFAULT', 'hedge_enabled', True)
+    config.set('DEFAULT', 'proxies', 'http://127.0.0.1:8080')
+    config.save_config()
+
+    reloaded = ConfigManager(str(path)).get_app_settings()
+    assert reloaded['max_threads'] == 12
+    assert reloaded['hedge_enabled'] is True
+    assert reloaded['proxies'] == 'http://127.0.0.1:8080'
+    assert reloaded['theme'] == 'light'
+
+
+def test_empty_file_replaced_with_defaults(tmp_path):
+    path = tmp_path / "config.ini"
+    path.write_text("", encoding='utf-8')
+    config = ConfigManager(str(path))
+    assert config.get_app_settings()['api_timeout'] == 30
+    assert path.read_text(encoding='utf-8').strip()
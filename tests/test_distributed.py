@@ -0,0 +1,63 @@
+import pytest
+
+import core.distributed
+import core.group_manager
+from core.distributed import apply_results, verify_token
+from core.group_manager import GroupManager
+from core.job_queue import JobQueue
+from core.twitter_api import TwitterAPIError
+
+
+def _finish_job(queue, results):
+    job_id = queue.create_job(list(results), shard_size=len(results))
+    lease = queue.claim('test', job_id)
+    assert queue.complete(lease, results)
+    return job_id
+
+
+def test_apply_results_merges_and_saves_once(tmp_path, monkeypatch):
+    groups_path = tmp_path / "groups.json"
+    manager = GroupManager(str(groups_path))
+    manager.create_group('old')
+    manager.add_account_to_group('old', {'username': 'carol', 'token': 't2', 'status': 'valid'})
+    manager.add_account_to_group('old', {'username': 'bob', 'token': 't3', 'name': 'Bob'})
+    manager.close()
+
+    queue = JobQueue(str(tmp_path / "jobs"))
+    job_id = _finish_job(queue, {
+        't1': {'status': 'valid', 'username': 'alice', 'last_verified': 1.0},
+        't2': {'status': 'invalid', 'error': 'HTTP 401', 'last_verified': 2.0},
+        't3': {'status': 'valid', 'username': 'bob', 'name': 'Bobby', 'last_verified': 3.0},
+    })
+
+    writes = []
+    original = core.group_manager.atomic_write_json
+    monkeypatch.setattr(core.group_manager, 'atomic_write_json',
+                        lambda *a, **kw: (writes.append(a[0]), original(*a, **kw)))
+    counts = apply_results(queue, job_id, str(groups_path), 'new')
+    queue.close()
+
+    assert counts == {'valid': 2, 'invalid': 1}
+    assert writes == [groups_path]
+
+    reloaded = GroupManager(str(groups_path))
+    assert reloaded.get_usernames_in_group('new') == ['alice', 'bob']
+    assert reloaded.get_usernames_in_group('old') == ['carol', 'bob']
+    assert reloaded.registry.get('carol').status == 'invalid'
+    assert reloaded.registry.get('bob').name == 'Bobby'
+    reloaded.close()
+
+
+@pytest.mark.parametrize('status_code, expected', [
+    (401, 'invalid'), (403, 'invalid'), (404, 'error'), (500, 'error'), (503, 'error'),
+])
+def test_verify_token_marks_invalid_only_on_auth_rejection(monkeypatch, status_code, expected):
+    class FailingAPI:
+        def __init__(self, token):
+            pass
+
+        def verify_credentials(self):
+            raise TwitterAPIError(f"HTTP {status_code}", status_code=status_code)
+
+    monkeypatch.setattr(core.distributed, 'TwitterAPI', FailingAPI)
+    assert verify_token('t', max_retries=0)['status'] == expected
@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+from core.group_io import detect_format, export_groups, import_groups
+from core.group_manager import GroupManager, MERGE_UPDATE
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = GroupManager(str(tmp_path / "groups.json"))
+    manager.create_group('g')
+    manager.add_account_to_group('g', {'username': 'alice', 'token': 't1', 'name': 'Alice'})
+    yield manager
+    manager.close()
+
+
+def _write_jsonl(path, rows):
+    path.write_text(''.join(json.dumps(row) + '\n' for row in rows), encoding='utf-8')
+
+
+def test_updated_counts_each_account_once_across_chunks(manager, tmp_path):
+    path = tmp_path / "import.jsonl"
+    _write_jsonl(path, [
+        {'group': 'g', 'username': 'alice', 'token': 't2'},
+        {'group': 'h', 'username': 'alice', 'token': 't3'},
+        {'group': 'h', 'username': 'bob'},
+        {'group': 'i', 'username': 'bob', 'name': 'Bob'},
+    ])
+    stats = import_groups(manager, str(path), policy=MERGE_UPDATE, chunk_size=1)
+
+    assert stats == {'rows': 4, 'added': 3, 'created': 1, 'updated': 1, 'skipped': 0}
+    # 第一次出现的数据生效，与整批导入一致
+    assert manager.registry.get('alice').token == 't2'
+    assert manager.registry.get('bob').name == ''
+    assert manager.get_usernames_in_group('h') == ['alice', 'bob']
+
+
+def test_chunked_import_matches_single_batch(manager, tmp_path):
+    path = tmp_path / "import.jsonl"
+    _write_jsonl(path, [{'group': 'h', 'username': 'alice', 'token': f"t{i}"}
+                        for i in range(5)])
+    one = import_groups(manager, str(path), chunk_size=100)
+    manager.registry.get('alice').update({'token': 't1'})
+    many = import_groups(manager, str(path), chunk_size=1)
+    assert one['updated'] == many['updated'] == 1
+
+
+def test_json_document_round_trip(manager, tmp_path):
+    path = tmp_path / "export.json"
+    assert detect_format(str(path)) == 'json'
+    manager.create_group('empty')
+    assert export_groups(manager, str(path), chunk_size=1) == 2
+    rows = json.loads(path.read_text(encoding='utf-8'))
+    assert rows == [{'group': 'g', 'username': 'alice', 'token': 't1', 'name': 'Alice',
+                     **{k: v for k, v in rows[0].items()
+                        if k not in ('group', 'username', 'token', 'name')}},
+                    {'group': 'empty'}]
+
+    target = GroupManager(str(tmp_path / "other.json"))
+    stats = import_groups(target, str(path))
+    assert stats['rows'] == 2 and stats['created'] == 1
+    assert target.get_group_names() == ['g', 'empty']
+    assert target.registry.get('alice').name == 'Alice'
+    target.close()
+
+
+def test_json_document_must_be_array(manager, tmp_path):
+    path = tmp_path / "bad.json"
+    path.write_text('{"group": "g", "username": "x"}', encoding='utf-8')
+    with pytest.raises(ValueError):
+        import_groups(manager, str(path))
@@ -0,0 +1,76 @@
+import json
+
+import pytest
+
+from core.group_events import ACCOUNTS_ADDED, ACCOUNTS_UPDATED, GROUP_CREATED
+from core.group_manager import GroupManager, MERGE_KEEP, MERGE_REPLACE, MERGE_UPDATE
+
+
+def _manager_with_alice(tmp_path):
+    manager = GroupManager(str(tmp_path / "groups.json"))
+    manager.create_group('g')
+    manager.add_account_to_group('g', {'username': 'alice', 'name': 'Alice',
+                                       'token': 't1', 'id': '1'})
+    return manager
+
+
+def test_legacy_file_is_backed_up_and_migrated(tmp_path):
+    path = tmp_path / "groups.json"
+    legacy = {'g1': [{'username': 'alice', 'token': 't1'},
+                     {'username': 'bob', 'token': 't2'}],
+              'g2': [{'username': 'alice', 'token': 't1', 'name': 'Alice'}]}
+    path.write_text(json.dumps(legacy), encoding='utf-8')
+
+    manager = GroupManager(str(path))
+    manager.close()
+
+    backup = tmp_path / "groups.json.bak"
+    assert json.loads(backup.read_text(encoding='utf-8')) == legacy
+    migrated = json.loads(path.read_text(encoding='utf-8'))
+    assert 'version' in migrated
+    assert migrated['groups'] == {'g1': ['alice', 'bob'], 'g2': ['alice']}
+    assert len(migrated['accounts']) == 2
+
+    reloaded = GroupManager(str(path))
+    assert reloaded.registry.get('alice').name == 'Alice'
+    reloaded.close()
+
+
+@pytest.mark.parametrize('policy, expected', [
+    (MERGE_UPDATE, {'name': 'Alice', 'token': 't2', 'id': '1'}),
+    (MERGE_KEEP, {'name': 'Alice', 'token': 't1', 'id': '1'}),
+    (MERGE_REPLACE, {'name': '', 'token': 't2', 'id': None}),
+])
+def test_import_policies(tmp_path, policy, expected):
+    manager = _manager_with_alice(tmp_path)
+    events = []
+    manager.subscribe(events.append)
+
+    stats = manager.import_accounts({
+        'g': [{'username': 'alice', 'token': 't2'}],
+        'new': [{'username': 'alice', 'token': 't2'}, {'username': 'bob'}, {'name': 'nameless'}],
+    }, policy)
+
+    alice = manager.registry.get('alice')
+    assert {k: getattr(alice, k) for k in expected} == expected
+    assert stats == {'added': 2, 'created': 1,
+                     'updated': 0 if policy == MERGE_KEEP else 1}
+    assert manager.get_usernames_in_group('g') == ['alice']
+    assert manager.get_usernames_in_group('new') == ['alice', 'bob']
+    assert sorted(manager.find_account_groups('alice')) == ['g', 'new']
+    kinds = [e.kind for e in events]
+    assert kinds.count(GROUP_CREATED) == 1 and kinds.count(ACCOUNTS_ADDED) == 1
+    assert (ACCOUNTS_UPDATED in kinds) == (policy != MERGE_KEEP)
+    manager.close()
+
+    reloaded = GroupManager(str(tmp_path / "groups.json"))
+    assert reloaded.registry.get('alice').token == expected['token']
+    assert reloaded.get_usernames_in_group('new') == ['alice', 'bob']
+    reloaded.close()
+
+
+def test_import_rejects_unknown_policy(tmp_path):
+    manager = GroupManager(str(tmp_path / "groups.json"))
+    with pytest.raises(ValueError):
+        manager.import_accounts({'g': []}, 'merge-everything')
+    manager.close()
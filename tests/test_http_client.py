@@ -0,0 +1,96 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from core.circuit_breaker import CircuitBreaker, get_breaker
+from core.concurrency import classify_error, OUTCOME_TIMEOUT
+from core.http_client import DeadlineExceeded, HttpClient, request_deadline
+from core.twitter_api import TwitterAPI
+
+
+class _StatusHandler(BaseHTTPRequestHandler):
+    """按路径 /<状态码> 应答，/slow 延迟后返回200"""
+
+    def do_GET(self):
+        if self.path == '/slow':
+            time.sleep(0.3)
+            self.path = '/200'
+        self.send_response(int(self.path.strip('/')))
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'{}')
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server_url():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _StatusHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_only_successful_requests_feed_hedge_latency(server_url):
+    client = HttpClient(timeout=5)
+    for status in (200, 429, 500, 204):
+        assert client.request('GET', f"{server_url}/{status}").status_code == status
+    assert len(client.hedging._samples) == 2
+
+
+def _track_close(session, closed):
+    original = session.close
+    session.close = lambda: (closed.append(session), original())
+
+
+def test_replaced_session_closed_after_last_request(server_url):
+    client = HttpClient(pool_size=2, timeout=5)
+    closed = []
+    idle = client.session
+    _track_close(idle, closed)
+    client.configure(pool_size=4)
+    assert closed == [idle]
+
+    busy = client.session
+    _track_close(busy, closed)
+    thread = threading.Thread(target=client.request, args=('GET', f"{server_url}/slow"))
+    thread.start()
+    time.sleep(0.1)
+    client.configure(pool_size=8)
+    assert busy not in closed
+    thread.join()
+    assert closed == [idle, busy]
+    assert client.request('GET', f"{server_url}/200").status_code == 200
+    assert client.session not in closed
+
+
+def test_expired_deadline_raises_before_sending(server_url):
+    client = HttpClient(timeout=5)
+    with request_deadline(0):
+        with pytest.raises(DeadlineExceeded) as info:
+            client.request('GET', f"{server_url}/200")
+    assert classify_error(info.value) == OUTCOME_TIMEOUT
+
+
+def test_deadline_does_not_touch_host_breaker():
+    breaker = get_breaker('api.twitter.com')
+    breaker.record_success()
+    api = TwitterAPI('t', http_client=HttpClient())
+    for _ in range(breaker.failure_threshold + 1):
+        with request_deadline(0):
+            with pytest.raises(DeadlineExceeded):
+                api.verify_credentials()
+    assert breaker.failures == 0 and breaker.allow_request()
+
+
+def test_released_probe_allows_next_probe():
+    breaker = CircuitBreaker('example.test', failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+    breaker.release_probe()
+    assert breaker.allow_request()
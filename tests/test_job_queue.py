@@ -0,0 +1,103 @@
+import threading
+import time
+
+import core.job_queue
+from core.job_queue import JobQueue
+
+
+def test_create_job_deduplicates_and_shards(tmp_path):
+    queue = JobQueue(str(tmp_path))
+    job_id = queue.create_job(['a', 'b', 'a', '', 'c', 'd', 'e'], shard_size=2)
+    assert queue.jobs()[0]['total_items'] == 5
+    assert queue.status(job_id)['shards']['pending'] == 3
+    queue.close()
+
+
+def test_expired_lease_cannot_complete(tmp_path):
+    queue = JobQueue(str(tmp_path), lease_seconds=0.05)
+    job_id = queue.create_job(['a', 'b'], shard_size=2)
+    stale = queue.claim('w1', job_id)
+    time.sleep(0.1)
+    fresh = queue.claim('w2', job_id)
+    assert fresh is not None and fresh.shard_id == stale.shard_id
+
+    assert not queue.renew(stale)
+    assert not queue.complete(stale, {'a': {'status': 'stale'}})
+    assert queue.complete(fresh, {'a': {'status': 'valid'}, 'b': {'status': 'invalid'}})
+    # 已完成的分片不能再次提交
+    assert not queue.complete(fresh, {'a': {'status': 'again'}})
+
+    results = {r['token']: r['status'] for r in queue.iter_results(job_id)}
+    assert results == {'a': 'valid', 'b': 'invalid'}
+    assert queue.status(job_id)['finished']
+    queue.close()
+
+
+def test_release_and_max_attempts(tmp_path):
+    queue = JobQueue(str(tmp_path), max_attempts=2)
+    job_id = queue.create_job(['a'], shard_size=1)
+    for _ in range(2):
+        lease = queue.claim('w', job_id)
+        assert lease is not None
+        queue.release(lease, error="boom")
+    assert queue.claim('w', job_id) is None
+    status = queue.status(job_id)
+    assert status['shards']['failed'] == 1 and status['finished']
+    queue.close()
+
+
+def test_concurrent_workers_process_each_item_once(tmp_path):
+    queue = JobQueue(str(tmp_path))
+    items = [f"t{i}" for i in range(200)]
+    job_id = queue.create_job(items, shard_size=7)
+    seen = []
+    seen_lock = threading.Lock()
+
+    def work(name):
+        # 每个线程使用独立连接，与多进程时相同
+        own = JobQueue(str(tmp_path))
+        while True:
+            lease = own.claim(name, job_id)
+            if lease is None:
+                break
+            with seen_lock:
+                seen.extend(lease.items)
+            own.complete(lease, {item: {'status': 'valid'} for item in lease.items})
+        own.close()
+
+    threads = [threading.Thread(target=work, args=(f"w{i}",)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sorted(seen) == sorted(items)
+    assert sorted(r['token'] for r in queue.iter_results(job_id)) == sorted(items)
+    assert queue.status(job_id)['results'] == len(items)
+    queue.close()
+
+
+def test_iter_results_reads_in_batches_in_shard_order(tmp_path, monkeypatch):
+    monkeypatch.setattr(core.job_queue, 'RESULT_BATCH_SIZE', 3)
+    queue = JobQueue(str(tmp_path))
+    items = [f"t{i:02d}" for i in range(10)]
+    job_id = queue.create_job(items, shard_size=4)
+    leases = []
+    while True:
+        lease = queue.claim('w', job_id)
+        if lease is None:
+            break
+        leases.append(lease)
+    # 按相反顺序完成，结果仍按分片顺序返回
+    for lease in reversed(leases):
+        assert queue.complete(lease, {item: {'status': 'valid'} for item in lease.items})
+
+    results = queue.iter_results(job_id)
+    first = next(results)
+    # 读取期间其他操作不被阻塞
+    assert queue.status(job_id)['results'] == 10
+    tokens = [first['token']] + [r['token'] for r in results]
+    shard_of = {item: lease.seq for lease in leases for item in lease.items}
+    assert sorted(tokens) == items
+    assert [shard_of[t] for t in tokens] == sorted(shard_of[t] for t in tokens)
+    queue.close()
@@ -0,0 +1,77 @@
+import json
+import logging
+from types import SimpleNamespace
+
+import pytest
+
+import ui.login_panel
+from core.account_registry import AccountRegistry
+from core.twitter_api import TwitterAPIError
+from ui.login_panel import LoginPanel
+
+
+class _FakeAPI:
+    failures = {}
+
+    def __init__(self, token, parent_ui=None):
+        self.token = token
+
+    def verify_credentials(self):
+        error = self.failures.get(self.token)
+        if error is not None:
+            raise error
+        return {'data': {'username': f"user_{self.token}", 'name': self.token, 'id': '1'}}
+
+
+@pytest.fixture
+def panel(tmp_path, monkeypatch):
+    monkeypatch.setattr(ui.login_panel, 'TwitterAPI', _FakeAPI)
+    emitted = []
+    return SimpleNamespace(
+        logger=logging.getLogger("LoginPanel"),
+        tokens_file=str(tmp_path / "tokens.json"),
+        registry=AccountRegistry(),
+        accounts=[],
+        account_list=SimpleNamespace(addItem=lambda text: None),
+        login_complete=SimpleNamespace(emit=emitted.append),
+    )
+
+
+@pytest.mark.parametrize('status_code', [401, 403])
+def test_only_auth_rejection_is_invalid(panel, monkeypatch, status_code):
+    monkeypatch.setattr(_FakeAPI, 'failures', {'bad': TwitterAPIError("x", status_code)})
+    result = LoginPanel._verify_single_token(panel, 'bad')
+    assert result['status'] == 'invalid'
+
+
+@pytest.mark.parametrize('error', [
+    TwitterAPIError("not found", 404), TwitterAPIError("server", 500),
+    TwitterAPIError("net", network=True), ValueError("bad json"),
+])
+def test_other_failures_raise(panel, monkeypatch, error):
+    monkeypatch.setattr(_FakeAPI, 'failures', {'t': error})
+    with pytest.raises(type(error)):
+        LoginPanel._verify_single_token(panel, 't')
+
+
+def test_login_result_keeps_errored_tokens(panel, monkeypatch):
+    monkeypatch.setattr(_FakeAPI, 'failures', {'bad': TwitterAPIError("x", 401)})
+    tokens = ['good', 'bad', 'flaky']
+    results = [LoginPanel._verify_single_token(panel, 'good'),
+               LoginPanel._verify_single_token(panel, 'bad'),
+               None]
+    LoginPanel._handle_login_result(panel, results, tokens)
+
+    with open(panel.tokens_file, encoding='utf-8') as f:
+        assert json.load(f) == ['good', 'flaky']
+    assert [r.username for r in panel.accounts] == ['user_good']
+
+
+def test_daemon_results_keep_error_status_tokens(panel):
+    LoginPanel._handle_login_result(panel, [
+        {'token': 'a', 'status': 'valid', 'username': 'alice'},
+        {'token': 'b', 'status': 'invalid', 'error': 'HTTP 401'},
+        {'token': 'c', 'status': 'error', 'error': 'HTTP 503'},
+    ])
+    with open(panel.tokens_file, encoding='utf-8') as f:
+        assert json.load(f) == ['a', 'c']
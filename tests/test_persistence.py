@@ -0,0 +1,69 @@
+import json
+import os
+import stat
+import time
+
+from core.persistence import WriteBehindSaver, atomic_write_json
+
+
+def _saver(writes, **kwargs):
+    return WriteBehindSaver(lambda: writes.append(time.monotonic()), **kwargs)
+
+
+def test_configure_does_not_write():
+    writes = []
+    saver = _saver(writes, interval=60, enabled=True)
+    saver.mark_dirty()
+    saver.configure(True, 30)
+    saver.configure(True, 45)
+    time.sleep(0.2)
+    assert writes == []
+    assert saver.dirty
+    saver.close()
+    assert len(writes) == 1
+
+
+def test_shorter_interval_applies_to_current_period():
+    writes = []
+    saver = _saver(writes, interval=60, enabled=True)
+    saver.mark_dirty()
+    saver.configure(True, 0.1)
+    deadline = time.monotonic() + 5
+    while not writes and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert len(writes) == 1
+    saver.close()
+    assert len(writes) == 1
+
+
+def test_manual_mode_writes_only_on_close():
+    writes = []
+    saver = _saver(writes, interval=0.05, enabled=True)
+    saver.configure(True, None)
+    for _ in range(3):
+        saver.mark_dirty()
+        time.sleep(0.1)
+    assert writes == []
+    saver.close()
+    assert len(writes) == 1
+
+
+def test_disabled_writes_immediately():
+    writes = []
+    saver = _saver(writes)
+    saver.mark_dirty()
+    saver.mark_dirty()
+    assert len(writes) == 2
+    saver.close()
+    assert len(writes) == 2
+
+
+def test_atomic_write_json_creates_file_with_mode(tmp_path):
+    path = tmp_path / "secret.json"
+    stale = tmp_path / "secret.json.tmp"
+    stale.write_text("old")
+    os.chmod(stale, 0o644)
+    atomic_write_json(path, {'secret': 's'}, mode=0o600)
+    assert json.loads(path.read_text()) == {'secret': 's'}
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+    assert not stale.exists()
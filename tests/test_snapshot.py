@@ -0,0 +1,68 @@
+import json
+import os
+
+from core.account_registry import AccountRegistry
+from core.group_manager import GroupManager
+from core.snapshot import Snapshot, json_stat, write_snapshot
+
+DATA = {
+    'version': 2,
+    'accounts': [{'username': 'alice', 'name': '爱丽丝', 'token': 't1'},
+                 {'username': 'bob', 'id': '2'},
+                 {'username': 'carol'}],
+    'groups': {'g1': ['alice', 'carol'], '分组2': ['bob', 'alice'], 'empty': []},
+}
+
+
+def _write(tmp_path, data=DATA):
+    json_path = tmp_path / "groups.json"
+    json_path.write_text(json.dumps(data, ensure_ascii=False), encoding='utf-8')
+    snap_path = tmp_path / "groups.snap"
+    write_snapshot(snap_path, data, json_stat(json_path))
+    return json_path, snap_path
+
+
+def test_round_trip(tmp_path):
+    json_path, snap_path = _write(tmp_path)
+    snapshot = Snapshot.open_if_fresh(snap_path, json_path)
+    assert snapshot is not None
+    assert snapshot.account_count == 3
+    assert list(snapshot.records()) == DATA['accounts']
+    assert snapshot.group_names() == ['g1', '分组2', 'empty']
+    assert snapshot.group_size('分组2') == 2 and snapshot.group_size('missing') == 0
+    assert [r['username'] for r in snapshot.group_records('分组2')] == ['bob', 'alice']
+    assert snapshot.group_records('empty') == []
+    assert snapshot.record(1) == {'username': 'bob', 'id': '2'}
+    assert dict(snapshot.groups()) == {'g1': [0, 2], '分组2': [1, 0], 'empty': []}
+    snapshot.close()
+
+
+def test_stale_snapshot_is_ignored(tmp_path):
+    json_path, snap_path = _write(tmp_path)
+    with open(json_path, 'a', encoding='utf-8') as f:
+        f.write(' ')
+    assert Snapshot.open_if_fresh(snap_path, json_path) is None
+    os.remove(json_path)
+    assert Snapshot.open_if_fresh(snap_path, json_path) is None
+    snap_path.write_bytes(b'garbage')
+    json_path.write_text('{}', encoding='utf-8')
+    assert Snapshot.open_if_fresh(snap_path, json_path) is None
+
+
+def test_background_load_keeps_newer_records(tmp_path):
+    data = dict(DATA, accounts=[dict(DATA['accounts'][0], status='valid', last_verified=100.0),
+                                *DATA['accounts'][1:]])
+    json_path, _ = _write(tmp_path, data)
+    registry = AccountRegistry()
+    # 加载期间已重新验证过的账号
+    registry.upsert({'username': 'alice', 'status': 'invalid', 'last_verified': 200.0})
+
+    manager = GroupManager(str(json_path), registry=registry, background_load=True)
+    assert manager.get_group_names() == ['g1', '分组2', 'empty']
+    assert manager.wait_until_loaded(5)
+    alice = registry.get('alice')
+    assert (alice.status, alice.last_verified) == ('invalid', 200.0)
+    assert alice.name == '爱丽丝' and alice.token == 't1'
+    assert manager.get_usernames_in_group('g1') == ['alice', 'carol']
+    assert manager.get_accounts_in_group('分组2')[1] is alice
+    manager.close()
@@ -0,0 +1,56 @@
+from types import SimpleNamespace
+
+import core.twitter_api
+from core.timeline import TimelineIterator, iter_group_timeline
+
+
+class FakeAPI:
+    """按用户返回预置页面的API，记录请求参数"""
+
+    pages = {}
+    calls = []
+
+    def __init__(self, token, tweet_store=None):
+        self.token = token
+
+    def get_user_tweets(self, user_id, max_results=10, pagination_token=None, **kwargs):
+        FakeAPI.calls.append(dict(kwargs, user_id=user_id, max_results=max_results,
+                                  pagination_token=pagination_token))
+        return FakeAPI.pages[user_id][pagination_token]
+
+
+def _page(tweets, next_token=None):
+    return {'data': tweets, 'meta': {'next_token': next_token} if next_token else {}}
+
+
+def test_group_timeline_merges_without_mutating_pages(monkeypatch):
+    cached_a = _page([{'id': '3', 'created_at': '2024-01-03'},
+                      {'id': '1', 'created_at': '2024-01-01'}])
+    cached_b = _page([{'id': '4', 'created_at': '2024-01-04', 'author_id': 'B'}], 'n')
+    FakeAPI.pages = {
+        'A': {None: cached_a},
+        'B': {None: cached_b, 'n': _page([{'id': '2', 'created_at': '2024-01-02'}])},
+    }
+    FakeAPI.calls = []
+    monkeypatch.setattr(core.twitter_api, 'TwitterAPI', FakeAPI)
+    group = [SimpleNamespace(username='a', token='ta', id='A'),
+             SimpleNamespace(username='b', token='tb', id='B'),
+             SimpleNamespace(username='c', token='', id='C')]
+    manager = SimpleNamespace(get_accounts_in_group=lambda name: group)
+
+    tweets = list(iter_group_timeline(manager, 'g', page_size=500, max_pages=None))
+
+    assert [t['id'] for t in tweets] == ['4', '3', '2', '1']
+    assert [t['author_id'] for t in tweets] == ['B', 'A', 'B', 'A']
+    assert 'author_id' not in cached_a['data'][0]
+    assert {call['max_results'] for call in FakeAPI.calls} == {100}
+
+
+def test_timeline_iterator_follows_pages():
+    FakeAPI.pages = {'A': {None: _page([{'id': '2'}], 'n'), 'n': _page([{'id': '1'}])}}
+    FakeAPI.calls = []
+    iterator = TimelineIterator(FakeAPI('t'), 'A', page_size=1, prefetch=0)
+    assert [t['id'] for t in iterator] == ['2', '1']
+    assert iterator.pages_fetched == 2
+    assert [call['max_results'] for call in FakeAPI.calls] == [5, 5]
+    assert not any(call['use_cache'] for call in FakeAPI.calls)
@@ -0,0 +1,59 @@
+from types import SimpleNamespace
+
+import core.timeline_sync
+from core.timeline_sync import TimelineSync, newest_tweet_id
+
+
+class FakeAPI:
+    requests = []
+
+    def __init__(self, token):
+        self.token = token
+
+    def iter_user_tweets(self, user_id, **kwargs):
+        FakeAPI.requests.append(dict(kwargs, user_id=user_id))
+        pages = [{'data': [{'id': '12'}, {'id': '11'}]}, {'data': [{'id': '10'}]}]
+        return SimpleNamespace(pages=lambda: iter(pages[:kwargs['max_pages'] or None]))
+
+
+class FakeStore:
+    def __init__(self):
+        self.tweets = []
+
+    def upsert_tweets(self, tweets):
+        self.tweets.extend(tweets)
+
+
+def _sync(monkeypatch, since_id=None, **kwargs):
+    FakeAPI.requests = []
+    monkeypatch.setattr(core.timeline_sync, 'TwitterAPI', FakeAPI)
+    marks = {}
+    account = SimpleNamespace(username='alice', token='t', id='1', since_id=since_id)
+    manager = SimpleNamespace(get_accounts_in_group=lambda name: [account],
+                              update_since_ids=marks.update)
+    store = FakeStore()
+    result = TimelineSync(manager, store=store).sync_group('g', **kwargs)
+    return result, store, marks
+
+
+def test_first_sync_fetches_initial_pages(monkeypatch):
+    result, store, marks = _sync(monkeypatch)
+    assert result['fetched'] == 2 and marks == {'alice': '12'}
+    assert FakeAPI.requests[0]['max_pages'] == 1
+    assert all(t['author_id'] == '1' for t in store.tweets)
+
+
+def test_initial_pages_override(monkeypatch):
+    result, _, _ = _sync(monkeypatch, initial_pages=None)
+    assert result['fetched'] == 3 and FakeAPI.requests[0]['max_pages'] is None
+
+
+def test_incremental_sync_uses_high_water_mark(monkeypatch):
+    _sync(monkeypatch, since_id='9', initial_pages=1)
+    request = FakeAPI.requests[0]
+    assert request['since_id'] == '9' and request['max_pages'] is None
+
+
+def test_newest_tweet_id():
+    assert newest_tweet_id([{'id': '9'}, {'id': '100'}], '50') == '100'
+    assert newest_tweet_id([], None) is None
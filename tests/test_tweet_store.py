@@ -0,0 +1,37 @@
+import sqlite3
+
+from core.tweet_store import TweetStore
+
+
+def _tweet(tweet_id, author_id, created_at, text, likes=0):
+    return {'id': str(tweet_id), 'author_id': author_id, 'created_at': created_at,
+            'text': text, 'public_metrics': {'like_count': likes}}
+
+
+def test_search_filters_and_orders(tmp_path):
+    store = TweetStore(str(tmp_path / "tweets.db"))
+    store.upsert_tweets([
+        _tweet(1, 'a', '2024-01-01T00:00:00Z', 'hello world', likes=5),
+        _tweet(2, 'b', '2024-01-02T00:00:00Z', 'hello there', likes=9),
+        _tweet(3, 'c', '2024-01-03T00:00:00Z', 'goodbye world', likes=1),
+    ])
+    assert [t['id'] for t in store.search('hello')] == ['2', '1']
+    assert [t['id'] for t in store.search(author_ids=['a', 'c'])] == ['3', '1']
+    assert [t['id'] for t in store.search('world', author_ids=['a', 'c'],
+                                          order_by='like_count')] == ['1', '3']
+    assert store.search(author_ids=[]) == []
+    store.close()
+
+
+def test_author_filter_beyond_variable_limit(tmp_path):
+    store = TweetStore(str(tmp_path / "tweets.db"))
+    # 与较旧的SQLite默认值一致
+    store._conn.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 999)
+    store.upsert_tweets(_tweet(i, f"u{i}", '2024-01-01T00:00:00Z', 'x')
+                        for i in range(1, 101))
+    author_ids = [f"u{i}" for i in range(5000)]
+    assert len(store.search(author_ids=author_ids, limit=1000)) == 100
+    assert len(store.load_metrics(author_ids)) == 100
+    assert len(store.load_metrics(['u1', 'u2'])) == 2
+    assert len(store.load_metrics()) == 100
+    store.close()
@@ -0,0 +1,59 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from core.concurrency import AdaptiveLimiter
+from core.twitter_api import TwitterAPIError
+from core.worker import AdaptiveBatchWorker
+
+
+def _run(worker):
+    results = []
+    worker.signals.result.connect(results.append)
+    worker.run()
+    return results[0]
+
+
+def test_retry_backoff_does_not_block_executor_thread():
+    finished = {}
+    attempts = {}
+    lock = threading.Lock()
+
+    def process(item):
+        with lock:
+            attempts[item] = attempts.get(item, 0) + 1
+            first = attempts[item] == 1
+        if item == 'a' and first:
+            raise TwitterAPIError("timeout", timeout=True)
+        finished[item] = time.monotonic()
+        return item.upper()
+
+    worker = AdaptiveBatchWorker(['a', 'b', 'c'], process,
+                                 AdaptiveLimiter(min_limit=1, max_limit=1),
+                                 retry_backoff=0.5)
+    # 只有一个线程: 在线程中等待退避会让b、c排在a的退避之后
+    worker.executor = ThreadPoolExecutor(max_workers=1)
+    started = time.monotonic()
+    try:
+        results = _run(worker)
+    finally:
+        worker.executor.shutdown()
+
+    assert results == ['A', 'B', 'C']
+    assert attempts['a'] == 2
+    assert finished['b'] - started < 0.4
+    assert finished['c'] - started < 0.4
+    assert finished['a'] - started >= 0.5
+
+
+def test_failed_items_reported_once_retries_exhausted():
+    summaries = []
+
+    def process(item):
+        raise TwitterAPIError("throttled", 429)
+
+    worker = AdaptiveBatchWorker(['x'], process, AdaptiveLimiter(min_limit=1, max_limit=2),
+                                 max_retries=2, retry_backoff=0.01)
+    worker.signals.summary.connect(summaries.append)
+    assert _run(worker) == [None]
+    assert summaries[0]['counts'] == {'throttled': 1}
@@ -0,0 +1,205 @@
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout,
+                            QPushButton, QLabel, QComboBox,
+                            QTableWidget, QTableWidgetItem, QHeaderView,
+                            QMessageBox, QSpinBox)
+from PyQt5.QtCore import Qt
+from datetime import datetime
+from core.worker import Worker
+from core.task_scheduler import get_shared_scheduler, PRIORITY_NORMAL
+from core.analytics import MetricsFrame
+from core.config_manager import ConfigManager
+from core.group_manager import GroupManager
+from core.tweet_store import get_shared_store
+import logging
+from typing import Dict, List
+
+logger = logging.getLogger("AnalyticsPanel")
+
+
+class AnalyticsPanel(QWidget):
+    """互动分析面板，展示分组推文的互动指标"""
+
+    def __init__(self, config: ConfigManager, group_manager: GroupManager):
+        super().__init__()
+        self.logger = logging.getLogger("AnalyticsPanel")
+        self.config = config
+        self.group_manager = group_manager
+        self.scheduler = get_shared_scheduler()
+        self.init_ui()
+
+    def init_ui(self):
+        """初始化用户界面"""
+        self.logger.debug("初始化分析面板UI")
+
+        layout = QVBoxLayout()
+
+        # 顶部操作区域
+        top_layout = QHBoxLayout()
+        self.group_combo = QComboBox()
+        self.window_spin = QSpinBox()
+        self.window_spin.setRange(1, 90)
+        self.window_spin.setValue(7)
+        self.window_spin.setSuffix(" 天")
+        self.refresh_btn = QPushButton("分析")
+
+        top_layout.addWidget(QLabel("分组:"))
+        top_layout.addWidget(self.group_combo, 1)
+        top_layout.addWidget(QLabel("滚动窗口:"))
+        top_layout.addWidget(self.window_spin)
+        top_layout.addWidget(self.refresh_btn)
+
+        # 汇总信息
+        self.summary_label = QLabel("选择分组后点击分析")
+        self.summary_label.setAlignment(Qt.AlignLeft)
+
+        # 账号汇总表
+        self.account_table = self._create_table(
+            ["账号", "推文数", "总互动", "曝光", "互动率", "P50", "P90"])
+
+        # 热门推文表
+        self.top_table = self._create_table(
+            ["推文ID", "账号", "发布时间", "互动", "曝光", "互动率"])
+
+        # 滚动窗口表
+        self.rolling_table = self._create_table(
+            ["日期", "推文数", "互动", "曝光", "互动率"])
+
+        tables_layout = QHBoxLayout()
+        left_layout = QVBoxLayout()
+        left_layout.addWidget(QLabel("账号汇总:"))
+        left_layout.addWidget(self.account_table)
+        right_layout = QVBoxLayout()
+        right_layout.addWidget(QLabel("热门推文:"))
+        right_layout.addWidget(self.top_table)
+        right_layout.addWidget(QLabel("滚动窗口:"))
+        right_layout.addWidget(self.rolling_table)
+        tables_layout.addLayout(left_layout, 55)
+        tables_layout.addLayout(right_layout, 45)
+
+        layout.addLayout(top_layout)
+        layout.addWidget(self.summary_label)
+        layout.addLayout(tables_layout)
+
+        self.setLayout(layout)
+
+        # 连接信号槽
+        self.refresh_btn.clicked.connect(self.run_analysis)
+
+        self.refresh_groups()
+
+        self.logger.info("分析面板初始化完成")
+
+    @staticmethod
+    def _create_table(headers: List[str]) -> QTableWidget:
+        """创建只读表格"""
+        table = QTableWidget(0, len(headers))
+        table.setHorizontalHeaderLabels(headers)
+        table.setEditTriggers(QTableWidget.NoEditTriggers)
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        table.verticalHeader().setVisible(False)
+        return table
+
+    def refresh_groups(self):
+        """刷新分组下拉框"""
+        current = self.group_combo.currentText()
+        self.group_combo.clear()
+        self.group_combo.addItems(self.group_manager.get_group_names())
+        if current:
+            self.group_combo.setCurrentText(current)
+
+    def run_analysis(self):
+        """在后台线程中加载指标并计算"""
+        group_name = self.group_combo.currentText()
+        if not group_name:
+            QMessageBox.warning(self, "警告", "请先选择一个分组")
+            return
+
+        self.refresh_btn.setEnabled(False)
+        self.summary_label.setText("正在分析...")
+
+        worker = Worker(self._analyze, group_name, self.window_spin.value())
+        worker.signals.result.connect(self._show_result)
+        worker.signals.error.connect(self._handle_error)
+        worker.signals.finished.connect(lambda: self.refresh_btn.setEnabled(True))
+        self.scheduler.submit(worker, PRIORITY_NORMAL)
+
+    def _analyze(self, group_name: str, window_days: int,
+                 progress_callback=None) -> Dict:
+        """加载分组指标并计算汇总(在工作线程中执行)"""
+        frame = MetricsFrame.from_group(
+            get_shared_store(), self.group_manager, group_name)
+        usernames = {acc.id: acc.username
+                     for acc in self.group_manager.get_accounts_in_group(group_name)}
+        rolling = frame.rolling(window_days)
+        return {
+            'group': group_name,
+            'usernames': usernames,
+            'summary': frame.summary(),
+            'accounts': frame.account_summary(),
+            'top': frame.top_n(20),
+            'rolling': rolling,
+        }
+
+    def _show_result(self, result: Dict):
+        """显示分析结果"""
+        summary = result['summary']
+        usernames = result['usernames']
+        pct = summary['percentiles']
+        pct_text = ", ".join(f"P{int(p)} {v:.2%}" for p, v in pct.items())
+        self.summary_label.setText(
+            f"分组 '{result['group']}': {summary['tweets']} 条推文, "
+            f"{summary['accounts']} 个账号, 总互动 {summary['engagement']}, "
+            f"互动率 {summary['engagement_rate']:.2%}"
+            + (f" ({pct_text})" if pct_text else "")
+        )
+
+        self._fill_table(self.account_table, [
+            (f"@{usernames.get(row['author_id'], row['author_id'])}",
+             row['tweets'], row['engagement'], row['impressions'],
+             f"{row['engagement_rate']:.2%}",
+             self._format_rate(row['percentiles'].get(50.0)),
+             self._format_rate(row['percentiles'].get(90.0)))
+            for row in result['accounts']
+        ])
+
+        self._fill_table(self.top_table, [
+            (row['id'], f"@{usernames.get(row['author_id'], row['author_id'])}",
+             (datetime.fromtimestamp(row['created_at']).strftime('%Y-%m-%d %H:%M')
+              if row['created_at'] is not None else "-"),
+             row['engagement'], row['impressions'],
+             f"{row['engagement_rate']:.2%}")
+            for row in result['top']
+        ])
+
+        rolling = result['rolling']
+        buckets = rolling['buckets']
+        # 最新的日期排在最前
+        self._fill_table(self.rolling_table, [
+            (datetime.fromtimestamp(int(buckets[i])).strftime('%Y-%m-%d'),
+             int(rolling['tweets'][i]), int(rolling['engagement'][i]),
+             int(rolling['impressions'][i]),
+             f"{rolling['engagement_rate'][i]:.2%}")
+            for i in range(len(buckets) - 1, max(len(buckets) - 31, -1), -1)
+        ])
+
+    @staticmethod
+    def _format_rate(value) -> str:
+        if value is None or value != value:
+            return "-"
+        return f"{value:.2%}"
+
+    @staticmethod
+    def _fill_table(table: QTableWidget, rows: List[tuple]):
+        """填充表格"""
+        table.setUpdatesEnabled(False)
+        table.setRowCount(len(rows))
+        for r, row in enumerate(rows):
+            for c, value in enumerate(row):
+                table.setItem(r, c, QTableWidgetItem(str(value)))
+        table.setUpdatesEnabled(True)
+
+    def _handle_error(self, error_msg: str):
+        """处理分析错误"""
+        self.summary_label.setText("分析失败")
+        self.logger.error(f"分析失败: {error_msg}")
+        QMessageBox.critical(self, "错误", f"分析时出错:\n{error_msg}")
@@ -0,0 +1,113 @@
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel,
+                            QTableWidget, QTableWidgetItem, QHeaderView,
+                            QPlainTextEdit)
+from PyQt5.QtCore import QTimer
+from datetime import datetime
+from core.watchdog import EventLoopWatchdog, StallRecord
+import logging
+from typing import List
+
+logger = logging.getLogger("DiagnosticsPanel")
+
+# 面板可见时的刷新间隔(毫秒)
+REFRESH_INTERVAL_MS = 1000
+
+
+class DiagnosticsPanel(QWidget):
+    """诊断面板，显示界面响应延迟统计和最近的卡顿堆栈"""
+
+    def __init__(self, watchdog: EventLoopWatchdog):
+        super().__init__()
+        self.logger = logging.getLogger("DiagnosticsPanel")
+        self.watchdog = watchdog
+        self._records: List[StallRecord] = []
+        self._refresh_timer = QTimer(self)
+        self._refresh_timer.setInterval(REFRESH_INTERVAL_MS)
+        self._refresh_timer.timeout.connect(self.refresh)
+        self.init_ui()
+
+    def init_ui(self):
+        """初始化用户界面"""
+        self.logger.debug("初始化诊断面板UI")
+
+        layout = QVBoxLayout()
+
+        self.summary_label = QLabel()
+        self.histogram_table = self._create_table(["事件循环延迟", "次数"])
+        self.stall_table = self._create_table(["时间", "时长", "样本", "阻塞位置"])
+        self.stall_table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.stack_view = QPlainTextEdit()
+        self.stack_view.setReadOnly(True)
+        self.stack_view.setPlaceholderText("选择一次卡顿查看GUI线程堆栈")
+
+        tables_layout = QHBoxLayout()
+        left_layout = QVBoxLayout()
+        left_layout.addWidget(QLabel("延迟分布:"))
+        left_layout.addWidget(self.histogram_table)
+        right_layout = QVBoxLayout()
+        right_layout.addWidget(QLabel("最近卡顿:"))
+        right_layout.addWidget(self.stall_table)
+        tables_layout.addLayout(left_layout, 30)
+        tables_layout.addLayout(right_layout, 70)
+
+        layout.addWidget(self.summary_label)
+        layout.addLayout(tables_layout)
+        layout.addWidget(QLabel("堆栈:"))
+        layout.addWidget(self.stack_view)
+        self.setLayout(layout)
+
+        self.stall_table.currentCellChanged.connect(self._show_stack)
+
+        self.logger.info("诊断面板初始化完成")
+
+    @staticmethod
+    def _create_table(headers: List[str]) -> QTableWidget:
+        """创建只读表格"""
+        table = QTableWidget(0, len(headers))
+        table.setHorizontalHeaderLabels(headers)
+        table.setEditTriggers(QTableWidget.NoEditTriggers)
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        table.verticalHeader().setVisible(False)
+        return table
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
+        self._refresh_timer.start()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self._refresh_timer.stop()
+
+    def refresh(self):
+        """读取监测统计并显示"""
+        stats = self.watchdog.stats()
+        self.summary_label.setText(
+            f"心跳 {stats['beats']} 次, 延迟 P50 {stats['p50'] * 1000:.0f}ms, "
+            f"P99 {stats['p99'] * 1000:.0f}ms, 最大 {stats['max'] * 1000:.0f}ms; "
+            f"卡顿 {stats['stalls']} 次, 共 {stats['stall_time']:.1f}秒")
+        self._fill_table(self.histogram_table, stats['histogram'])
+
+        records = self.watchdog.records()
+        if [id(r) for r in records] == [id(r) for r in self._records]:
+            return
+        self._records = records
+        self._fill_table(self.stall_table, [
+            (datetime.fromtimestamp(r.started).strftime('%H:%M:%S'),
+             f"{r.duration * 1000:.0f}ms", r.samples, r.culprit or "未知")
+            for r in records
+        ])
+
+    def _show_stack(self, row: int, *args):
+        if 0 <= row < len(self._records):
+            self.stack_view.setPlainText(self._records[row].format_stack())
+
+    @staticmethod
+    def _fill_table(table: QTableWidget, rows: List[tuple]):
+        """填充表格"""
+        table.setUpdatesEnabled(False)
+        table.setRowCount(len(rows))
+        for r, row in enumerate(rows):
+            for c, value in enumerate(row):
+                table.setItem(r, c, QTableWidgetItem(str(value)))
+        table.setUpdatesEnabled(True)
@@ -1,28 +1,70 @@
-import logging
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, 
                             QPushButton, QListWidget, QLabel, 
                             QInputDialog, QMessageBox, QListWidgetItem,
-                            QGroupBox, QComboBox)
-from PyQt5.QtCore import Qt, pyqtSignal
-from core.group_manager import GroupManager
+                            QLineEdit, QFileDialog, QProgressBar)
+from PyQt5.QtCore import Qt, QPoint, QSize, QTimer, pyqtSignal
+from PyQt5.QtGui import QIcon, QImage, QPixmap
+from core.group_manager import GroupManager, MERGE_UPDATE, MERGE_KEEP, MERGE_REPLACE
+from core.group_io import export_groups, import_groups
+from core.task_scheduler import get_shared_scheduler, PRIORITY_NORMAL
+from core.worker import Worker
+from core.avatars import AvatarLoader
+from core.group_events import (GroupChangeEvent, GROUP_CREATED, GROUP_DELETED,
+                               ACCOUNTS_ADDED, ACCOUNTS_REMOVED, ACCOUNTS_MOVED,
+                               ACCOUNTS_UPDATED, GROUPS_RELOADED)
 from core.config_manager import ConfigManager
 import logging
 from typing import List, Dict, Optional
 
 logger = logging.getLogger("GroupPanel")
 
+# 导入时已有账号的处理方式
+MERGE_POLICY_LABELS = {
+    "用导入数据更新已有账号": MERGE_UPDATE,
+    "保留已有账号数据": MERGE_KEEP,
+    "用导入数据替换已有账号": MERGE_REPLACE,
+}
+
+FILE_FILTER = "JSON Lines (*.jsonl);;CSV文件 (*.csv);;JSON文件 (*.json)"
+
+AVATAR_SIZE = 32
+# 列表项数据: 已显示的头像地址
+AVATAR_ROLE = Qt.UserRole + 2
+
 class GroupPanel(QWidget):
     """分组管理面板，处理Twitter账号的分组管理"""
     
-    groups_updated = pyqtSignal()  # 分组更新信号
+    groups_updated = pyqtSignal()  # 分组列表(创建、删除、重新加载)变化信号
+    group_changed = pyqtSignal(object)  # GroupChangeEvent，槽函数总在GUI线程执行
     
     def __init__(self, config: ConfigManager):
         super().__init__()
         self.logger = logging.getLogger("GroupPanel")
         self.config = config
-        self.group_manager = GroupManager()
+        # 有快照时后台加载，完成后经GROUPS_RELOADED刷新
+        self.group_manager = GroupManager(background_load=True)
+        self.apply_settings(self.config.get_app_settings())
         self.current_group = None
+        # 当前显示分组中 用户名 -> 列表项，用于按事件增量更新
+        self._account_items: Dict[str, QListWidgetItem] = {}
+        # 头像只为可见行加载，滚动停止后再请求
+        self.avatars = AvatarLoader(AVATAR_SIZE)
+        self.avatars.loaded.connect(self._on_avatar_loaded)
+        self._avatar_timer = QTimer(self)
+        self._avatar_timer.setSingleShot(True)
+        self._avatar_timer.setInterval(50)
+        self._avatar_timer.timeout.connect(self._request_visible_avatars)
+        placeholder = QPixmap(AVATAR_SIZE, AVATAR_SIZE)
+        placeholder.fill(Qt.transparent)
+        self._placeholder_icon = QIcon(placeholder)
+        shown_loaded = self.group_manager.loaded
         self.init_ui()
+        # 变更可能发生在工作线程中，经信号排队到GUI线程再更新界面
+        self.group_changed.connect(self._apply_change)
+        self.group_manager.subscribe(self.group_changed.emit)
+        if not shown_loaded and self.group_manager.loaded:
+            # 后台加载在订阅之前完成，GROUPS_RELOADED已错过
+            self.refresh_group_list()
         
     def init_ui(self):
         """初始化用户界面"""
@@ -36,7 +78,6 @@ class GroupPanel(QWidget):
         
         self.group_list = QListWidget()
         self.group_list.itemClicked.connect(self.show_accounts_in_group)
-        self.refresh_group_list()
         
         # 分组操作按钮
         group_btn_layout = QHBoxLayout()
@@ -46,14 +87,39 @@ class GroupPanel(QWidget):
         group_btn_layout.addWidget(self.create_group_btn)
         group_btn_layout.addWidget(self.delete_group_btn)
         
+        # 导入导出
+        io_btn_layout = QHBoxLayout()
+        self.import_btn = QPushButton("导入...")
+        self.export_btn = QPushButton("导出...")
+        io_btn_layout.addWidget(self.import_btn)
+        io_btn_layout.addWidget(self.export_btn)
+        
+        self.io_progress = QProgressBar()
+        self.io_progress.setRange(0, 100)
+        self.io_progress.setVisible(False)
+        
         left_layout.addWidget(QLabel("分组列表:"))
         left_layout.addWidget(self.group_list)
         left_layout.addLayout(group_btn_layout)
+        left_layout.addLayout(io_btn_layout)
+        left_layout.addWidget(self.io_progress)
         
         # 右侧 - 账号管理
         right_layout = QVBoxLayout()
         
+        # 搜索框: 输入时在所有分组中查找账号
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("搜索用户名或名称...")
+        self.search_input.setClearButtonEnabled(True)
+        self.search_input.textChanged.connect(self.search_accounts)
+        
         self.account_list = QListWidget()
+        self.account_list.itemDoubleClicked.connect(self._open_search_result)
+        # 行高一致时大列表的布局和滚动开销与行数无关
+        self.account_list.setUniformItemSizes(True)
+        self.account_list.setIconSize(QSize(AVATAR_SIZE, AVATAR_SIZE))
+        self.account_list.verticalScrollBar().valueChanged.connect(self._schedule_avatars)
+        self.account_label = QLabel("分组中的账号:")
         
         # 账号操作按钮
         account_btn_layout = QHBoxLayout()
@@ -63,7 +129,8 @@ class GroupPanel(QWidget):
         account_btn_layout.addWidget(self.move_account_btn)
         account_btn_layout.addWidget(self.remove_account_btn)
         
-        right_layout.addWidget(QLabel("分组中的账号:"))
+        right_layout.addWidget(self.search_input)
+        right_layout.addWidget(self.account_label)
         right_layout.addWidget(self.account_list)
         right_layout.addLayout(account_btn_layout)
         
@@ -73,35 +140,247 @@ class GroupPanel(QWidget):
         
         self.setLayout(main_layout)
         
+        # 账号列表创建后再加载分组，加载时会显示第一个分组的账号
+        self.refresh_group_list()
+        
         # 连接信号槽
         self.create_group_btn.clicked.connect(self.create_group)
         self.delete_group_btn.clicked.connect(self.delete_group)
+        self.import_btn.clicked.connect(self.import_data)
+        self.export_btn.clicked.connect(self.export_data)
         self.move_account_btn.clicked.connect(self.move_account)
         self.remove_account_btn.clicked.connect(self.remove_account)
         
         self.logger.info("分组面板初始化完成")
     
+    def apply_settings(self, settings: dict):
+        """应用自动保存设置(save_interval单位为分钟)"""
+        self.group_manager.configure_autosave(
+            settings['auto_save'], settings['save_interval'] * 60)
+    
     def refresh_group_list(self):
-        """刷新分组列表"""
+        """刷新分组列表并重建账号列表，当前分组仍存在时保持选中
+        
+        后台加载完成(GROUPS_RELOADED)时也经此刷新，替换加载期间
+        按快照副本显示的行。
+        """
+        current = self.current_group
         self.group_list.clear()
         groups = self.group_manager.get_group_names()
         for group in groups:
             self.group_list.addItem(group)
         
         if groups:
-            self.group_list.setCurrentRow(0)
-            self.current_group = groups[0]
-            self.show_accounts_in_group(self.group_list.currentItem())
+            row = groups.index(current) if current in groups else 0
+            self.group_list.setCurrentRow(row)
+            self.current_group = groups[row]
+            if self._is_searching():
+                self.search_accounts(self.search_input.text())
+            else:
+                self.show_accounts_in_group(self.group_list.currentItem())
+        else:
+            self.current_group = None
+            self._clear_accounts()
+    
+    def _clear_accounts(self):
+        self.account_list.clear()
+        self._account_items.clear()
+    
+    def _is_searching(self) -> bool:
+        return bool(self.search_input.text().strip())
+    
+    def _add_account_items(self, usernames):
+        """在当前分组的账号列表末尾追加账号"""
+        registry = self.group_manager.registry
+        self._add_record_items(registry.get(username) for username in usernames)
+    
+    def _add_record_items(self, records):
+        for record in records:
+            if record is None or record.username in self._account_items:
+                continue
+            list_item = QListWidgetItem(self._placeholder_icon, record.display_name)
+            list_item.setData(Qt.UserRole, record.username)
+            self.account_list.addItem(list_item)
+            self._account_items[record.username] = list_item
+        self._schedule_avatars()
+    
+    def _schedule_avatars(self):
+        self._avatar_timer.start()
+    
+    def showEvent(self, event):
+        super().showEvent(event)
+        self._schedule_avatars()
+    
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._schedule_avatars()
+    
+    def _visible_items(self) -> List[QListWidgetItem]:
+        """账号列表中当前可见的行"""
+        first = self.account_list.indexAt(QPoint(0, 0)).row()
+        if first < 0:
+            return []
+        viewport = self.account_list.viewport()
+        last = self.account_list.indexAt(QPoint(0, viewport.height() - 1)).row()
+        if last < 0:
+            last = self.account_list.count() - 1
+        return [self.account_list.item(row) for row in range(first, last + 1)]
+    
+    def _request_visible_avatars(self):
+        """显示已缓存的头像，其余交给加载器在后台加载"""
+        missing = []
+        for list_item in self._visible_items():
+            record = self.group_manager.registry.get(list_item.data(Qt.UserRole))
+            url = record.profile_image_url if record is not None else None
+            if not url or list_item.data(AVATAR_ROLE) == url:
+                continue
+            image = self.avatars.get(url)
+            if image is None:
+                missing.append(url)
+            else:
+                self._set_avatar(list_item, url, image)
+        self.avatars.set_visible(missing)
+    
+    def _set_avatar(self, list_item: QListWidgetItem, url: str, image: QImage):
+        list_item.setIcon(QIcon(QPixmap.fromImage(image)))
+        list_item.setData(AVATAR_ROLE, url)
+    
+    def _on_avatar_loaded(self, url: str, image: QImage):
+        """头像加载完成后更新仍然可见的行"""
+        for list_item in self._visible_items():
+            record = self.group_manager.registry.get(list_item.data(Qt.UserRole))
+            if record is not None and record.profile_image_url == url:
+                self._set_avatar(list_item, url, image)
+    
+    def _remove_account_items(self, usernames):
+        """从当前分组的账号列表中删除账号"""
+        for username in usernames:
+            list_item = self._account_items.pop(username, None)
+            if list_item is not None:
+                self.account_list.takeItem(self.account_list.row(list_item))
+    
+    def _apply_change(self, event: GroupChangeEvent):
+        """按变更事件增量更新分组列表和账号列表"""
+        if event.kind == GROUPS_RELOADED:
+            self.refresh_group_list()
+        elif event.kind == GROUP_CREATED:
+            self.group_list.addItem(event.group)
+            if self.group_list.count() == 1:
+                self.group_list.setCurrentRow(0)
+                self.show_accounts_in_group(self.group_list.item(0))
+        elif event.kind == GROUP_DELETED:
+            for item in self.group_list.findItems(event.group, Qt.MatchExactly):
+                self.group_list.takeItem(self.group_list.row(item))
+            if event.group == self.current_group:
+                self.current_group = None
+                self._clear_accounts()
+                if self.group_list.count():
+                    self.group_list.setCurrentRow(0)
+                    self.show_accounts_in_group(self.group_list.item(0))
+        elif not self._is_searching():
+            if event.kind == ACCOUNTS_UPDATED:
+                for username in event.usernames:
+                    list_item = self._account_items.get(username)
+                    record = self.group_manager.registry.get(username)
+                    if list_item is not None and record is not None:
+                        list_item.setText(record.display_name)
+                self._schedule_avatars()
+            else:
+                if event.group == self.current_group and event.kind in (
+                        ACCOUNTS_REMOVED, ACCOUNTS_MOVED):
+                    self._remove_account_items(event.usernames)
+                    self._schedule_avatars()
+                if ((event.kind == ACCOUNTS_ADDED and event.group == self.current_group)
+                        or (event.kind == ACCOUNTS_MOVED and event.target == self.current_group)):
+                    self._add_account_items(event.usernames)
+        
+        if self._is_searching() and not event.changes_groups:
+            # 搜索结果中显示所在分组，成员变化后重新搜索
+            self.search_accounts(self.search_input.text())
+        if event.changes_groups:
+            self.groups_updated.emit()
     
     def show_accounts_in_group(self, item):
         """显示选中分组中的账号"""
         group_name = item.text()
         self.current_group = group_name
-        self.account_list.clear()
+        self._clear_accounts()
+        if self.search_input.text():
+            # 选择分组时退出搜索，blockSignals避免重复刷新
+            self.search_input.blockSignals(True)
+            self.search_input.clear()
+            self.search_input.blockSignals(False)
+        self.account_label.setText("分组中的账号:")
+        
+        self.account_list.setUpdatesEnabled(False)
+        self._add_record_items(self.group_manager.get_accounts_in_group(group_name))
+        self.account_list.setUpdatesEnabled(True)
+    
+    def search_accounts(self, text: str):
+        """在所有分组中搜索账号，搜索框清空时恢复当前分组"""
+        if not text.strip():
+            item = self.group_list.currentItem()
+            if item is not None:
+                self.show_accounts_in_group(item)
+            else:
+                self._clear_accounts()
+            return
         
-        accounts = self.group_manager.get_accounts_in_group(group_name)
-        for acc in accounts:
-            self.account_list.addItem(f"{acc['name']} (@{acc['username']})")
+        results = self.group_manager.search_accounts(text)
+        self._clear_accounts()
+        self.account_label.setText(f"搜索结果({len(results)}), 双击跳转到所在分组:")
+        for record, groups in results:
+            list_item = QListWidgetItem(self._placeholder_icon,
+                                        f"{record.display_name}  [{', '.join(groups)}]")
+            list_item.setData(Qt.UserRole, record.username)
+            list_item.setData(Qt.UserRole + 1, groups)
+            self.account_list.addItem(list_item)
+        self._schedule_avatars()
+    
+    def _open_search_result(self, item):
+        """跳转到搜索结果所在的第一个分组并选中该账号"""
+        groups = item.data(Qt.UserRole + 1)
+        if not groups:
+            return
+        username = item.data(Qt.UserRole)
+        matches = self.group_list.findItems(groups[0], Qt.MatchExactly)
+        if not matches:
+            return
+        self.group_list.setCurrentItem(matches[0])
+        self.show_accounts_in_group(matches[0])
+        for row in range(self.account_list.count()):
+            if self.account_list.item(row).data(Qt.UserRole) == username:
+                self.account_list.setCurrentRow(row)
+                self.account_list.scrollToItem(self.account_list.item(row))
+                break
+    
+    def _selected_username(self, item) -> str:
+        """取账号列表项对应的用户名"""
+        username = item.data(Qt.UserRole)
+        if username:
+            return username
+        # 从显示文本中提取用户名
+        return item.text().split('@')[-1].rstrip(')')
+    
+    def _source_group(self, item) -> Optional[str]:
+        """取账号列表项所在的分组
+        
+        分组列表中显示的是当前分组；搜索结果可能来自其他分组，
+        使用结果项中保存的所在分组，有多个时由用户选择。
+        
+        Returns:
+            分组名，无法确定或用户取消时返回None
+        """
+        groups = item.data(Qt.UserRole + 1)
+        if not groups:
+            return self.current_group
+        if len(groups) == 1:
+            return groups[0]
+        group, ok = QInputDialog.getItem(
+            self, "选择分组", "账号在多个分组中，请选择要操作的分组:",
+            groups, 0, False, flags=Qt.WindowCloseButtonHint
+        )
+        return group if ok else None
     
     def create_group(self):
         """创建新分组"""
@@ -114,8 +393,6 @@ class GroupPanel(QWidget):
             success, message = self.group_manager.create_group(group_name)
             QMessageBox.information(self, "提示", message)
             if success:
-                self.refresh_group_list()
-                self.groups_updated.emit()
                 logger.info(f"创建新分组: {group_name}")
     
     def delete_group(self):
@@ -136,77 +413,121 @@ class GroupPanel(QWidget):
             success, message = self.group_manager.delete_group(group_name)
             QMessageBox.information(self, "提示", message)
             if success:
-                self.refresh_group_list()
-                self.groups_updated.emit()
                 logger.info(f"删除分组: {group_name}")
     
     def move_account(self):
         """移动账号到其他分组"""
-        if not self.current_group:
-            QMessageBox.warning(self, "警告", "请先选择一个分组")
-            return
-            
         account_item = self.account_list.currentItem()
         if not account_item:
             QMessageBox.warning(self, "警告", "请先选择一个账号")
             return
+        source_group = self._source_group(account_item)
+        if not source_group:
+            if not self._is_searching():
+                QMessageBox.warning(self, "警告", "请先选择一个分组")
+            return
             
-        # 从显示文本中提取用户名
-        account_text = account_item.text()
-        username = account_text.split('@')[-1].rstrip(')')
+        username = self._selected_username(account_item)
         
         # 获取目标分组
         target_group, ok = QInputDialog.getItem(
             self, "选择目标分组", 
             "请选择目标分组:", 
             [g for g in self.group_manager.get_group_names() 
-             if g != self.current_group], 
+             if g != source_group], 
             0, False, flags=Qt.WindowCloseButtonHint
         )
         
         if ok and target_group:
             success, message = self.group_manager.move_account(
-                self.current_group, target_group, username)
+                source_group, target_group, username)
             QMessageBox.information(self, "提示", message)
             if success:
-                self.show_accounts_in_group(self.group_list.currentItem())
-                self.groups_updated.emit()
                 logger.info(f"移动账号 {username} 到 {target_group}")
     
     def remove_account(self):
         """从分组中移除账号"""
-        if not self.current_group:
-            QMessageBox.warning(self, "警告", "请先选择一个分组")
-            return
-            
         account_item = self.account_list.currentItem()
         if not account_item:
             QMessageBox.warning(self, "警告", "请先选择一个账号")
             return
+        source_group = self._source_group(account_item)
+        if not source_group:
+            if not self._is_searching():
+                QMessageBox.warning(self, "警告", "请先选择一个分组")
+            return
             
-        # 从显示文本中提取用户名
-        account_text = account_item.text()
-        username = account_text.split('@')[-1].rstrip(')')
+        username = self._selected_username(account_item)
         
         reply = QMessageBox.question(
             self, "确认", 
-            f"确定要从分组 '{self.current_group}' 移除账号 @{username} 吗?", 
+            f"确定要从分组 '{source_group}' 移除账号 @{username} 吗?", 
             QMessageBox.Yes | QMessageBox.No
         )
         
         if reply == QMessageBox.Yes:
-            # 通过移动账号到临时分组然后删除临时分组来实现移除
-            temp_group = "__temp__"
-            self.group_manager.create_group(temp_group)
-            
-            success, message = self.group_manager.move_account(
-                self.current_group, temp_group, username)
+            success, message = self.group_manager.remove_account(
+                source_group, username)
             
             if success:
-                self.group_manager.delete_group(temp_group)
-                self.show_accounts_in_group(self.group_list.currentItem())
-                self.groups_updated.emit()
-                logger.info(f"从分组 {self.current_group} 移除账号 {username}")
+                logger.info(f"从分组 {source_group} 移除账号 {username}")
                 QMessageBox.information(self, "成功", f"已从分组移除 @{username}")
             else:
-                QMessageBox.warning(self, "失败", message)
\ No newline at end of file
+                QMessageBox.warning(self, "失败", message)
+    
+    def export_data(self):
+        """导出分组和账号到JSONL或CSV文件"""
+        path, _ = QFileDialog.getSaveFileName(self, "导出分组", "groups.jsonl", FILE_FILTER)
+        if not path:
+            return
+        reply = QMessageBox.question(
+            self, "导出Token",
+            "导出文件中是否包含账号Token?",
+            QMessageBox.Yes | QMessageBox.No, QMessageBox.No
+        )
+        self._start_io(
+            Worker(export_groups, self.group_manager, path,
+                   include_tokens=(reply == QMessageBox.Yes)),
+            lambda count: QMessageBox.information(self, "导出完成", f"已导出{count}行到\n{path}")
+        )
+    
+    def import_data(self):
+        """从JSONL或CSV文件导入分组和账号"""
+        path, _ = QFileDialog.getOpenFileName(self, "导入分组", "", FILE_FILTER)
+        if not path:
+            return
+        label, ok = QInputDialog.getItem(
+            self, "导入方式", "已存在的账号:", list(MERGE_POLICY_LABELS), 0, False,
+            flags=Qt.WindowCloseButtonHint
+        )
+        if not ok:
+            return
+        # 文件中没有分组列的行导入到当前分组
+        self._start_io(
+            Worker(import_groups, self.group_manager, path,
+                   policy=MERGE_POLICY_LABELS[label],
+                   default_group=self.current_group),
+            lambda stats: QMessageBox.information(
+                self, "导入完成",
+                f"共{stats['rows']}行: 新增账号{stats['created']}个, "
+                f"加入分组{stats['added']}次, 更新账号{stats['updated']}个, "
+                f"跳过{stats['skipped']}行")
+        )
+    
+    def _start_io(self, worker: Worker, on_result):
+        """在后台执行导入导出，界面变化由分组变更事件驱动"""
+        self.import_btn.setEnabled(False)
+        self.export_btn.setEnabled(False)
+        self.io_progress.setValue(0)
+        self.io_progress.setVisible(True)
+        worker.signals.progress.connect(lambda value, message: self.io_progress.setValue(value))
+        worker.signals.result.connect(on_result)
+        worker.signals.error.connect(
+            lambda error: QMessageBox.critical(self, "错误", f"导入导出失败:\n{error}"))
+        worker.signals.finished.connect(self._on_io_finished)
+        get_shared_scheduler().submit(worker, PRIORITY_NORMAL)
+    
+    def _on_io_finished(self):
+        self.io_progress.setVisible(False)
+        self.import_btn.setEnabled(True)
+        self.export_btn.setEnabled(True)
\ No newline at end of file
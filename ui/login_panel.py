@@ -1,15 +1,20 @@
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, 
                             QPushButton, QTextEdit, QLabel, 
                             QListWidget, QMessageBox, QProgressBar,
-                            QInputDialog, QFileDialog)
+                            QFileDialog)
 from PyQt5.QtCore import Qt, pyqtSignal
-from PyQt5.QtCore import QThreadPool
-from core.worker import Worker, BatchWorker
-from core.twitter_api import TwitterAPI
+from core.worker import Worker, AdaptiveBatchWorker, ErrorAggregator
+from core.task_scheduler import TaskScheduler, get_shared_scheduler, PRIORITY_INTERACTIVE
+from core.twitter_api import TwitterAPI, TwitterAPIError
+from core.concurrency import AdaptiveLimiter, is_auth_rejected
 from core.config_manager import ConfigManager
+from core.account_registry import (AccountRecord, AccountRegistry,
+                                   STATUS_VALID, STATUS_INVALID, STATUS_ERROR)
+from core.daemon import DaemonClient
+from core.persistence import atomic_write_json
 import json
 import os
-from pathlib import Path
+import time
 import logging
 from typing import List, Dict, Optional
 
@@ -19,17 +24,29 @@ class LoginPanel(QWidget):
     """账号登录面板，处理Twitter账号的批量登录和验证"""
     
     login_complete = pyqtSignal(list)  # 登录完成信号
+    daemon_event = pyqtSignal(dict)  # 后台服务推送的事件(从连接的读取线程转发)
     
-    def __init__(self, config: ConfigManager):
+    def __init__(self, config: ConfigManager,
+                 registry: Optional[AccountRegistry] = None,
+                 scheduler: Optional[TaskScheduler] = None):
         super().__init__()
         self.config = config
+        self.registry = registry if registry is not None else AccountRegistry()
         self.tokens_file = "config/tokens.json"
-        self.accounts: List[Dict] = []
-        self.thread_pool = QThreadPool()
-        self.thread_pool.setMaxThreadCount(
+        self.accounts: List[AccountRecord] = []
+        self.scheduler = scheduler if scheduler is not None else get_shared_scheduler()
+        self.scheduler.set_max_threads(
             self.config.getint('DEFAULT', 'max_threads', 5)
         )
+        self.limiter: Optional[AdaptiveLimiter] = None
         self.logger = logging.getLogger("LoginPanel")
+        # 连接后台服务时批量验证由服务执行；已提交但结果尚未合并的任务记录在文件中，
+        # 窗口重新打开后继续跟踪
+        self.daemon: Optional[DaemonClient] = None
+        self.daemon_jobs_file = "config/daemon_jobs.json"
+        self._daemon_jobs: Dict[str, int] = self._load_daemon_jobs()
+        self._daemon_fetching = set()
+        self.daemon_event.connect(self._on_daemon_event)
         self.init_ui()
         
     def init_ui(self):
@@ -81,35 +98,57 @@ class LoginPanel(QWidget):
         self.load_btn.clicked.connect(self.load_tokens_from_file)
         self.login_btn.clicked.connect(self.batch_login)
         self.clear_btn.clicked.connect(self.clear_tokens)
+        self.account_list.itemDoubleClicked.connect(self.reverify_account)
         
         # 加载已有token
         self.load_existing_tokens()
         
         self.logger.info("登录面板初始化完成")
     
+    def apply_settings(self, settings: dict):
+        """应用并发设置，线程池大小即时生效，不影响正在执行的任务"""
+        self.scheduler.set_max_threads(settings['max_threads'])
+        if self.limiter is not None:
+            self.limiter.set_bounds(settings['min_threads'], settings['max_threads'])
+        self.logger.debug(f"登录线程池大小调整为 {settings['max_threads']}")
+    
     def load_existing_tokens(self):
-        """加载已保存的token"""
+        """在后台线程中加载已保存的token，避免大文件阻塞启动"""
+        worker = Worker(self._read_saved_tokens)
+        worker.signals.result.connect(self._show_saved_tokens)
+        worker.signals.error.connect(self._handle_tokens_load_error)
+        self.scheduler.submit(worker, PRIORITY_INTERACTIVE)
+    
+    def _read_saved_tokens(self, progress_callback: callable = None) -> Optional[List[str]]:
+        """读取tokens.json(在工作线程中执行)"""
+        if not os.path.exists(self.tokens_file):
+            return None
+        with open(self.tokens_file, 'r', encoding='utf-8') as f:
+            content = f.read().strip()
+        if not content:
+            self.logger.warning("tokens.json 文件为空")
+            return None
+        
         try:
-            if os.path.exists(self.tokens_file):
-                with open(self.tokens_file, 'r', encoding='utf-8') as f:
-                    content = f.read().strip()
-                    if not content:
-                        self.logger.warning("tokens.json 文件为空")
-                        return
-                    
-                    try:
-                        tokens = json.loads(content)
-                        if isinstance(tokens, list):
-                            self.token_input.setText("\n".join(tokens))
-                        else:
-                            self.logger.warning("tokens.json 格式不正确，应为列表")
-                    except json.JSONDecodeError:
-                        self.logger.warning("tokens.json 格式错误，重置为空文件")
-                        with open(self.tokens_file, 'w') as f:
-                            json.dump([], f)
-        except Exception as e:
-            self.logger.error(f"加载已有token失败: {str(e)}")
-            QMessageBox.warning(self, "警告", f"加载token失败: {str(e)}")
+            tokens = json.loads(content)
+        except json.JSONDecodeError:
+            self.logger.warning("tokens.json 格式错误，重置为空文件")
+            with open(self.tokens_file, 'w') as f:
+                json.dump([], f)
+            return None
+        if not isinstance(tokens, list):
+            self.logger.warning("tokens.json 格式不正确，应为列表")
+            return None
+        return tokens
+    
+    def _show_saved_tokens(self, tokens: Optional[List[str]]):
+        # 加载期间用户已输入内容时不覆盖
+        if tokens and not self.token_input.toPlainText().strip():
+            self.token_input.setText("\n".join(tokens))
+    
+    def _handle_tokens_load_error(self, error_msg: str):
+        self.logger.error(f"加载已有token失败: {error_msg}")
+        QMessageBox.warning(self, "警告", f"加载token失败: {error_msg}")
     
     def load_tokens_from_file(self):
         """从文件导入token"""
@@ -144,7 +183,7 @@ class LoginPanel(QWidget):
             QMessageBox.warning(self, "警告", "请输入至少一个Token")
             return
             
-        tokens = tokens_text.split('\n')
+        tokens = [t.strip() for t in tokens_text.split('\n') if t.strip()]
         self.account_list.clear()
         self.accounts.clear()
         
@@ -153,22 +192,206 @@ class LoginPanel(QWidget):
         self.progress_bar.setValue(0)
         self.status_label.setText("正在验证Token...")
         
+        if self.daemon is not None and self.daemon.connected:
+            worker = Worker(self._submit_to_daemon, self.daemon, tokens)
+            worker.signals.result.connect(self._on_daemon_job_submitted)
+            worker.signals.error.connect(self._handle_daemon_error)
+            self.scheduler.submit(worker, PRIORITY_INTERACTIVE)
+            return
+        
+        # 并发数在最小/最大线程数之间自适应调整
+        settings = self.config.get_app_settings()
+        self.limiter = AdaptiveLimiter(
+            min_limit=settings['min_threads'],
+            max_limit=settings['max_threads']
+        )
+        
         # 创建并启动工作线程
-        worker = BatchWorker(
+        worker = AdaptiveBatchWorker(
             tokens,
             self._verify_single_token,
-            parent_ui=self
+            self.limiter,
+            item_deadline=settings['item_deadline'] or None
         )
-        worker.signals.result.connect(self._handle_login_result)
+        worker.signals.result.connect(
+            lambda results, tokens=tokens: self._handle_login_result(results, tokens))
         worker.signals.error.connect(self._handle_login_error)
         worker.signals.progress.connect(self._update_progress)
+        worker.signals.concurrency.connect(self._update_concurrency)
+        worker.signals.summary.connect(self._show_error_summary)
         worker.signals.finished.connect(self._on_login_finished)
         
-        self.thread_pool.start(worker)
+        self.scheduler.start_batch(worker)
+    
+    def attach_daemon(self, client: DaemonClient):
+        """之后的批量验证交给后台服务，并继续跟踪之前提交的任务"""
+        self.daemon = client
+        client.on_event = self.daemon_event.emit
+        client.on_disconnect = lambda: self.daemon_event.emit({'event': 'disconnected'})
+        if self._daemon_jobs:
+            self._check_daemon_jobs(list(self._daemon_jobs))
+    
+    def detach_daemon(self):
+        """断开后台服务，已提交的任务在服务中继续执行，重新连接后合并结果"""
+        if self.daemon is None:
+            return
+        self.daemon.on_event = None
+        self.daemon.on_disconnect = None
+        self.daemon.close()
+        self.daemon = None
+    
+    def _load_daemon_jobs(self) -> Dict[str, int]:
+        try:
+            with open(self.daemon_jobs_file, 'r', encoding='utf-8') as f:
+                jobs = json.load(f)
+            return jobs if isinstance(jobs, dict) else {}
+        except (OSError, ValueError):
+            return {}
+    
+    def _save_daemon_jobs(self):
+        try:
+            atomic_write_json(self.daemon_jobs_file, self._daemon_jobs)
+        except OSError as e:
+            self.logger.error(f"保存后台任务列表失败: {str(e)}")
+    
+    def _submit_to_daemon(self, client: DaemonClient, tokens: List[str],
+                          progress_callback: callable = None) -> Dict:
+        """提交验证任务(在工作线程中执行)"""
+        return client.call('submit', tokens=tokens)
+    
+    def _on_daemon_job_submitted(self, result: Dict):
+        self._daemon_jobs[result['job']] = result['total']
+        self._save_daemon_jobs()
+        self.status_label.setText(f"已提交到后台服务: {result['total']}个Token")
+        # 很小的任务可能在登记前已经完成，主动查询一次
+        self._check_daemon_jobs([result['job']])
+    
+    def _check_daemon_jobs(self, job_ids: List[str]):
+        worker = Worker(self._query_daemon_jobs, self.daemon, job_ids)
+        worker.signals.result.connect(self._resume_daemon_jobs)
+        worker.signals.error.connect(self._handle_daemon_error)
+        self.scheduler.submit(worker, PRIORITY_INTERACTIVE)
+    
+    def _query_daemon_jobs(self, client: DaemonClient, job_ids: List[str],
+                           progress_callback: callable = None) -> Dict[str, Optional[Dict]]:
+        """查询任务状态(在工作线程中执行)，服务中已不存在的任务为None"""
+        statuses = {}
+        for job_id in job_ids:
+            found = client.call('status', job=job_id)
+            statuses[job_id] = found[0] if found else None
+        return statuses
+    
+    def _resume_daemon_jobs(self, statuses: Dict[str, Optional[Dict]]):
+        for job_id, status in statuses.items():
+            if status is None:
+                self.logger.warning(f"后台服务中没有任务 {job_id}，不再跟踪")
+                self._daemon_jobs.pop(job_id, None)
+                self._save_daemon_jobs()
+                continue
+            self._on_daemon_event({'event': 'progress', 'job': job_id,
+                                   'done': status['results'], 'total': status['total'],
+                                   'finished': status['finished']})
+    
+    def _on_daemon_event(self, event: Dict):
+        """显示后台任务进度，任务结束后读取结果并合并"""
+        if event.get('event') == 'disconnected':
+            self.daemon = None
+            self.progress_bar.setVisible(False)
+            self.status_label.setText("后台服务连接已断开")
+            return
+        job_id = event.get('job')
+        if event.get('event') != 'progress' or job_id not in self._daemon_jobs:
+            return
+        if not event['finished']:
+            self.progress_bar.setVisible(True)
+            self.progress_bar.setValue(int(event['done'] * 100 / max(1, event['total'])))
+            self.status_label.setText(f"后台服务正在验证: {event['done']}/{event['total']}")
+            return
+        if job_id in self._daemon_fetching or self.daemon is None:
+            return
+        self._daemon_fetching.add(job_id)
+        worker = Worker(self._fetch_daemon_results, self.daemon, job_id)
+        worker.signals.result.connect(self._apply_daemon_results)
+        worker.signals.error.connect(self._handle_daemon_error)
+        worker.signals.finished.connect(lambda: self._daemon_fetching.discard(job_id))
+        self.scheduler.submit(worker, PRIORITY_INTERACTIVE)
+    
+    def _fetch_daemon_results(self, client: DaemonClient, job_id: str,
+                              progress_callback: callable = None) -> tuple:
+        """读取任务结果(在工作线程中执行)"""
+        return job_id, client.call('results', timeout=300, job=job_id)
+    
+    def _apply_daemon_results(self, job_results: tuple):
+        """合并后台任务的结果，与本窗口执行的批量验证相同"""
+        job_id, results = job_results
+        if self._daemon_jobs.pop(job_id, None) is None:
+            return
+        self._save_daemon_jobs()
+        valid = [r for r in results if r.get('status') == STATUS_VALID and r.get('username')]
+        self._handle_login_result(results)
+        self._on_login_finished()
+        if len(valid) < len(results):
+            self.status_label.setText(
+                f"验证完成: {len(valid)}个有效, {len(results) - len(valid)}个无效或出错")
+    
+    def _handle_daemon_error(self, error_msg: str):
+        self.logger.error(f"后台服务请求失败: {error_msg}")
+        self.progress_bar.setVisible(False)
+        self.status_label.setText("后台服务请求失败，详见日志")
+    
+    def reverify_account(self, item):
+        """重新验证双击的账号
+
+        作为交互任务提交，即使批量验证占满线程也会立即执行。
+        """
+        row = self.account_list.row(item)
+        if row < 0 or row >= len(self.accounts):
+            return
+        record = self.accounts[row]
+        self.status_label.setText(f"正在验证 {record.display_name}...")
+        
+        worker = Worker(self._verify_single_token, record.token)
+        worker.signals.result.connect(
+            lambda result, record=record: self._handle_reverify_result(record, result))
+        worker.signals.error.connect(
+            lambda error_msg, record=record: self._handle_reverify_error(record, error_msg))
+        self.scheduler.submit(worker, PRIORITY_INTERACTIVE)
+    
+    def _handle_reverify_result(self, record: AccountRecord, result: Optional[Dict]):
+        """更新重新验证的账号"""
+        if result is None:
+            self._handle_reverify_error(record, "响应中没有用户信息")
+            return
+        if result['status'] == STATUS_INVALID:
+            record.update({'status': STATUS_INVALID, 'last_verified': result['last_verified']})
+            self.status_label.setText(f"{record.display_name} 验证失败: Token无效")
+        else:
+            record = self.registry.upsert(result)
+            # 验证期间列表可能已被批量登录重建
+            if record in self.accounts:
+                self.account_list.item(self.accounts.index(record)).setText(
+                    record.display_name)
+            self.status_label.setText(f"{record.display_name} 验证有效")
+        self.login_complete.emit(list(self.accounts))
+    
+    def _handle_reverify_error(self, record: AccountRecord, error_msg: str):
+        """重新验证出错(限流、网络或服务端错误)不能说明Token无效，只记录出错状态"""
+        self.logger.warning(f"重新验证 {record.display_name} 出错: {error_msg}")
+        record.update({'status': STATUS_ERROR, 'last_verified': time.time()})
+        self.status_label.setText(f"{record.display_name} 验证出错，稍后重试")
+        self.login_complete.emit(list(self.accounts))
     
-    def _verify_single_token(self, token: str, progress_callback: callable, 
+    def _verify_single_token(self, token: str, progress_callback: callable = None, 
                            parent_ui=None) -> Optional[Dict]:
-        """验证单个Token"""
+        """验证单个Token
+        
+        只有服务端拒绝认证(401/403)时返回status为invalid的结果；
+        限流、超时和网络错误继续抛出，由批量任务降低并发后重试，
+        其他错误也继续抛出，记为出错而不是无效。
+        
+        Returns:
+            验证结果，响应中没有用户信息时为None
+        """
         token = token.strip()
         if not token:
             return None
@@ -176,40 +399,66 @@ class LoginPanel(QWidget):
         try:
             api = TwitterAPI(token, parent_ui)
             user_info = api.verify_credentials()
-            
-            if 'data' in user_info:
-                return {
-                    'token': token,
-                    'username': user_info['data'].get('username', '未知用户'),
-                    'name': user_info['data'].get('name', '未知名称'),
-                    'id': user_info['data'].get('id')
-                }
-        except Exception as e:
-            self.logger.warning(f"验证Token失败: {str(e)}")
-            return None
+        except TwitterAPIError as e:
+            if not is_auth_rejected(e):
+                raise
+            self.logger.warning(f"Token无效: {str(e)}")
+            return {'token': token, 'status': STATUS_INVALID, 'error': str(e),
+                    'last_verified': time.time()}
+        
+        if 'data' in user_info:
+            return {
+                'token': token,
+                'username': user_info['data'].get('username', '未知用户'),
+                'name': user_info['data'].get('name', '未知名称'),
+                'id': user_info['data'].get('id'),
+                'profile_image_url': user_info['data'].get('profile_image_url'),
+                'status': STATUS_VALID,
+                'last_verified': time.time()
+            }
+        return None
     
-    def _handle_login_result(self, results: List[Dict]):
-        """处理登录结果"""
-        valid_results = [r for r in results if r is not None]
+    def _handle_login_result(self, results: List[Optional[Dict]],
+                             tokens: Optional[List[str]] = None):
+        """处理登录结果
+        
+        只从tokens.json中移除被拒绝认证的token，验证出错的token保留，下次再验证。
         
-        # 保存有效的token
-        valid_tokens = [r['token'] for r in valid_results]
+        Args:
+            results: 验证结果(status为valid、invalid或error)，None表示验证出错
+            tokens: 与results按位置对应的token，用于保留出错项的token
+        """
+        valid_results = []
+        kept_tokens = []
+        for i, result in enumerate(results):
+            if result is None:
+                if tokens is not None:
+                    kept_tokens.append(tokens[i])
+            elif result.get('status') == STATUS_VALID and result.get('username'):
+                valid_results.append(result)
+                kept_tokens.append(result['token'])
+            elif result.get('status') != STATUS_INVALID:
+                kept_tokens.append(result['token'])
+        
+        # 保存有效和出错的token
         try:
             with open(self.tokens_file, 'w') as f:
-                json.dump(valid_tokens, f)
+                json.dump(kept_tokens, f)
         except Exception as e:
             self.logger.error(f"保存Token失败: {str(e)}")
             QMessageBox.warning(self, "警告", f"保存Token失败: {str(e)}")
         
         # 更新账号列表
         for result in valid_results:
-            self.account_list.addItem(f"{result['name']} (@{result['username']})")
-            self.accounts.append(result)
+            record = self.registry.upsert(result)
+            self.account_list.addItem(record.display_name)
+            self.accounts.append(record)
         
         # 发出登录完成信号
-        self.login_complete.emit(valid_results)
+        self.login_complete.emit(list(self.accounts))
         
-        self.logger.info(f"批量登录完成，验证了{len(valid_results)}个账号")
+        self.logger.info(f"批量登录完成，验证了{len(valid_results)}个账号，"
+                         f"{len(kept_tokens) - len(valid_results)}个出错的Token保留")
     
     def _handle_login_error(self, error_msg: str):
         """处理登录错误"""
@@ -221,9 +470,19 @@ class LoginPanel(QWidget):
         self.progress_bar.setValue(progress)
         self.status_label.setText(message)
     
+    def _show_error_summary(self, summary: dict):
+        """批量任务结束后汇总显示失败项"""
+        self.logger.warning(f"批量登录失败汇总: {summary['counts']}")
+        QMessageBox.warning(self, "部分Token验证失败", ErrorAggregator.format(summary))
+    
+    def _update_concurrency(self, limit: int):
+        """更新当前并发数显示"""
+        self.progress_bar.setFormat(f"%p% (并发 {limit})")
+    
     def _on_login_finished(self):
         """登录完成后的清理工作"""
         self.progress_bar.setVisible(False)
+        self.progress_bar.setFormat("%p%")
         self.status_label.setText("验证完成")
         
         if self.account_list.count() > 0:
@@ -2,8 +2,18 @@ from PyQt5.QtWidgets import QMainWindow, QTabWidget, QStatusBar
 from PyQt5.QtCore import pyqtSignal
 from ui.login_panel import LoginPanel
 from ui.group_panel import GroupPanel
+from ui.analytics_panel import AnalyticsPanel
+from ui.stats_panel import StatsPanel
+from ui.diagnostics_panel import DiagnosticsPanel
 from ui.settings_panel import SettingsPanel
 from core.config_manager import ConfigManager
+from core.daemon import DaemonError, configure_network, connect_or_spawn
+from core.group_stats import GroupStats
+from core.proxy_pool import get_shared_proxy_pool
+from core.task_scheduler import get_shared_scheduler, PRIORITY_INTERACTIVE
+from core.worker import Worker
+from core.health_scheduler import HealthCheckScheduler
+from core.watchdog import EventLoopWatchdog
 import logging
 
 logger = logging.getLogger("MainWindow")
@@ -17,6 +27,7 @@ class MainWindow(QMainWindow):
         super().__init__()
         self.logger = logging.getLogger("MainWindow")
         self.config = ConfigManager()
+        self.daemon = None
         self.init_ui()
         
     def init_ui(self):
@@ -26,6 +37,7 @@ class MainWindow(QMainWindow):
         # 加载配置
         settings = self.config.get_app_settings()
         self.logger.debug(f"加载应用设置: {settings}")
+        self.apply_network_settings(settings)
         
         # 设置窗口属性
         self.setWindowTitle("Twitter账号管理工具 v1.0")
@@ -36,31 +48,165 @@ class MainWindow(QMainWindow):
         self.setStatusBar(self.status_bar)
         self.status_bar.showMessage("就绪")
         
+        # 监测事件循环卡顿，结果写入日志并显示在诊断页
+        self.watchdog = EventLoopWatchdog(parent=self)
+        self.watchdog.stall_detected.connect(self._on_stall)
+        self.watchdog.start()
+        
         # 创建主选项卡
         self.tabs = QTabWidget()
         
         # 创建各个功能面板
-        self.login_panel = LoginPanel(self.config)
         self.group_panel = GroupPanel(self.config)
+        self.login_panel = LoginPanel(
+            self.config, self.group_panel.group_manager.registry)
+        self.analytics_panel = AnalyticsPanel(
+            self.config, self.group_panel.group_manager)
+        self.group_stats = GroupStats(
+            self.group_panel.group_manager,
+            stale_after=settings['health_check_hours'] * 3600)
+        self.stats_panel = StatsPanel(self.group_stats)
+        self.diagnostics_panel = DiagnosticsPanel(self.watchdog)
         self.settings_panel = SettingsPanel(self.config)
         
         # 连接配置变更信号
         self.settings_panel.config_changed.connect(self.handle_config_change)
+        self.group_panel.groups_updated.connect(self.analytics_panel.refresh_groups)
+        self.login_panel.login_complete.connect(self._on_login_complete)
+        self.login_panel.daemon_event.connect(self._on_daemon_event)
         
         # 添加选项卡
         self.tabs.addTab(self.login_panel, "账号登录")
         self.tabs.addTab(self.group_panel, "分组管理")
+        self.tabs.addTab(self.analytics_panel, "互动分析")
+        self.tabs.addTab(self.stats_panel, "分组统计")
+        self.tabs.addTab(self.diagnostics_panel, "诊断")
         self.tabs.addTab(self.settings_panel, "设置")
         
         # 设置中心部件
         self.setCentralWidget(self.tabs)
         
+        # 后台账号健康检查
+        group_manager = self.group_panel.group_manager
+        self.health_scheduler = HealthCheckScheduler(
+            group_manager.registry,
+            on_update=group_manager.mark_accounts_changed
+        )
+        self.health_scheduler.account_checked.connect(self._on_account_checked)
+        self.apply_health_settings(settings)
+        
+        if settings['use_daemon']:
+            self.connect_daemon()
+        
         self.logger.info("主窗口初始化完成")
     
     def handle_config_change(self, new_config: dict):
         """处理配置变更"""
         self.logger.debug(f"配置变更: {new_config}")
+        self.apply_network_settings(new_config)
+        self.apply_health_settings(new_config)
+        if new_config['use_daemon'] and self.daemon is None:
+            self.connect_daemon()
+        elif not new_config['use_daemon'] and self.daemon is not None:
+            self.disconnect_daemon()
+        self.login_panel.apply_settings(new_config)
+        self.group_panel.apply_settings(new_config)
         self.config_changed.emit(new_config)
         
         # 更新状态栏消息
-        self.status_bar.showMessage("配置已更新，部分设置可能需要重启应用生效", 5000)
\ No newline at end of file
+        self.status_bar.showMessage("配置已更新，线程数和超时已即时生效，界面设置需要重启应用", 5000)
+    
+    def apply_network_settings(self, settings: dict):
+        """调整共享HTTP连接池、超时、对冲和出口代理，已连接后台服务时同步给服务"""
+        configure_network(settings)
+        if self.daemon is not None:
+            get_shared_scheduler().submit_callable(
+                self._configure_daemon, self.daemon, settings,
+                priority=PRIORITY_INTERACTIVE)
+    
+    def _configure_daemon(self, client, settings: dict):
+        try:
+            client.call('configure', settings=settings)
+        except DaemonError as e:
+            self.logger.warning(f"同步设置到后台服务失败: {str(e)}")
+    
+    def connect_daemon(self):
+        """在后台线程中连接后台服务(未运行时启动)，连接后批量验证交给服务执行"""
+        self.status_bar.showMessage("正在连接后台服务...")
+        worker = Worker(self._connect_daemon)
+        worker.signals.result.connect(self._on_daemon_connected)
+        worker.signals.error.connect(self._on_daemon_connect_error)
+        get_shared_scheduler().submit(worker, PRIORITY_INTERACTIVE)
+    
+    def _connect_daemon(self, progress_callback=None):
+        client = connect_or_spawn()
+        # 服务可能由其他窗口以旧设置启动
+        client.call('configure', settings=self.config.get_app_settings())
+        return client
+    
+    def _on_daemon_connected(self, client):
+        if not self.config.get_app_settings()['use_daemon']:
+            # 连接期间设置已关闭
+            client.close()
+            return
+        self.daemon = client
+        self.login_panel.attach_daemon(client)
+        self.status_bar.showMessage("已连接后台服务，批量验证由服务执行", 5000)
+    
+    def _on_daemon_connect_error(self, error_msg: str):
+        self.logger.error(f"连接后台服务失败: {error_msg}")
+        self.status_bar.showMessage("后台服务不可用，批量验证在本窗口中执行", 5000)
+    
+    def _on_daemon_event(self, event: dict):
+        if event.get('event') == 'disconnected':
+            self.daemon = None
+            self.status_bar.showMessage("后台服务连接已断开，批量验证改在本窗口中执行", 5000)
+    
+    def disconnect_daemon(self):
+        """断开后台服务，服务和其中的任务继续运行"""
+        self.login_panel.detach_daemon()
+        self.daemon = None
+    
+    def apply_health_settings(self, settings: dict):
+        """启停后台健康检查并调整周期和速率，超过检查周期未验证的账号在统计中视为过期"""
+        self.group_stats.stale_after = settings['health_check_hours'] * 3600
+        self.health_scheduler.configure(
+            settings['health_check_hours'] * 3600,
+            settings['health_check_rate']
+        )
+        if settings['health_check_enabled']:
+            self.health_scheduler.start()
+        else:
+            self.health_scheduler.stop()
+    
+    def _on_account_checked(self, record):
+        """显示后台验证结果"""
+        # 保存已由on_update在检查线程中触发，这里只更新索引和界面
+        self.group_panel.group_manager.notify_accounts_updated([record.username])
+        self.status_bar.showMessage(
+            f"后台验证 @{record.username}: {record.status}", 3000)
+    
+    def _on_login_complete(self, records: list):
+        """登录和重新验证的结果写入注册表后，保存并更新索引和统计"""
+        self.group_panel.group_manager.mark_accounts_changed(
+            [record.username for record in records])
+    
+    def _on_stall(self, record):
+        """提示较长的卡顿，详细堆栈已写入日志"""
+        if record.duration >= 1.0:
+            self.status_bar.showMessage(
+                f"界面卡顿 {record.duration:.1f}秒，阻塞位置: {record.culprit or '未知'}", 5000)
+    
+    def closeEvent(self, event):
+        """关闭窗口前保存未写入的数据"""
+        self.watchdog.stop()
+        self.health_scheduler.stop()
+        get_shared_proxy_pool().stop()
+        self.group_panel.avatars.close()
+        if self.daemon is not None:
+            self.disconnect_daemon()
+        try:
+            self.group_panel.group_manager.close()
+        except Exception as e:
+            self.logger.error(f"关闭时保存分组失败: {str(e)}")
+        super().closeEvent(event)
\ No newline at end of file
@@ -0,0 +1,139 @@
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel,
+                            QTableWidget, QTableWidgetItem, QHeaderView)
+from PyQt5.QtCore import QTimer, pyqtSignal
+from core.group_events import GroupChangeEvent
+from core.group_stats import GroupStats
+import logging
+from typing import List, Optional
+
+logger = logging.getLogger("StatsPanel")
+
+# 收到变更后延迟刷新(毫秒)，合并批量操作产生的多个事件
+REFRESH_DELAY_MS = 300
+
+
+def format_age(seconds: Optional[float]) -> str:
+    """把距今秒数格式化为"3小时前"的形式"""
+    if seconds is None:
+        return "-"
+    seconds = max(0, seconds)
+    if seconds < 60:
+        return "刚刚"
+    if seconds < 3600:
+        return f"{int(seconds // 60)}分钟前"
+    if seconds < 86400:
+        return f"{int(seconds // 3600)}小时前"
+    return f"{int(seconds // 86400)}天前"
+
+
+class StatsPanel(QWidget):
+    """分组统计面板
+
+    数据来自增量维护的GroupStats，刷新只与分组数有关，
+    账号很多时打开面板也不需要扫描全部账号。
+    """
+
+    _changed = pyqtSignal()  # 从任意线程转发分组变更
+
+    COLUMNS = ["分组", "账号数", "有效", "无效", "出错", "未验证", "过期",
+               "最近验证", "验证中位", "最早验证"]
+
+    def __init__(self, stats: GroupStats):
+        super().__init__()
+        self.logger = logging.getLogger("StatsPanel")
+        self.stats = stats
+        self._refresh_timer = QTimer(self)
+        self._refresh_timer.setSingleShot(True)
+        self._refresh_timer.setInterval(REFRESH_DELAY_MS)
+        self._refresh_timer.timeout.connect(self.refresh)
+        self.init_ui()
+        self._changed.connect(self._schedule_refresh)
+        stats.manager.subscribe(self._on_group_event)
+
+    def init_ui(self):
+        """初始化用户界面"""
+        self.logger.debug("初始化统计面板UI")
+
+        layout = QVBoxLayout()
+
+        self.summary_label = QLabel()
+        self.group_table = self._create_table(self.COLUMNS)
+        self.overlap_table = self._create_table(["分组", "分组", "共同账号"])
+
+        tables_layout = QHBoxLayout()
+        left_layout = QVBoxLayout()
+        left_layout.addWidget(QLabel("分组统计:"))
+        left_layout.addWidget(self.group_table)
+        right_layout = QVBoxLayout()
+        right_layout.addWidget(QLabel("分组重叠:"))
+        right_layout.addWidget(self.overlap_table)
+        tables_layout.addLayout(left_layout, 70)
+        tables_layout.addLayout(right_layout, 30)
+
+        layout.addWidget(self.summary_label)
+        layout.addLayout(tables_layout)
+        self.setLayout(layout)
+
+        self.logger.info("统计面板初始化完成")
+
+    @staticmethod
+    def _create_table(headers: List[str]) -> QTableWidget:
+        """创建只读表格"""
+        table = QTableWidget(0, len(headers))
+        table.setHorizontalHeaderLabels(headers)
+        table.setEditTriggers(QTableWidget.NoEditTriggers)
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        table.verticalHeader().setVisible(False)
+        return table
+
+    def _on_group_event(self, event: GroupChangeEvent):
+        """订阅回调，可能在工作线程中执行"""
+        self._changed.emit()
+
+    def _schedule_refresh(self):
+        # 不可见时等到showEvent再刷新
+        if self.isVisible():
+            self._refresh_timer.start()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
+
+    @staticmethod
+    def _row(name: str, summary: dict) -> tuple:
+        return (name, summary['count'], summary['valid'], summary['invalid'],
+                summary['error'], summary['unverified'], summary['stale'],
+                format_age(summary['newest_age']), format_age(summary['median_age']),
+                format_age(summary['oldest_age']))
+
+    def refresh(self):
+        """从GroupStats读取统计并显示"""
+        overall = self.stats.summary()
+        groups = self.stats.all_summaries()
+        overlap = self.stats.overlap()
+
+        hours = self.stats.stale_after / 3600
+        self.summary_label.setText(
+            f"共 {len(groups)} 个分组、{overall['count']} 个账号: "
+            f"有效 {overall['valid']}, 无效 {overall['invalid']}, "
+            f"出错 {overall['error']}, 未验证 {overall['unverified']}, "
+            f"超过{hours:g}小时未验证 {overall['stale']}")
+
+        rows = [self._row(name, groups[name]) for name in sorted(groups)]
+        rows.append(self._row("全部(去重)", overall))
+        self._fill_table(self.group_table, rows)
+
+        self._fill_table(self.overlap_table, [
+            (a, b, count)
+            for (a, b), count in sorted(overlap.items(), key=lambda item: -item[1])
+        ])
+
+    @staticmethod
+    def _fill_table(table: QTableWidget, rows: List[tuple]):
+        """填充表格"""
+        table.setUpdatesEnabled(False)
+        table.setRowCount(len(rows))
+        for r, row in enumerate(rows):
+            for c, value in enumerate(row):
+                table.setItem(r, c, QTableWidgetItem(str(value)))
+        table.setUpdatesEnabled(True)